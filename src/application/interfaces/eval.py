@@ -3,9 +3,179 @@ from pathlib import Path
 import pandas as pd
 from typing import Dict, Any, List, Optional
 
+from domain.value_objects.eval_context import EvalContextConfig
+
+
+class ColumnMetrics:
+    """Confusion counts and derived metrics for one compared column (or for all columns together)."""
+
+    def __init__(self, tp: int = 0, fp: int = 0, fn: int = 0, tn: int = 0, matches: int = 0, total: int = 0):
+        self.tp = tp
+        self.fp = fp
+        self.fn = fn
+        self.tn = tn
+        self.matches = matches
+        self.total = total
+
+    @property
+    def accuracy(self) -> float:
+        return float(self.matches / self.total) if self.total > 0 else 0.0
+
+    @property
+    def precision(self) -> float:
+        return float(self.tp / (self.tp + self.fp)) if (self.tp + self.fp) > 0 else 0.0
+
+    @property
+    def recall(self) -> float:
+        return float(self.tp / (self.tp + self.fn)) if (self.tp + self.fn) > 0 else 0.0
+
+    @property
+    def f1(self) -> float:
+        precision, recall = self.precision, self.recall
+        return float(2 * (precision * recall) / (precision + recall)) if (precision + recall) > 0 else 0.0
+
+    def __add__(self, other: "ColumnMetrics") -> "ColumnMetrics":
+        return ColumnMetrics(
+            tp=self.tp + other.tp,
+            fp=self.fp + other.fp,
+            fn=self.fn + other.fn,
+            tn=self.tn + other.tn,
+            matches=self.matches + other.matches,
+            total=self.total + other.total
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tp": self.tp,
+            "fp": self.fp,
+            "fn": self.fn,
+            "tn": self.tn,
+            "matches": self.matches,
+            "total": self.total,
+            "accuracy": self.accuracy,
+            "precision": self.precision,
+            "recall": self.recall,
+            "f1": self.f1
+        }
+
+
+class EvalMetrics:
+    """All metrics of one evaluation, computed in a single pass and shared by every output writer."""
+
+    # Per-row count columns (one row per compared country), used for resampling
+    ROW_STAT_COLUMNS = ["matches", "total", "tp", "fp", "fn"]
+
+    def __init__(
+        self,
+        overall: ColumnMetrics,
+        per_column: Dict[str, ColumnMetrics],
+        row_stats: Optional[pd.DataFrame] = None
+    ):
+        self.overall = overall
+        self.per_column = per_column
+        self.row_stats = row_stats
+
+    @property
+    def per_column_accuracy(self) -> Dict[str, float]:
+        return {col: m.accuracy for col, m in self.per_column.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "overall": self.overall.to_dict(),
+            "per_column": {col: m.to_dict() for col, m in self.per_column.items()}
+        }
+
+
+class ConfidenceInterval:
+    """Bootstrap confidence interval of one metric."""
+
+    def __init__(self, estimate: float, lower: float, upper: float, confidence: float, n_resamples: int):
+        self.estimate = estimate
+        self.lower = lower
+        self.upper = upper
+        self.confidence = confidence
+        self.n_resamples = n_resamples
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "estimate": self.estimate,
+            "lower": self.lower,
+            "upper": self.upper,
+            "confidence": self.confidence,
+            "n_resamples": self.n_resamples
+        }
+
+
+class PairedComparison:
+    """Paired bootstrap test of a metric difference (model_a - model_b) over the countries both runs cover."""
+
+    def __init__(
+        self,
+        metric: str,
+        model_a: str,
+        model_b: str,
+        difference: ConfidenceInterval,
+        p_value: float,
+        common_rows: int
+    ):
+        self.metric = metric
+        self.model_a = model_a
+        self.model_b = model_b
+        self.difference = difference
+        self.p_value = p_value
+        self.common_rows = common_rows
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "metric": self.metric,
+            "model_a": self.model_a,
+            "model_b": self.model_b,
+            "difference": self.difference.estimate,
+            "ci_lower": self.difference.lower,
+            "ci_upper": self.difference.upper,
+            "p_value": self.p_value,
+            "common_rows": self.common_rows
+        }
+
+
+class ArtifactMode:
+    """How an evaluation writes its output files."""
+    SYNC = "sync"              # written before the result is returned
+    BACKGROUND = "background"  # prepared in memory and written after the result is returned
+    NONE = "none"              # metrics only
+
+    ALL = [SYNC, BACKGROUND, NONE]
+
+
+class EvalArtifacts:
+    """Output files of an evaluation prepared in memory, to be written into output_dir."""
+
+    HIGHLIGHTED_ERRORS_FILE = "highlighted_errors.csv"
+    METRICS_TXT_FILE = "evaluation_metrics.txt"
+
+    def __init__(
+        self,
+        output_dir: Path,
+        highlighted_errors: pd.DataFrame,
+        metrics_report: str,
+        input_csv_path: Optional[Path] = None
+    ):
+        self.output_dir = output_dir
+        self.highlighted_errors = highlighted_errors
+        self.metrics_report = metrics_report
+        self.input_csv_path = input_csv_path
+
+    @property
+    def highlighted_errors_path(self) -> Path:
+        return self.output_dir / self.HIGHLIGHTED_ERRORS_FILE
+
+    @property
+    def metrics_txt_path(self) -> Path:
+        return self.output_dir / self.METRICS_TXT_FILE
+
 
 class EvalResult:
-    """Result object containing evaluation metrics and file paths."""
+    """Result object containing evaluation metrics and file paths (None when no artifacts are written)."""
 
     def __init__(
         self,
@@ -21,10 +191,13 @@ class EvalResult:
         missing_in_generated: List[str],
         extra_in_generated: List[str],
         per_column_accuracy: Dict[str, float],
-        output_dir: Path,
-        highlighted_errors_path: Path,
+        output_dir: Optional[Path],
+        highlighted_errors_path: Optional[Path],
         detailed_comparison_path: Optional[Path],
-        metrics_txt_path: Path
+        metrics_txt_path: Optional[Path],
+        metrics: Optional[EvalMetrics] = None,
+        confidence_intervals: Optional[Dict[str, ConfidenceInterval]] = None,
+        pending_artifacts: Optional[EvalArtifacts] = None
     ):
         self.accuracy = accuracy
         self.precision = precision
@@ -42,6 +215,45 @@ class EvalResult:
         self.highlighted_errors_path = highlighted_errors_path
         self.detailed_comparison_path = detailed_comparison_path
         self.metrics_txt_path = metrics_txt_path
+        self.metrics = metrics
+        self.confidence_intervals = confidence_intervals or {}
+        # Set in ArtifactMode.BACKGROUND: the files at the paths above still have to be written
+        self.pending_artifacts = pending_artifacts
+
+
+class JobEvalResult:
+    """Evaluation of a job's rows so far; is_final once the job has finished processing."""
+
+    def __init__(
+        self,
+        job_id: str,
+        job_status: str,
+        files_processed: int,
+        total_files: int,
+        rows_evaluated: int,
+        is_final: bool,
+        cached: bool,
+        result: EvalResult
+    ):
+        self.job_id = job_id
+        self.job_status = job_status
+        self.files_processed = files_processed
+        self.total_files = total_files
+        self.rows_evaluated = rows_evaluated
+        self.is_final = is_final
+        self.cached = cached
+        self.result = result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "job_status": self.job_status,
+            "files_processed": self.files_processed,
+            "total_files": self.total_files,
+            "rows_evaluated": self.rows_evaluated,
+            "is_final": self.is_final,
+            "cached": self.cached
+        }
 
 
 class BaseEvaluator(ABC):
@@ -52,7 +264,9 @@ class BaseEvaluator(ABC):
         self,
         input_csv_path: Path,
         context: str,
-        model_name: str = "unknown"
+        model_name: str = "unknown",
+        bootstrap_samples: int = 0,
+        artifacts: str = ArtifactMode.SYNC
     ) -> EvalResult:
         """
         Evaluate input CSV against reference CSV for given context.
@@ -61,6 +275,8 @@ class BaseEvaluator(ABC):
             input_csv_path: Path to the input CSV file to evaluate
             context: Context name (e.g., "90_prep_sti")
             model_name: Name of the model being evaluated
+            bootstrap_samples: Number of bootstrap resamples for confidence intervals (0 = none)
+            artifacts: ArtifactMode for the output files (sync, background or none)
 
         Returns:
             EvalResult containing metrics and output file paths
@@ -71,7 +287,50 @@ class BaseEvaluator(ABC):
         """
         pass
 
+    @abstractmethod
+    def evaluate_frame(
+        self,
+        df_generated: pd.DataFrame,
+        context: str,
+        model_name: str = "unknown",
+        input_csv_path: Optional[Path] = None,
+        bootstrap_samples: int = 0,
+        artifacts: str = ArtifactMode.SYNC
+    ) -> EvalResult:
+        """Evaluate an already loaded, aggregated DataFrame (same arguments and errors as evaluate)."""
+        pass
+
+    @abstractmethod
+    def write_artifacts(self, artifacts: EvalArtifacts) -> None:
+        """Write artifacts prepared by an evaluation in ArtifactMode.BACKGROUND (result.pending_artifacts)."""
+        pass
+
     @abstractmethod
     def get_supported_contexts(self) -> List[str]:
         """Return list of supported evaluation contexts."""
         pass
+
+    @abstractmethod
+    def get_context_configs(self) -> List[EvalContextConfig]:
+        """Return the configs of the supported evaluation contexts."""
+        pass
+
+
+class BatchEvalResult:
+    """Results of scoring several runs against the same context, with comparison tables."""
+
+    def __init__(
+        self,
+        context: str,
+        results: Dict[str, EvalResult],
+        errors: Dict[str, str],
+        comparison: pd.DataFrame,
+        per_column: pd.DataFrame,
+        paired_tests: Optional[List[PairedComparison]] = None
+    ):
+        self.context = context
+        self.results = results
+        self.errors = errors
+        self.comparison = comparison
+        self.per_column = per_column
+        self.paired_tests = paired_tests or []
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import List
 from uuid import UUID
 from domain.entities.job import Job
 
@@ -27,3 +28,10 @@ class JobRepository(ABC):
         Updates an existing job.
         """
         pass
+
+    @abstractmethod
+    def list_jobs(self) -> List[Job]:
+        """
+        Returns all jobs.
+        """
+        pass
@@ -1,8 +1,26 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from domain.value_objects.column import Column
 
+# Record key under which clients report the LLMUsage of the request (removed by LLMProcessor)
+USAGE_KEY = "_usage"
+
+class LLMTransientError(RuntimeError):
+    """The request failed for a temporary reason (timeout, rate limit, server error); retrying may succeed."""
+    pass
+
+
+class LLMParseError(ValueError):
+    """The model answered, but the answer could not be parsed into the expected structure."""
+    pass
+
+
+class LLMPermanentError(RuntimeError):
+    """The request cannot succeed as sent (invalid document, rejected request); retrying will not help."""
+    pass
+
+
 class BaseLLMClient(ABC):
     """
     Abstract base class for LLM clients.
@@ -27,12 +45,59 @@ class BaseLLMClient(ABC):
         self,
         document_path: Path,
         prompt: str,
+        columns: Optional[List[Column]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Process the document with the LLM and return structured data.
 
         :param document: The document to process as bytes.
         :param prompt: The prompt to use for processing.
-        :return: List of dictionaries containing the processed data.
+        :param columns: The columns to extract; clients that support it constrain the output to their schema.
+        :return: List of dictionaries containing the processed data; clients that know the tokens billed add
+            an LLMUsage under USAGE_KEY (and set it as the 'usage' attribute of errors raised after an answer).
+        :raises LLMTransientError, LLMParseError, LLMPermanentError: classified failures (see RetryPolicy)
+        """
+        pass
+
+    def load(self) -> float:
+        """
+        Requests in flight or waiting relative to the client's quota (>= 1: no free slot).
+        Unlimited clients report 0; wrappers report the load of the client they wrap.
+        """
+        return 0.0
+
+    def capacity(self) -> Optional[int]:
+        """
+        Requests the client's quota allows in flight at once, or None if it declares no limit.
+        Wrappers report the capacity of the client they wrap.
+        """
+        return None
+
+
+class BaseLLMClientPool(ABC):
+    """
+    Abstract base class for a set of LLM clients keyed by model, each with its own capacity.
+    """
+
+    @abstractmethod
+    def models(self) -> List[str]:
+        """Names of the models in the pool."""
+        pass
+
+    @abstractmethod
+    def select(self, models: List[str]) -> BaseLLMClient:
+        """
+        The client to send the next request to, among the given models (in order of preference).
+
+        :raises ValueError: if none of the models is in the pool
+        """
+        pass
+
+    @abstractmethod
+    def capacity(self, models: List[str]) -> Optional[int]:
+        """
+        Requests the given models' quotas allow in flight at once, or None if one of them declares no limit.
+
+        :raises ValueError: if a model is not in the pool
         """
         pass
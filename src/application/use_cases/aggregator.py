@@ -1,6 +1,9 @@
 import logging
 import pandas as pd
-from typing import List, Dict, Any, cast
+from typing import List, Dict, Any, Optional, Tuple, cast
+
+from application.utils.metrics import AGGREGATION_SECONDS
+from domain.value_objects.llm_usage import USAGE_COLUMNS
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -16,6 +19,10 @@ class Aggregator:
         self.grouping_key = "country_alpha_3_code"
 
     def aggregate(self, df: pd.DataFrame) -> pd.DataFrame:
+        with AGGREGATION_SECONDS.time():
+            return self._aggregate(df)
+
+    def _aggregate(self, df: pd.DataFrame) -> pd.DataFrame:
         logger.info(f"Aggregator starting with {len(df)} raw records")
 
         self._validate_input(df)
@@ -43,6 +50,40 @@ class Aggregator:
         logger.info(f"Aggregation completed successfully: {len(result)} final records with {len(result.columns)} columns")
         return result
 
+    def aggregate_incremental(
+        self,
+        previous: Optional[pd.DataFrame],
+        exploded: Optional[pd.DataFrame],
+        new_rows: pd.DataFrame
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Update an aggregation with newly arrived raw records, re-aggregating only the countries they mention.
+        'exploded' holds the raw records seen so far, one row per country, as returned by the previous call
+        (None on the first call). Returns (aggregated, exploded) for the next call; the aggregation equals
+        aggregate() over all records seen so far.
+        """
+        self._validate_input(new_rows)
+
+        new_exploded = self._safe_explode_countries(new_rows)
+        if exploded is None:
+            exploded = new_exploded.reset_index(drop=True)
+        else:
+            exploded = pd.concat([exploded, new_exploded], ignore_index=True)
+
+        affected = set(new_exploded[self.grouping_key])
+        if previous is not None and not affected:
+            return previous, exploded
+
+        logger.info(f"Incremental aggregation: {len(new_rows)} new records affecting {len(affected)} countries")
+        updated = self.aggregate(exploded[exploded[self.grouping_key].isin(affected)])
+        if previous is None:
+            return updated, exploded
+
+        unchanged = previous[~previous[self.grouping_key].isin(affected)]
+        aggregated = pd.concat([unchanged, updated], ignore_index=True)
+        aggregated = aggregated.sort_values(self.grouping_key, kind="stable").reset_index(drop=True)
+        return aggregated[updated.columns], exploded
+
     def _safe_explode_countries(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Safely explode rows where country_alpha_3_code and country contain comma-separated
@@ -87,6 +128,7 @@ class Aggregator:
         regular_columns = [
             col for col in all_columns
             if not col.endswith('_justification') and col not in ("source_file", "error")
+            and col not in USAGE_COLUMNS
         ]
 
         return regular_columns, justification_columns
@@ -0,0 +1,134 @@
+import io
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from application.interfaces.eval import ArtifactMode, EvalMetrics, EvalResult, PairedComparison
+from application.use_cases.aggregator import Aggregator
+from application.use_cases.eval.bootstrap import paired_bootstrap_test
+from application.use_cases.eval.prep_sti_evaluator import PrepSTIEvaluator
+
+logger = logging.getLogger(__name__)
+
+# CPU-bound entry points executed inside CPUTaskRunner worker processes.
+# Each worker keeps its own evaluator (with its own reference cache) and aggregator,
+# so reference datasets are parsed once per worker rather than once per request.
+_evaluator: Optional[PrepSTIEvaluator] = None
+_aggregator: Optional[Aggregator] = None
+
+
+def init_worker(reference_data_dir: Optional[Path] = None, max_output_dirs: Optional[int] = None) -> None:
+    """
+    Process pool initializer: build the per-worker evaluator and preload its references.
+    """
+    global _evaluator, _aggregator
+    _evaluator = PrepSTIEvaluator(reference_data_dir, max_output_dirs=max_output_dirs)
+    _evaluator.preload_references()
+    _aggregator = Aggregator()
+
+
+def _get_evaluator() -> PrepSTIEvaluator:
+    global _evaluator
+    if _evaluator is None:
+        _evaluator = PrepSTIEvaluator()
+    return _evaluator
+
+
+def _get_aggregator() -> Aggregator:
+    global _aggregator
+    if _aggregator is None:
+        _aggregator = Aggregator()
+    return _aggregator
+
+
+def evaluate_csv(
+    input_csv_path: Path,
+    context: str,
+    model_name: str = "unknown",
+    bootstrap_samples: int = 0,
+    artifacts: str = ArtifactMode.SYNC
+) -> EvalResult:
+    """
+    Evaluate a CSV file against the reference of a context.
+    Raw extraction CSVs (one row per document) are aggregated by country first.
+    In ArtifactMode.BACKGROUND the prepared files come back in result.pending_artifacts
+    and are written by the API process (see write_eval_artifacts).
+    """
+    df = pd.read_csv(input_csv_path)
+    if is_raw_frame(df):
+        logger.info(f"Aggregating raw input {input_csv_path.name} ({len(df)} rows) before evaluation")
+        df = _get_aggregator().aggregate(df)
+    return _get_evaluator().evaluate_frame(
+        df, context, model_name, input_csv_path, bootstrap_samples=bootstrap_samples, artifacts=artifacts
+    )
+
+
+def evaluate_frame(
+    df: pd.DataFrame,
+    context: str,
+    model_name: str = "unknown",
+    bootstrap_samples: int = 0,
+    artifacts: str = ArtifactMode.NONE
+) -> EvalResult:
+    """
+    Evaluate an aggregated frame (e.g. a job's rows) against the reference of a context.
+    """
+    return _get_evaluator().evaluate_frame(
+        df, context, model_name, bootstrap_samples=bootstrap_samples, artifacts=artifacts
+    )
+
+
+def aggregate_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate raw extraction rows by country.
+    """
+    return _get_aggregator().aggregate(df)
+
+
+def aggregate_incremental(
+    aggregated: Optional[pd.DataFrame],
+    exploded: Optional[pd.DataFrame],
+    new_rows: pd.DataFrame
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Fold new raw rows into a previous aggregation (see Aggregator.aggregate_incremental).
+    """
+    return _get_aggregator().aggregate_incremental(aggregated, exploded, new_rows)
+
+
+def paired_test(
+    name_a: str,
+    metrics_a: EvalMetrics,
+    name_b: str,
+    metrics_b: EvalMetrics,
+    n_resamples: int
+) -> List[PairedComparison]:
+    """
+    Paired bootstrap test of the metric differences between two evaluated runs.
+    """
+    return paired_bootstrap_test(name_a, metrics_a, name_b, metrics_b, n_resamples)
+
+
+def is_raw_frame(df: pd.DataFrame) -> bool:
+    """
+    Raw extraction output has one row per document, identified by its 'source_file' column.
+    """
+    return "source_file" in df.columns
+
+
+def aggregate_csv_bytes(content: bytes) -> pd.DataFrame:
+    """
+    Parse a raw CSV payload and aggregate it by country.
+
+    :raises ValueError: if the CSV cannot be read or aggregated
+    """
+    try:
+        df = pd.read_csv(io.BytesIO(content))
+    except Exception as e:
+        raise ValueError(f"Failed to read CSV: {e}")
+    try:
+        return _get_aggregator().aggregate(df)
+    except Exception as e:
+        raise ValueError(f"Aggregation failed: {e}")
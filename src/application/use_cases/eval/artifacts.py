@@ -0,0 +1,84 @@
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+
+from application.interfaces.eval import EvalArtifacts
+
+logger = logging.getLogger(__name__)
+
+
+def create_output_dir(output_root: Path, context: str, model_name: str, timestamp: str) -> Path:
+    """
+    Create data/output/<context>/<model>_<timestamp>, adding a numeric suffix when several
+    evaluations of the same model start within the same second.
+    """
+    context_dir = output_root / context
+    context_dir.mkdir(parents=True, exist_ok=True)
+
+    base_name = f"{model_name}_{timestamp}"
+    output_dir = context_dir / base_name
+    suffix = 1
+    while True:
+        try:
+            output_dir.mkdir()
+            return output_dir
+        except FileExistsError:
+            output_dir = context_dir / f"{base_name}_{suffix}"
+            suffix += 1
+
+
+def write_eval_artifacts(artifacts: EvalArtifacts, max_output_dirs: Optional[int] = None) -> Dict[str, Path]:
+    """
+    Write the prepared output files (input copy, highlighted errors, metrics report), then apply
+    the retention cap to the context's output directories.
+    """
+    output_dir = artifacts.output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Copy input CSV to output directory with original name
+    if artifacts.input_csv_path is not None:
+        shutil.copy2(artifacts.input_csv_path, output_dir / artifacts.input_csv_path.name)
+
+    artifacts.highlighted_errors.to_csv(artifacts.highlighted_errors_path, index=False)
+    artifacts.metrics_txt_path.write_text(artifacts.metrics_report)
+    logger.debug(f"Evaluation artifacts written to {output_dir}")
+
+    if max_output_dirs:
+        prune_output_dirs(output_dir.parent, max_output_dirs, keep=output_dir)
+
+    return {
+        "highlighted_errors": artifacts.highlighted_errors_path,
+        "metrics_txt": artifacts.metrics_txt_path
+    }
+
+
+def prune_output_dirs(context_dir: Path, max_output_dirs: int, keep: Optional[Path] = None) -> int:
+    """
+    Delete the oldest output directories of a context so that at most max_output_dirs remain.
+    'keep' is never deleted. Returns the number of directories removed.
+    """
+    entries = []
+    for entry in os.scandir(context_dir):
+        if entry.is_dir(follow_symlinks=False):
+            try:
+                entries.append((entry.stat().st_mtime, Path(entry.path)))
+            except FileNotFoundError:
+                continue  # removed concurrently
+
+    excess = len(entries) - max_output_dirs
+    if excess <= 0:
+        return 0
+
+    removed = 0
+    for _, path in sorted(entries):
+        if removed >= excess:
+            break
+        if keep is not None and path == keep:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+
+    logger.info(f"Pruned {removed} old evaluation output directories from {context_dir}")
+    return removed
@@ -0,0 +1,139 @@
+import asyncio
+import itertools
+import logging
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+from application.interfaces.eval import ArtifactMode, BatchEvalResult, EvalResult, PairedComparison
+from application.use_cases import cpu_tasks
+from application.utils.cpu_task_runner import CPUTaskRunner, CPUQueueFullError
+
+logger = logging.getLogger(__name__)
+
+
+class BatchEvaluator:
+    """
+    Scores several model outputs (raw or aggregated CSVs) against one evaluation context
+    in parallel on the CPU process pool, and builds comparison tables per model and per column.
+    Each worker keeps its preprocessed reference cached, so it is shared by all runs scored there.
+    """
+
+    def __init__(self, cpu_runner: CPUTaskRunner):
+        self.cpu_runner = cpu_runner
+
+    async def evaluate(
+        self,
+        runs: Dict[str, Path],
+        context: str,
+        bootstrap_samples: int = 0,
+        artifacts: str = ArtifactMode.SYNC
+    ) -> BatchEvalResult:
+        """
+        Evaluate every run ({model_name: csv_path}) and compare them.
+        With bootstrap_samples > 0, each run gets confidence intervals and every pair of runs
+        gets a paired bootstrap test of the metric differences.
+
+        :raises CPUQueueFullError: if the CPU pool cannot accept the batch
+        """
+        logger.info(f"Batch evaluation of {len(runs)} runs for context {context}")
+
+        # Never hold more pool slots than the pool can run at once, leaving the queue to other requests
+        slots = asyncio.Semaphore(self.cpu_runner.max_concurrency)
+
+        async def run_one(model_name: str, path: Path) -> EvalResult:
+            async with slots:
+                return await self.cpu_runner.run(
+                    cpu_tasks.evaluate_csv, path, context, model_name, bootstrap_samples, artifacts
+                )
+
+        names = list(runs)
+        outcomes = await asyncio.gather(
+            *[run_one(name, runs[name]) for name in names],
+            return_exceptions=True
+        )
+
+        results: Dict[str, EvalResult] = {}
+        errors: Dict[str, str] = {}
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, CPUQueueFullError):
+                raise outcome
+            if isinstance(outcome, BaseException):
+                logger.error(f"Batch evaluation failed for {name}: {outcome}")
+                errors[name] = str(outcome)
+            else:
+                results[name] = outcome
+
+        paired_tests = None
+        if bootstrap_samples > 0:
+            paired_tests = await self.build_paired_tests(results, bootstrap_samples, slots)
+
+        return BatchEvalResult(
+            context=context,
+            results=results,
+            errors=errors,
+            comparison=self.build_comparison(results),
+            per_column=self.build_per_column(results),
+            paired_tests=paired_tests
+        )
+
+    @staticmethod
+    def build_comparison(results: Dict[str, EvalResult]) -> pd.DataFrame:
+        """One row per model with the overall metrics, best F1 first."""
+        rows = [
+            {
+                "model": name,
+                "accuracy": r.accuracy,
+                "precision": r.precision,
+                "recall": r.recall,
+                "f1": r.f1,
+                "total_matches": r.total_matches,
+                "total_cells": r.total_cells,
+                "common_countries": r.common_countries,
+                "missing_in_generated": len(r.missing_in_generated),
+                "extra_in_generated": len(r.extra_in_generated),
+            }
+            for name, r in results.items()
+        ]
+        columns = ["model", "accuracy", "precision", "recall", "f1", "total_matches", "total_cells",
+                   "common_countries", "missing_in_generated", "extra_in_generated"]
+        comparison = pd.DataFrame(rows, columns=columns)
+        return comparison.sort_values(["f1", "accuracy"], ascending=False, kind="stable").reset_index(drop=True)
+
+    @staticmethod
+    def build_per_column(results: Dict[str, EvalResult]) -> pd.DataFrame:
+        """One row per (model, column) with the per-column metrics and confusion counts."""
+        rows = []
+        for name, r in results.items():
+            if r.metrics is None:
+                continue
+            for column, m in r.metrics.per_column.items():
+                rows.append({"model": name, "column": column, **m.to_dict()})
+        columns = ["model", "column", "accuracy", "precision", "recall", "f1", "tp", "fp", "fn", "tn", "matches", "total"]
+        return pd.DataFrame(rows, columns=columns)
+
+    async def build_paired_tests(
+        self,
+        results: Dict[str, EvalResult],
+        n_resamples: int,
+        slots: asyncio.Semaphore
+    ) -> List[PairedComparison]:
+        """
+        Paired bootstrap tests for every pair of runs (in comparison order, so model_a ranks higher).
+        Each pair is resampled in a CPU pool task, never on the event loop.
+        """
+        ranked = self.build_comparison(results)["model"].tolist()
+        pairs = [
+            (name_a, name_b) for name_a, name_b in itertools.combinations(ranked, 2)
+            if results[name_a].metrics is not None and results[name_b].metrics is not None
+        ]
+
+        async def test_pair(name_a: str, name_b: str) -> List[PairedComparison]:
+            async with slots:
+                return await self.cpu_runner.run(
+                    cpu_tasks.paired_test, name_a, results[name_a].metrics, name_b, results[name_b].metrics, n_resamples
+                )
+
+        outcomes = await asyncio.gather(*[test_pair(name_a, name_b) for name_a, name_b in pairs])
+        return [test for pair_tests in outcomes for test in pair_tests]
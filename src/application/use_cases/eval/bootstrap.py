@@ -0,0 +1,136 @@
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from application.interfaces.eval import ConfidenceInterval, EvalMetrics, PairedComparison
+
+logger = logging.getLogger(__name__)
+
+METRICS = ["accuracy", "precision", "recall", "f1"]
+
+# Upper bound of resample-weight cells held in memory at once (resamples x rows)
+MAX_WEIGHT_CELLS = 4_000_000
+
+
+def _resample_weights(rng: np.random.Generator, n_rows: int, n_resamples: int) -> np.ndarray:
+    """
+    Bootstrap weights: how many times each row is drawn in each resample (n_resamples x n_rows).
+    """
+    return rng.multinomial(n_rows, np.full(n_rows, 1.0 / n_rows), size=n_resamples)
+
+
+def _resampled_sums(counts: np.ndarray, n_resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Column sums of 'counts' (rows x stats) under every resample, as (n_resamples x stats).
+    Computed as weight-matrix products in chunks to bound memory.
+    """
+    n_rows = counts.shape[0]
+    chunk = max(1, MAX_WEIGHT_CELLS // max(n_rows, 1))
+    sums = np.empty((n_resamples, counts.shape[1]), dtype=np.float64)
+    for start in range(0, n_resamples, chunk):
+        stop = min(start + chunk, n_resamples)
+        sums[start:stop] = _resample_weights(rng, n_rows, stop - start) @ counts
+    return sums
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise ratio, 0 where the denominator is 0 (same convention as ColumnMetrics)."""
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator, dtype=np.float64), where=denominator > 0)
+
+
+def metrics_from_sums(sums: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Vectorized accuracy/precision/recall/F1 from summed [matches, total, tp, fp, fn] rows.
+    """
+    matches, total, tp, fp, fn = (sums[..., i] for i in range(5))
+    return {
+        "accuracy": _ratio(matches, total),
+        "precision": _ratio(tp, tp + fp),
+        "recall": _ratio(tp, tp + fn),
+        "f1": _ratio(2 * tp, 2 * tp + fp + fn),
+    }
+
+
+def _row_counts(metrics: EvalMetrics) -> pd.DataFrame:
+    if metrics.row_stats is None:
+        raise ValueError("Evaluation metrics have no per-row statistics to resample")
+    # Collapse duplicated keys so a country is resampled as one unit
+    return metrics.row_stats[EvalMetrics.ROW_STAT_COLUMNS].groupby(level=0).sum()
+
+
+def _interval(samples: np.ndarray, estimate: float, confidence: float) -> ConfidenceInterval:
+    alpha = 1.0 - confidence
+    lower, upper = np.quantile(samples, [alpha / 2, 1 - alpha / 2])
+    return ConfidenceInterval(
+        estimate=float(estimate),
+        lower=float(lower),
+        upper=float(upper),
+        confidence=confidence,
+        n_resamples=int(samples.shape[0])
+    )
+
+
+def bootstrap_confidence_intervals(
+    metrics: EvalMetrics,
+    n_resamples: int = 10_000,
+    confidence: float = 0.95,
+    seed: Optional[int] = None
+) -> Dict[str, ConfidenceInterval]:
+    """
+    Percentile bootstrap CIs of accuracy, precision, recall and F1, resampling countries with replacement.
+    """
+    counts = _row_counts(metrics).to_numpy(dtype=np.float64)
+    if counts.shape[0] == 0 or n_resamples <= 0:
+        return {}
+
+    rng = np.random.default_rng(seed)
+    samples = metrics_from_sums(_resampled_sums(counts, n_resamples, rng))
+    estimates = metrics_from_sums(counts.sum(axis=0))
+
+    return {name: _interval(samples[name], estimates[name], confidence) for name in METRICS}
+
+
+def paired_bootstrap_test(
+    model_a: str,
+    metrics_a: EvalMetrics,
+    model_b: str,
+    metrics_b: EvalMetrics,
+    n_resamples: int = 10_000,
+    confidence: float = 0.95,
+    seed: Optional[int] = None,
+    metric_names: Optional[List[str]] = None
+) -> List[PairedComparison]:
+    """
+    Paired bootstrap of the metric differences (a - b): both runs are resampled with the same countries,
+    restricted to countries evaluated in both. The two-sided p-value is the share of resampled
+    differences on the other side of zero, doubled.
+    """
+    rows_a, rows_b = _row_counts(metrics_a), _row_counts(metrics_b)
+    common = rows_a.index.intersection(rows_b.index)
+    if len(common) == 0 or n_resamples <= 0:
+        return []
+
+    counts_a = rows_a.loc[common].to_numpy(dtype=np.float64)
+    counts_b = rows_b.loc[common].to_numpy(dtype=np.float64)
+
+    # Resample both runs with the same weights by stacking their stats side by side
+    rng = np.random.default_rng(seed)
+    sums = _resampled_sums(np.hstack([counts_a, counts_b]), n_resamples, rng)
+    samples_a, samples_b = metrics_from_sums(sums[:, :5]), metrics_from_sums(sums[:, 5:])
+    estimates_a, estimates_b = metrics_from_sums(counts_a.sum(axis=0)), metrics_from_sums(counts_b.sum(axis=0))
+
+    comparisons = []
+    for name in metric_names or METRICS:
+        diffs = samples_a[name] - samples_b[name]
+        p_value = min(1.0, 2 * min(float(np.mean(diffs <= 0)), float(np.mean(diffs >= 0))))
+        comparisons.append(PairedComparison(
+            metric=name,
+            model_a=model_a,
+            model_b=model_b,
+            difference=_interval(diffs, estimates_a[name] - estimates_b[name], confidence),
+            p_value=p_value,
+            common_rows=len(common)
+        ))
+    return comparisons
@@ -0,0 +1,91 @@
+import json
+import logging
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from domain.value_objects.eval_context import EvalContextConfig
+
+logger = logging.getLogger(__name__)
+
+
+class EvalContextRegistry:
+    """
+    Evaluation contexts discovered from JSON config files (one per context) in config_dir.
+
+    Every lookup compares the config files' names and modification times with the last scan (a few
+    stat calls) and reloads them when any was added, removed or modified, so a context can be added or
+    changed by dropping a config file next to its reference dataset without restarting the service.
+    """
+
+    def __init__(self, config_dir: Path):
+        self.config_dir = config_dir
+        self._contexts: Dict[str, EvalContextConfig] = {}
+        self._signature: Optional[Tuple[Tuple[str, int], ...]] = None
+        self._lock = Lock()
+        self.rescan()
+
+    def names(self) -> List[str]:
+        """Names of the available contexts."""
+        self.rescan()
+        return sorted(self._contexts)
+
+    def get(self, name: str) -> EvalContextConfig:
+        """
+        Return the config of a context.
+
+        :raises ValueError: if no config file defines the context
+        """
+        self.rescan()
+        config = self._contexts.get(name)
+        if config is None:
+            raise ValueError(f"Unsupported context: {name}. Supported: {sorted(self._contexts)}")
+        return config
+
+    def all(self) -> List[EvalContextConfig]:
+        self.rescan()
+        return [self._contexts[name] for name in sorted(self._contexts)]
+
+    def rescan(self) -> bool:
+        """
+        Reload the config files if any was added, removed or modified. Returns True if contexts changed.
+        """
+        with self._lock:
+            files = sorted(self.config_dir.glob("*.json")) if self.config_dir.is_dir() else []
+            signature = tuple((str(path), path.stat().st_mtime_ns) for path in files)
+            if signature == self._signature:
+                return False
+
+            contexts: Dict[str, EvalContextConfig] = {}
+            for path in files:
+                try:
+                    config = EvalContextConfig.from_dict(json.loads(path.read_text(encoding="utf-8")), path.stem)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping evaluation context config {path}: {e}")
+                    continue
+                if config.name in contexts:
+                    logger.warning(f"Duplicate evaluation context {config.name} in {path}; keeping the first")
+                    continue
+                contexts[config.name] = config
+
+            self._contexts = contexts
+            self._signature = signature
+            logger.info(f"Loaded {len(contexts)} evaluation contexts from {self.config_dir}: {sorted(contexts)}")
+            return True
+
+
+class CompiledEvalContext:
+    """
+    A context ready for evaluation: its config, the preprocessed reference frame and the
+    precomputed evaluation plan. Built once per reference/config version and shared read-only.
+    """
+
+    def __init__(self, config: EvalContextConfig, reference: pd.DataFrame):
+        self.config = config
+        self.reference = reference
+        self.reference_keys = frozenset(reference[config.key_column].unique())
+        self.columns_to_compare = list(config.columns_to_compare)
+        # Generated frames only need the compared columns normalized
+        self.normalize_columns = frozenset(config.columns_to_compare)
@@ -0,0 +1,210 @@
+import asyncio
+import io
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+import pandas as pd
+
+from application.interfaces.eval import ArtifactMode, EvalResult, JobEvalResult
+from application.use_cases import cpu_tasks
+from application.use_cases.job_lifecycle import JobLifecycle
+from application.utils.cpu_task_runner import CPUQueueFullError, CPUTaskRunner
+from application.utils.temp_file_handler import get_job_temp_dir
+from domain.entities.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+
+class _JobEvalState:
+    """Rows of one job consumed so far, their aggregation and the evaluations computed on them."""
+
+    def __init__(self, rows_revision: int):
+        self.rows_revision = rows_revision
+        self.raw_offset = 0               # bytes of the raw CSV already parsed
+        self.header: Optional[bytes] = None
+        self.rows = 0
+        self.exploded: Optional[pd.DataFrame] = None
+        self.aggregated: Optional[pd.DataFrame] = None
+        self.final_source: Optional[pd.DataFrame] = None  # job.result the state was built from, once done
+        self.results: Dict[Tuple[str, int], EvalResult] = {}
+        self.lock = asyncio.Lock()
+
+
+class JobEvaluator:
+    """
+    Evaluates a job against a reference dataset without a CSV download/upload round-trip.
+
+    Finished jobs are evaluated from their result frame (aggregated once, shared with the job's
+    aggregated artifact). Running jobs are evaluated from the rows written so far: each call parses only
+    the raw CSV bytes appended since the previous call and re-aggregates only the countries they mention,
+    so accuracy-so-far can be polled cheaply while a long job runs.
+
+    Aggregation and scoring run on the CPU process pool, like the other evaluation paths. The state of
+    the 'max_jobs' most recently evaluated jobs is kept; older states are dropped (and rebuilt if needed).
+    """
+
+    FINISHED_STATUSES = [JobStatus.DONE, JobStatus.DONE_WITH_ERRORS]
+
+    def __init__(self, lifecycle: JobLifecycle, cpu_runner: CPUTaskRunner, max_jobs: int = 64):
+        self.lifecycle = lifecycle
+        self.cpu_runner = cpu_runner
+        self.max_jobs = max_jobs
+        self._states: "OrderedDict[UUID, _JobEvalState]" = OrderedDict()
+
+    async def evaluate(
+        self,
+        job_id: UUID,
+        context: str,
+        model_name: str = "unknown",
+        bootstrap_samples: int = 0,
+        artifacts: str = ArtifactMode.NONE
+    ) -> JobEvalResult:
+        """
+        Evaluate the rows of a job available now.
+
+        :raises ValueError: if the job does not exist or the context is not supported
+        :raises RuntimeError: if the job has no rows yet
+        :raises CPUQueueFullError: if the CPU pool queue is full
+        """
+        job = self.lifecycle.get_job(job_id)
+        state = self._state_for(job)
+
+        async with state.lock:
+            is_final = job.status in self.FINISHED_STATUSES and isinstance(job.result, pd.DataFrame)
+            if is_final:
+                changed = await self._sync_final(job, state)
+            else:
+                changed = await self._sync_partial(job, state)
+
+            if state.aggregated is None or state.rows == 0:
+                raise RuntimeError(f"Job {job_id} has no rows to evaluate yet")
+
+            key = (context, bootstrap_samples)
+            cached = not changed and artifacts == ArtifactMode.NONE and key in state.results
+            if cached:
+                result = state.results[key]
+            else:
+                if changed:
+                    state.results = {}
+                result = await self.cpu_runner.run(
+                    cpu_tasks.evaluate_frame,
+                    state.aggregated,
+                    context,
+                    model_name,
+                    bootstrap_samples,
+                    artifacts
+                )
+                state.results[key] = result
+
+        logger.info(
+            f"Job {job_id} evaluated on {state.rows} rows ({'final' if is_final else 'partial'}"
+            f"{', cached' if cached else ''}): accuracy {result.accuracy:.2%}"
+        )
+        return JobEvalResult(
+            job_id=str(job.id),
+            job_status=job.status,
+            files_processed=job.files_processed,
+            total_files=job.total_files,
+            rows_evaluated=state.rows,
+            is_final=is_final,
+            cached=cached,
+            result=result
+        )
+
+    def _state_for(self, job: Job) -> _JobEvalState:
+        """Incremental state of a job, reset when its rows were replaced (e.g. retry cleaned the raw CSV)."""
+        state = self._states.get(job.id)
+        if state is None or state.rows_revision != job.rows_revision:
+            if state is not None and state.lock.locked():
+                return state  # the running evaluation notices the new revision on its next call
+            state = _JobEvalState(job.rows_revision)
+            self._states[job.id] = state
+        self._states.move_to_end(job.id)
+        self._evict()
+        return state
+
+    def _evict(self) -> None:
+        """Drop the least recently evaluated states beyond max_jobs (except those being evaluated)."""
+        for job_id in list(self._states):
+            if len(self._states) <= self.max_jobs:
+                break
+            if not self._states[job_id].lock.locked():
+                del self._states[job_id]
+
+    async def _sync_final(self, job: Job, state: _JobEvalState) -> bool:
+        """
+        Bring the state to the finished job's result. Returns True if the evaluated rows changed.
+        """
+        result = job.result
+        if state.final_source is result:
+            return False
+
+        # The incremental aggregation already covers the result when every raw row was consumed
+        raw_path = self._raw_csv_path(job)
+        if state.aggregated is not None and state.rows == len(result) and raw_path.exists() \
+                and raw_path.stat().st_size == state.raw_offset:
+            state.final_source = result
+            return False
+
+        aggregated = self.lifecycle.cached_aggregated_result(job)
+        if aggregated is None:
+            try:
+                aggregated = await self.cpu_runner.run(cpu_tasks.aggregate_frame, result)
+            except CPUQueueFullError:
+                raise
+            except Exception as e:
+                raise RuntimeError(f"Aggregation failed for job {job.id}: {e}")
+            self.lifecycle.set_aggregated_result(job, result, aggregated)
+        state.aggregated = aggregated
+        state.exploded = None
+        state.rows = len(result)
+        state.final_source = result
+        return True
+
+    async def _sync_partial(self, job: Job, state: _JobEvalState) -> bool:
+        """
+        Consume raw CSV rows appended since the last call. Returns True if new rows were aggregated.
+        The read position only moves once the rows are aggregated, so a failed call is retried on the same rows.
+        """
+        header, chunk, offset = self._read_new_raw_bytes(job, state)
+        if not chunk:
+            if header is not None:
+                state.header, state.raw_offset = header, offset
+            return False
+
+        new_rows = pd.read_csv(io.BytesIO(header + chunk))
+        state.aggregated, state.exploded = await self.cpu_runner.run(
+            cpu_tasks.aggregate_incremental, state.aggregated, state.exploded, new_rows
+        )
+        state.header, state.raw_offset = header, offset
+        state.rows += len(new_rows)
+        return True
+
+    def _read_new_raw_bytes(self, job: Job, state: _JobEvalState) -> Tuple[Optional[bytes], bytes, int]:
+        """
+        Read the raw CSV bytes appended since the last call, without consuming them.
+        Called on the event loop thread, which is also where rows are appended, so only whole rows are seen.
+
+        :returns: the CSV header, the new rows and the offset to resume from once they are consumed
+        """
+        raw_path = self._raw_csv_path(job)
+        if not raw_path.exists() or raw_path.stat().st_size <= state.raw_offset:
+            return state.header, b"", state.raw_offset
+
+        with open(raw_path, "rb") as f:
+            f.seek(state.raw_offset)
+            data = f.read()
+        offset = state.raw_offset + len(data)
+
+        header = state.header
+        if header is None:
+            header_end = data.find(b"\n") + 1
+            header, data = data[:header_end], data[header_end:]
+        return header, data, offset
+
+    @staticmethod
+    def _raw_csv_path(job: Job) -> Path:
+        return get_job_temp_dir(str(job.id)) / f"raw_data_{job.id}.csv"
@@ -1,166 +1,256 @@
+import io
+import numpy as np
 import pandas as pd
 import logging
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, List, Optional
-from application.interfaces.eval import BaseEvaluator, EvalResult
+from typing import Dict, Any, FrozenSet, List, Optional
+from application.interfaces.eval import (
+    ArtifactMode, BaseEvaluator, ColumnMetrics, ConfidenceInterval, EvalArtifacts, EvalMetrics, EvalResult
+)
+from application.use_cases.eval.artifacts import create_output_dir, write_eval_artifacts
+from application.use_cases.eval.bootstrap import bootstrap_confidence_intervals
+from application.use_cases.eval.context_registry import CompiledEvalContext, EvalContextRegistry
+from application.use_cases.eval.reference_cache import ReferenceCache
+from application.utils.metrics import EVALUATION_SECONDS
+from domain.value_objects.eval_context import EvalContextConfig
 
 logger = logging.getLogger(__name__)
 
 
 class PrepSTIEvaluator(BaseEvaluator):
-    """Evaluator for PrEP/STI policy evaluation contexts."""
-
-    # Global constant for supported contexts
-    SUPPORTED_CONTEXTS = ["90_prep_sti"]
-
-    # Context configuration
-    CONTEXT_CONFIG = {
-        "90_prep_sti": {
-            "reference_file": "reference_90_prep_sti_cleaned.csv",
-            "key_column": "country_alpha_3_code",
-            "columns_to_compare": [
-                'partner_management',
-                'hbv_screening_for_hbsag',
-                'vaccination_for_hbv',
-                'vaccination_for_hpv',
-                'syphilis_screening',
-                'ng_screening',
-                'ct_screening'
-            ]
-        }
-    }
+    """
+    Evaluator for yes/no policy contexts such as PrEP/STI (one row per country, one column per policy).
+    Contexts come from the EvalContextRegistry (JSON configs in <reference_data_dir>/contexts).
+    """
 
-    def __init__(self, reference_data_dir: Optional[Path] = None):
-        """Initialize evaluator with reference data directory."""
+    def __init__(
+        self,
+        reference_data_dir: Optional[Path] = None,
+        reference_cache: Optional[ReferenceCache] = None,
+        output_root: Optional[Path] = None,
+        max_output_dirs: Optional[int] = None,
+        context_registry: Optional[EvalContextRegistry] = None
+    ):
+        """
+        Initialize evaluator with reference data directory, the context registry and the cache of compiled contexts.
+        Output directories go under output_root/<context>; with max_output_dirs set, only the newest are kept.
+        """
         if reference_data_dir is None:
             reference_data_dir = Path("data/reference")
         self.reference_data_dir = reference_data_dir
+        self.context_registry = context_registry or EvalContextRegistry(reference_data_dir / "contexts")
+        self.reference_cache = reference_cache or ReferenceCache()
+        self.output_root = output_root or Path("data/output")
+        self.max_output_dirs = max_output_dirs
+
+    def preload_references(self) -> None:
+        """Load, preprocess and compile every registered context ahead of the first request."""
+        for context in self.context_registry.names():
+            try:
+                self._get_compiled_context(context)
+            except Exception as e:
+                logger.warning(f"Could not preload reference for context {context}: {e}")
+
+    def write_artifacts(self, artifacts: EvalArtifacts) -> None:
+        """Write deferred output files and apply the output directory retention cap."""
+        write_eval_artifacts(artifacts, self.max_output_dirs)
 
     def get_supported_contexts(self) -> List[str]:
         """Return list of supported evaluation contexts."""
-        return self.SUPPORTED_CONTEXTS.copy()
+        return self.context_registry.names()
+
+    def get_context_configs(self) -> List[EvalContextConfig]:
+        """Return the configs of the supported evaluation contexts."""
+        return self.context_registry.all()
 
     def evaluate(
         self,
         input_csv_path: Path,
         context: str,
-        model_name: str = "unknown"
+        model_name: str = "unknown",
+        bootstrap_samples: int = 0,
+        artifacts: str = ArtifactMode.SYNC,
+        bootstrap_seed: Optional[int] = None
     ) -> EvalResult:
         """Evaluate input CSV against reference CSV for given context."""
+        return self.evaluate_frame(
+            self._load_dataset(input_csv_path), context, model_name, input_csv_path,
+            bootstrap_samples=bootstrap_samples, artifacts=artifacts, bootstrap_seed=bootstrap_seed
+        )
 
-        # Validate context
-        if context not in self.SUPPORTED_CONTEXTS:
-            raise ValueError(f"Unsupported context: {context}. Supported: {self.SUPPORTED_CONTEXTS}")
+    def evaluate_frame(
+        self,
+        df_generated_original: pd.DataFrame,
+        context: str,
+        model_name: str = "unknown",
+        input_csv_path: Optional[Path] = None,
+        bootstrap_samples: int = 0,
+        artifacts: str = ArtifactMode.SYNC,
+        bootstrap_seed: Optional[int] = None
+    ) -> EvalResult:
+        """
+        Evaluate an already loaded (aggregated) DataFrame; the input CSV, if given, is copied next to the outputs.
+        With bootstrap_samples > 0, percentile bootstrap CIs (resampling countries) are added to the result.
+
+        artifacts selects how the output files are produced: written before returning (sync), prepared in
+        memory and returned as result.pending_artifacts for the caller to write (background), or skipped (none).
+        """
+        with EVALUATION_SECONDS.time():
+            return self._evaluate_frame(
+                df_generated_original, context, model_name, input_csv_path, bootstrap_samples, artifacts, bootstrap_seed
+            )
 
-        # Get context configuration
-        config = self.CONTEXT_CONFIG[context]
-        reference_file = self.reference_data_dir / config["reference_file"]
+    def _evaluate_frame(
+        self,
+        df_generated_original: pd.DataFrame,
+        context: str,
+        model_name: str,
+        input_csv_path: Optional[Path],
+        bootstrap_samples: int,
+        artifacts: str,
+        bootstrap_seed: Optional[int]
+    ) -> EvalResult:
+        if artifacts not in ArtifactMode.ALL:
+            raise ValueError(f"Unsupported artifact mode: {artifacts}. Supported: {ArtifactMode.ALL}")
 
-        if not reference_file.exists():
-            raise FileNotFoundError(f"Reference file not found: {reference_file}")
+        # Get the compiled context (validates it): config, cached preprocessed reference and plan
+        compiled = self._get_compiled_context(context)
+        config = compiled.config
+        df_ref = compiled.reference
 
-        # Create output directory structure
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        folder_name = f"{model_name}_{timestamp}"
-        output_dir = Path("data/output") / context / folder_name
-        output_dir.mkdir(parents=True, exist_ok=True)
-
         logger.info(f"Starting evaluation for context {context}, model {model_name}")
 
-        # Load datasets
-        df_ref_original = self._load_dataset(reference_file)
-        df_generated_original = self._load_dataset(input_csv_path)
-
-        # Copy input CSV to output directory with original name
-        input_filename = input_csv_path.name
-        input_copy_path = output_dir / input_filename
-        import shutil
-        shutil.copy2(input_csv_path, input_copy_path)
-
         # Standardize and preprocess
-        df_ref = self._preprocess_dataframe(df_ref_original, config)
-        df_generated = self._preprocess_dataframe(df_generated_original, config)
+        df_generated = self._preprocess_dataframe(df_generated_original, config, compiled.normalize_columns)
 
         # Find common countries
         common_countries_info = self._find_common_countries(
-            df_ref, df_generated, config["key_column"]
+            compiled.reference_keys, df_generated, config.key_column
         )
 
         # Filter to common countries
-        df_ref_filtered = df_ref[df_ref[config["key_column"]].isin(common_countries_info["common"])].copy()
-        df_generated_filtered = df_generated[df_generated[config["key_column"]].isin(common_countries_info["common"])].copy()
+        df_ref_filtered = df_ref[df_ref[config.key_column].isin(common_countries_info["common"])].copy()
+        df_generated_filtered = df_generated[df_generated[config.key_column].isin(common_countries_info["common"])].copy()
 
         # Perform evaluation
         merged = self._match_rows_and_compare(
             df_ref_filtered,
             df_generated_filtered,
-            [config["key_column"]],
-            config["columns_to_compare"]
+            [config.key_column],
+            compiled.columns_to_compare
         )
 
-        # Compute metrics
-        metrics = self._compute_all_metrics(merged, config["columns_to_compare"])
+        # Compute metrics (single pass, shared by the result and every output file)
+        metrics = self._compute_all_metrics(merged, compiled.columns_to_compare, config.key_column)
+
+        # Optional bootstrap confidence intervals over the per-country counts
+        confidence_intervals: Dict[str, ConfidenceInterval] = {}
+        if bootstrap_samples > 0:
+            confidence_intervals = bootstrap_confidence_intervals(metrics, bootstrap_samples, seed=bootstrap_seed)
 
         # Generate output files (without detailed comparison)
-        output_files = self._generate_output_files(
-            merged, config, output_dir, context, model_name, timestamp, common_countries_info
-        )
+        output_dir: Optional[Path] = None
+        pending: Optional[EvalArtifacts] = None
+        if artifacts != ArtifactMode.NONE:
+            output_dir = create_output_dir(self.output_root, context, model_name, timestamp)
+            pending = self._build_artifacts(
+                merged, config, output_dir, context, model_name, timestamp, common_countries_info, metrics,
+                confidence_intervals, input_csv_path
+            )
+            if artifacts == ArtifactMode.SYNC:
+                self.write_artifacts(pending)
 
         # Create and return result (no detailed_comparison_path)
         result = EvalResult(
-            accuracy=float(metrics["accuracy"]),
-            precision=float(metrics["precision"]),
-            recall=float(metrics["recall"]),
-            f1=float(metrics["f1"]),
-            total_matches=int(metrics["total_matches"]),
-            total_cells=int(metrics["total_cells"]),
+            accuracy=metrics.overall.accuracy,
+            precision=metrics.overall.precision,
+            recall=metrics.overall.recall,
+            f1=metrics.overall.f1,
+            total_matches=metrics.overall.matches,
+            total_cells=metrics.overall.total,
             common_countries=int(len(common_countries_info["common"])),
             ref_countries=int(len(common_countries_info["ref"])),
             generated_countries=int(len(common_countries_info["generated"])),
             missing_in_generated=sorted(list(common_countries_info["missing_in_generated"])),
             extra_in_generated=sorted(list(common_countries_info["extra_in_generated"])),
-            per_column_accuracy={k: float(v) for k, v in metrics["per_column_accuracy"].items()},
+            per_column_accuracy=metrics.per_column_accuracy,
             output_dir=output_dir,
-            highlighted_errors_path=output_files["highlighted_errors"],
-            detailed_comparison_path=output_files["highlighted_errors"],  # Use same file for both
-            metrics_txt_path=output_files["metrics_txt"]
+            highlighted_errors_path=pending.highlighted_errors_path if pending else None,
+            detailed_comparison_path=pending.highlighted_errors_path if pending else None,  # Use same file for both
+            metrics_txt_path=pending.metrics_txt_path if pending else None,
+            metrics=metrics,
+            confidence_intervals=confidence_intervals,
+            pending_artifacts=pending if artifacts == ArtifactMode.BACKGROUND else None
         )
 
-        logger.info(f"Evaluation completed. Accuracy: {metrics['accuracy']:.2%}")
+        logger.info(f"Evaluation completed. Accuracy: {metrics.overall.accuracy:.2%}")
         return result
 
+    def _get_compiled_context(self, context: str) -> CompiledEvalContext:
+        """
+        Return the compiled context (read-only, shared across requests), rebuilt when its
+        config or reference file changes.
+
+        :raises ValueError: if the context is not registered
+        :raises FileNotFoundError: if its reference file does not exist
+        """
+        config = self.context_registry.get(context)
+        reference_file = self.reference_data_dir / config.reference_file
+
+        if not reference_file.exists():
+            raise FileNotFoundError(f"Reference file not found: {reference_file}")
+
+        return self.reference_cache.get(
+            context,
+            reference_file,
+            lambda path: CompiledEvalContext(config, self._preprocess_dataframe(self._load_dataset(path), config)),
+            config
+        )
+
     def _load_dataset(self, path: Path) -> pd.DataFrame:
         """Load CSV file into pandas DataFrame."""
         return pd.read_csv(path)
 
-    def _preprocess_dataframe(self, df: pd.DataFrame, config: Dict[str, Any]) -> pd.DataFrame:
-        """Standardize and preprocess dataframe."""
+    def _preprocess_dataframe(
+        self,
+        df: pd.DataFrame,
+        config: EvalContextConfig,
+        normalize_columns: Optional[FrozenSet[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Standardize and preprocess dataframe.
+        Only 'normalize_columns' are normalized when given (otherwise every value column).
+        """
         df = df.copy()
 
         # Standardize column names
         df.columns = [col.strip().lower().replace(' ', '_').replace('-', '_') for col in df.columns]
 
         # Ensure key column exists
-        key_column = config["key_column"]
+        key_column = config.key_column
         if key_column not in df.columns:
             raise ValueError(f"Key column '{key_column}' not found in dataset")
 
         # Convert key column to string
         df[key_column] = df[key_column].astype(str).str.strip()
 
-        # Normalize yes/no values
+        # Normalize yes/no values (missing values stay missing)
         for col in df.columns:
             if col in [key_column, 'country'] or col.endswith('_justification'):
                 continue
-            df[col] = df[col].apply(lambda v: v if pd.isna(v) else str(v).strip().lower())
-            df[col] = df[col].replace({'not specified': 'no'})
+            if normalize_columns is not None and col not in normalize_columns:
+                continue
+            series = df[col]
+            normalized = series.where(series.isna(), self._normalize_series(series))
+            df[col] = normalized.replace({'not specified': 'no'})
 
         return df
 
-    def _find_common_countries(self, df_ref: pd.DataFrame, df_generated: pd.DataFrame, key_column: str) -> Dict[str, Any]:
-        """Find common countries between reference and generated datasets."""
-        ref_countries = set(df_ref[key_column].unique())
+    def _find_common_countries(self, ref_countries: FrozenSet[str], df_generated: pd.DataFrame, key_column: str) -> Dict[str, Any]:
+        """Find common countries between the reference keys and the generated dataset."""
+        ref_countries = set(ref_countries)
         generated_countries = set(df_generated[key_column].unique())
         common_countries = ref_countries.intersection(generated_countries)
 
@@ -191,7 +281,7 @@ class PrepSTIEvaluator(BaseEvaluator):
             indicator=True
         )
 
-        # Create match columns
+        # Create match columns: whole-column comparison of the normalized values
         for col in columns_to_compare:
             col_ref = col + "_ref"
             col_generated = col + "_generated"
@@ -201,86 +291,96 @@ class PrepSTIEvaluator(BaseEvaluator):
             if col_ref not in merged.columns or col_generated not in merged.columns:
                 continue
 
-            def compare_func(row):
-                val_ref = row[col_ref]
-                val_generated = row[col_generated]
-
-                if pd.isna(val_generated):
-                    return 0
+            ref_values = self._normalize_series(merged[col_ref])
+            generated_values = self._normalize_series(merged[col_generated])
 
-                # String comparison (case insensitive)
-                if isinstance(val_ref, str) and isinstance(val_generated, str):
-                    return 1 if val_ref.strip().lower() == val_generated.strip().lower() else 0
-
-                # Fallback string compare
-                return 1 if str(val_ref).strip().lower() == str(val_generated).strip().lower() else 0
-
-            merged[check_col] = merged.apply(compare_func, axis=1)
+            # Missing generated values never match
+            matches = merged[col_generated].notna() & (ref_values == generated_values)
+            merged[check_col] = matches.astype(int)
 
         return merged
 
-    def _compute_all_metrics(self, merged_df: pd.DataFrame, columns_to_compare: List[str]) -> Dict[str, Any]:
-        """Compute all evaluation metrics."""
-
-        # Overall accuracy - only include columns that exist
-        match_cols = [c + "_match" for c in columns_to_compare if c + "_match" in merged_df.columns]
-        total_matches = int(merged_df[match_cols].sum().sum()) if match_cols else 0
-        total_cells = int(len(merged_df) * len(match_cols)) if match_cols else 0
-        accuracy = float(total_matches / total_cells) if total_cells > 0 else 0.0
+    @staticmethod
+    def _normalize_series(series: pd.Series) -> pd.Series:
+        """Case-insensitive string form of every value (missing values become 'nan')."""
+        return series.astype(str).str.strip().str.lower()
 
-        # Per-column accuracy
-        per_column_accuracy = {}
-        for c in columns_to_compare:
-            match_col = c + "_match"
-            if match_col in merged_df.columns:
-                per_column_accuracy[c] = float(merged_df[match_col].mean())
-
-        # Precision, recall, F1
-        tp = fp = fn = 0
+    def _compute_all_metrics(
+        self,
+        merged_df: pd.DataFrame,
+        columns_to_compare: List[str],
+        key_column: Optional[str] = None
+    ) -> EvalMetrics:
+        """
+        Compute all evaluation metrics in one pass over the compared columns.
+        Values are already normalized by _preprocess_dataframe, so yes/no checks are plain equality.
+        Per-row counts are kept (indexed by key_column) for resampling.
+        """
+        per_column: Dict[str, ColumnMetrics] = {}
+        row_stats = np.zeros((len(merged_df), len(EvalMetrics.ROW_STAT_COLUMNS)), dtype=np.int64)
 
         for col in columns_to_compare:
             col_ref = col + "_ref"
             col_generated = col + "_generated"
+            match_col = col + "_match"
 
             # Skip if columns don't exist
-            if col_ref not in merged_df.columns or col_generated not in merged_df.columns:
+            if col_ref not in merged_df.columns or col_generated not in merged_df.columns or match_col not in merged_df.columns:
                 continue
 
-            ref_series = merged_df[col_ref].astype(str).str.strip().str.lower()
-            gen_series = merged_df[col_generated].astype(str).str.strip().str.lower()
-
-            tp += int(((ref_series == "yes") & (gen_series == "yes")).sum())
-            fp += int(((ref_series == "no") & (gen_series == "yes")).sum())
-            fn += int(((ref_series == "yes") & (gen_series == "no")).sum())
-
-        precision = float(tp / (tp + fp)) if (tp + fp) > 0 else 0.0
-        recall = float(tp / (tp + fn)) if (tp + fn) > 0 else 0.0
-        f1 = float(2 * (precision * recall) / (precision + recall)) if (precision + recall) > 0 else 0.0
-
-        return {
-            "accuracy": accuracy,
-            "precision": precision,
-            "recall": recall,
-            "f1": f1,
-            "total_matches": total_matches,
-            "total_cells": total_cells,
-            "per_column_accuracy": per_column_accuracy
-        }
+            ref_values = merged_df[col_ref].to_numpy()
+            generated_values = merged_df[col_generated].to_numpy()
+            ref_yes, ref_no = ref_values == "yes", ref_values == "no"
+            generated_yes, generated_no = generated_values == "yes", generated_values == "no"
+
+            matches = merged_df[match_col].to_numpy()
+            tp, fp, fn = ref_yes & generated_yes, ref_no & generated_yes, ref_yes & generated_no
+
+            per_column[col] = ColumnMetrics(
+                tp=int(tp.sum()),
+                fp=int(fp.sum()),
+                fn=int(fn.sum()),
+                tn=int((ref_no & generated_no).sum()),
+                matches=int(matches.sum()),
+                total=int(len(merged_df))
+            )
+            row_stats += np.column_stack([matches, np.ones(len(merged_df), dtype=np.int64), tp, fp, fn])
+
+        overall = sum(per_column.values(), ColumnMetrics())
+        row_index = pd.Index(merged_df[key_column], name=key_column) if key_column in merged_df.columns else None
+        return EvalMetrics(
+            overall=overall,
+            per_column=per_column,
+            row_stats=pd.DataFrame(row_stats, columns=EvalMetrics.ROW_STAT_COLUMNS, index=row_index)
+        )
 
-    def _generate_output_files(
+    def _build_artifacts(
         self,
         merged: pd.DataFrame,
-        config: Dict[str, Any],
+        config: EvalContextConfig,
         output_dir: Path,
         context: str,
         model_name: str,
         timestamp: str,
-        common_countries_info: Dict[str, Any]
-    ) -> Dict[str, Path]:
-        """Generate output files (only highlighted errors and metrics, no detailed comparison)."""
+        common_countries_info: Dict[str, Any],
+        metrics: EvalMetrics,
+        confidence_intervals: Optional[Dict[str, ConfidenceInterval]] = None,
+        input_csv_path: Optional[Path] = None
+    ) -> EvalArtifacts:
+        """Prepare the output files (only highlighted errors and metrics, no detailed comparison) in memory."""
+        return EvalArtifacts(
+            output_dir=output_dir,
+            highlighted_errors=self._build_highlighted_errors(merged, config),
+            metrics_report=self._format_metrics_report(
+                metrics, context, model_name, timestamp, common_countries_info, confidence_intervals
+            ),
+            input_csv_path=input_csv_path
+        )
 
-        key_column = config["key_column"]
-        columns_to_compare = config["columns_to_compare"]
+    def _build_highlighted_errors(self, merged: pd.DataFrame, config: EvalContextConfig) -> pd.DataFrame:
+        """Build the generated values with mismatches highlighted against the reference."""
+        key_column = config.key_column
+        columns_to_compare = config.columns_to_compare
 
         # Highlighted errors report
         df_report = pd.DataFrame({key_column: merged[key_column]})
@@ -322,14 +422,21 @@ class PrepSTIEvaluator(BaseEvaluator):
             else:
                 df_report[just_col_base] = "Justification N/A"
 
-        highlighted_path = output_dir / f"highlighted_errors.csv"
-        df_report.to_csv(highlighted_path, index=False)
+        return df_report
 
-        # Metrics text file
-        metrics = self._compute_all_metrics(merged, columns_to_compare)
-        metrics_path = output_dir / f"evaluation_metrics.txt"
+    def _format_metrics_report(
+        self,
+        metrics: EvalMetrics,
+        context: str,
+        model_name: str,
+        timestamp: str,
+        common_countries_info: Dict[str, Any],
+        confidence_intervals: Optional[Dict[str, ConfidenceInterval]] = None
+    ) -> str:
+        """Format the human-readable metrics report."""
+        overall = metrics.overall
 
-        with open(metrics_path, 'w') as f:
+        with io.StringIO() as f:
             f.write(f"Evaluation Results for {context}\n")
             f.write(f"Model: {model_name}\n")
             f.write(f"Timestamp: {timestamp}\n")
@@ -348,16 +455,23 @@ class PrepSTIEvaluator(BaseEvaluator):
             f.write("\n")
 
             f.write("Overall Metrics:\n")
-            f.write(f"  Accuracy: {metrics['accuracy']:.2%} ({metrics['total_matches']}/{metrics['total_cells']})\n")
-            f.write(f"  Precision: {metrics['precision']:.2%}\n")
-            f.write(f"  Recall: {metrics['recall']:.2%}\n")
-            f.write(f"  F1 Score: {metrics['f1']:.2%}\n\n")
+            f.write(f"  Accuracy: {overall.accuracy:.2%} ({overall.matches}/{overall.total})\n")
+            f.write(f"  Precision: {overall.precision:.2%}\n")
+            f.write(f"  Recall: {overall.recall:.2%}\n")
+            f.write(f"  F1 Score: {overall.f1:.2%}\n\n")
 
             f.write("Per-Column Accuracy:\n")
-            for col, acc in metrics['per_column_accuracy'].items():
+            for col, acc in metrics.per_column_accuracy.items():
                 f.write(f"  {col}: {acc:.2%}\n")
 
-        return {
-            "highlighted_errors": highlighted_path,
-            "metrics_txt": metrics_path
-        }
+            f.write("\nPer-Column Precision / Recall / F1 (TP/FP/FN/TN):\n")
+            for col, m in metrics.per_column.items():
+                f.write(f"  {col}: {m.precision:.2%} / {m.recall:.2%} / {m.f1:.2%} ({m.tp}/{m.fp}/{m.fn}/{m.tn})\n")
+
+            if confidence_intervals:
+                first = next(iter(confidence_intervals.values()))
+                f.write(f"\nBootstrap {first.confidence:.0%} Confidence Intervals ({first.n_resamples} resamples of countries):\n")
+                for name, ci in confidence_intervals.items():
+                    f.write(f"  {name}: {ci.estimate:.2%} [{ci.lower:.2%}, {ci.upper:.2%}]\n")
+
+            return f.getvalue()
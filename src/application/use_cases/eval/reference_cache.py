@@ -0,0 +1,48 @@
+import logging
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ReferenceCache:
+    """
+    Thread-safe cache of preprocessed reference datasets (or anything compiled from them) keyed by
+    evaluation context. An entry is reloaded when its file path, modification time or the context
+    config it was built with changes. Cached values are shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Path, int, Hashable, Any]] = {}  # {context: (path, mtime_ns, config, value)}
+        self._lock = Lock()
+
+    def get(self, context: str, path: Path, loader: Callable[[Path], T], config: Hashable = None) -> T:
+        """
+        Return the cached value for a context, (re)loading it with 'loader' when missing or stale.
+
+        :raises FileNotFoundError: if the reference file does not exist
+        """
+        mtime_ns = path.stat().st_mtime_ns
+
+        with self._lock:
+            entry = self._entries.get(context)
+            if entry is not None and entry[0] == path and entry[1] == mtime_ns and entry[2] == config:
+                return entry[3]
+
+            logger.info(f"Loading reference dataset for context {context} from {path}")
+            value = loader(path)
+            self._entries[context] = (path, mtime_ns, config, value)
+            return value
+
+    def invalidate(self, context: Optional[str] = None) -> None:
+        """
+        Drop one context (or every context) from the cache.
+        """
+        with self._lock:
+            if context is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(context, None)
@@ -1,21 +1,39 @@
+import asyncio
+import hashlib
 import logging
+import os
+from threading import Lock
 from uuid import UUID
-from typing import List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
+from weakref import WeakValueDictionary
 from pathlib import Path
 
 import pandas as pd
 
+from application.use_cases import cpu_tasks
 from application.use_cases.aggregator import Aggregator
 from application.interfaces.job_repository import JobRepository
 from application.use_cases.llm_processor import LLMProcessor
+from application.utils.cpu_task_runner import CPUQueueFullError, CPUTaskRunner
+from application.utils.metrics import ROW_WRITE_SECONDS
 from application.utils.temp_file_handler import get_job_temp_dir
+from application.utils.result_formats import write_frame
 from domain.value_objects.column import Column
 from domain.entities.job import Job, JobStatus
+from domain.value_objects.llm_usage import (
+    COST_COLUMN, INPUT_TOKENS_COLUMN, LATENCY_COLUMN, OUTPUT_TOKENS_COLUMN, USAGE_COLUMNS, LLMUsage, UsageBudget
+)
+from domain.value_objects.result_artifact import ArtifactKind, ResultArtifact, ResultFormat
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
 
+class JobStateConflictError(RuntimeError):
+    """Raised when a job is not in a state that allows the requested transition."""
+    pass
+
+
 class JobLifecycle:
     """
     Orchestrates the full job workflow:
@@ -23,17 +41,24 @@ class JobLifecycle:
     2. process_job    -> run LLMProcessor in background
     3. get_job_status -> retrieve job status
     4. get_job_result -> retrieve job result as CSV
+    5. get_job_artifact -> retrieve the materialized result/aggregated file (CSV, compressed CSV, Parquet, NDJSON)
+    6. resume_job     -> continue a job paused by its usage budget
     """
 
     def __init__(
             self,
             repo: JobRepository,
             llm_processor: LLMProcessor,
-            aggregator: Aggregator
+            aggregator: Aggregator,
+            cpu_runner: Optional[CPUTaskRunner] = None
     ):
         self.repo = repo
         self.llm_processor = llm_processor
         self.aggregator = aggregator
+        self.cpu_runner = cpu_runner  # Runs the aggregation of downloaded artifacts off the event loop
+        # Serialize artifact materialization per (job, kind); entries go away once no request holds them
+        self._artifact_locks: "WeakValueDictionary[Tuple[UUID, str], asyncio.Lock]" = WeakValueDictionary()
+        self._resume_lock = Lock()  # Makes the PAUSED -> RUNNING check and transition atomic
 
 
     def create_job(
@@ -42,21 +67,42 @@ class JobLifecycle:
             context: str,
             columns: List[Column],
             job_id: Optional[UUID] = None,
+            budget: Optional[UsageBudget] = None,
+            models: Optional[List[str]] = None,
+            file_hashes: Optional[Dict[str, str]] = None,
             ) -> UUID:
         """
         Register a new job in PENDING state.
+        :param budget: Optional token/cost limit; the job is paused once it is spent.
+        :param models: Optional models the documents may be sent to, in order of preference.
+        :param file_hashes: Optional SHA-256 of each file, by file name (computed during the upload).
         :returns: the new job's UUID
+        :raises ValueError: if a model is not available
         """
+        if models:
+            unknown = [model for model in models if model not in self.available_models()]
+            if unknown:
+                raise ValueError(f"Unknown model: {', '.join(unknown)}. Available: {', '.join(self.available_models())}")
+
         job = Job(
             files=files,
             context=context,
             columns=columns,
             job_id=job_id,
+            budget=budget,
+            models=models or None,
+            file_hashes=file_hashes,
         )
         final_job_id = self.repo.new_job(job)
         logger.info(f"Job {final_job_id} created with {len(files)} files and {len(columns)} columns")
         return final_job_id
 
+    def available_models(self) -> List[str]:
+        """
+        Models jobs can name.
+        """
+        return self.llm_processor.available_models()
+
     async def process_job(self, job_id: UUID, resume: bool = False) -> None:
         """
         Fetches the job, marks it RUNNING, then:
@@ -84,6 +130,9 @@ class JobLifecycle:
         elif job.status == JobStatus.FAILED:
             logger.info(f"Job {job_id} is FAILED; use retry_failed_records if retry is needed")
             return
+        elif job.status == JobStatus.PAUSED:
+            logger.info(f"Job {job_id} is PAUSED; use resume_job to continue it")
+            return
         else:
             logger.error(f"Job {job_id} in unexpected status {job.status}")
             return
@@ -111,6 +160,29 @@ class JobLifecycle:
         finally:
             self.repo.update_job(job)
 
+    def resume_job(self, job_id: UUID, budget: Optional[UsageBudget] = None) -> None:
+        """
+        Mark a job paused by its budget as RUNNING again, optionally with a new budget.
+        The remaining files are then processed by process_job(job_id, resume=True); only the caller
+        that made the transition may schedule it, so a job never has two processing loops.
+        :raises JobStateConflictError: if the job is not paused (running, pending, finished or failed)
+        :raises ValueError: if the budget is still exceeded
+        """
+        with self._resume_lock:
+            job = self.repo.get_job(job_id)
+            if job.status != JobStatus.PAUSED:
+                raise JobStateConflictError(f"Job is {job.status}; only paused jobs can be resumed")
+
+            new_budget = budget or job.budget
+            if new_budget is not None:
+                reason = new_budget.exceeded_by(job.usage, job.cost)
+                if reason:
+                    raise ValueError(f"Cannot resume job: {reason}; raise the budget")
+
+            job.resume(budget)
+            self.repo.update_job(job)
+        logger.info(f"Job {job_id} resumed with budget {job.budget.to_dict() if job.budget else None}")
+
     def prepare_retry_and_get_cleaned_csv(self, job_id: UUID) -> str:
         """
         Prepare a job for retry by cleaning the CSV and updating job state.
@@ -306,6 +378,7 @@ class JobLifecycle:
             all_fieldnames.append(col.name)
             all_fieldnames.append(f"{col.name}_justification")
         all_fieldnames.append('error')
+        all_fieldnames.extend(USAGE_COLUMNS)
 
         # Track processed files and errors separately
         total_processed_files = set()  # All files (success + error) - start fresh for this processing session
@@ -316,6 +389,16 @@ class JobLifecycle:
         baseline_error_count = job.error_count
 
         def row_callback(record, index, total):
+            # Tokens are accounted even for duplicate rows: they were billed
+            job.add_usage(
+                LLMUsage(record.get(INPUT_TOKENS_COLUMN, 0), record.get(OUTPUT_TOKENS_COLUMN, 0)),
+                record.get(COST_COLUMN, 0.0),
+                record.get(LATENCY_COLUMN, 0) / 1000,
+            )
+            with ROW_WRITE_SECONDS.time():
+                write_row(record)
+
+        def write_row(record):
             src = str(record.get('source_file'))
 
             # Skip if this file was already successfully processed (in processed_sources)
@@ -352,8 +435,19 @@ class JobLifecycle:
             columns=job.columns,
             progress_callback=lambda processed: None,
             row_callback=row_callback,
+            should_continue=lambda: job.budget_exceeded() is None,
+            models=job.models,
+            # a budget is checked before each document: one at a time, it is overrun by one document at most
+            max_concurrency=1 if job.budget is not None else None,
         )
 
+        # Budget spent before every file was sent: keep the rows written so far and wait for resume_job
+        if len(df_new) < len(files_to_process):
+            reason = job.budget_exceeded()
+            logger.info(f"Job {job.id} paused after {len(df_new)}/{len(files_to_process)} files: {reason}")
+            job.pause(f"Paused: {reason}")
+            return
+
         # Load final result
         if raw_csv_path.exists():
             try:
@@ -392,7 +486,21 @@ class JobLifecycle:
             "files_processed": job.files_processed,
             "total_files": job.total_files,
             "error_count": job.error_count,
-            "error_message": job.error_message
+            "error_message": job.error_message,
+            "usage": job.usage_dict(),
+            "models": job.models,
+        }
+
+
+    def get_queue_stats(self) -> dict:
+        """
+        Jobs waiting or running, and the documents they still have to process.
+        """
+        active = [job for job in self.repo.list_jobs() if job.status in (JobStatus.PENDING, JobStatus.RUNNING)]
+        return {
+            "jobs_pending": sum(1 for job in active if job.status == JobStatus.PENDING),
+            "jobs_running": sum(1 for job in active if job.status == JobStatus.RUNNING),
+            "documents_queued": sum(max(0, job.total_files - job.files_processed) for job in active),
         }
 
 
@@ -403,14 +511,111 @@ class JobLifecycle:
         return self.repo.get_job(job_id)
 
 
-    def get_job_result(self, job_id: UUID) -> str:
+    async def get_job_result(self, job_id: UUID) -> str:
         """
         Once the job is DONE or DONE_WITH_ERRORS, return the result as a CSV file.
         """
+        artifact = await self.get_job_artifact(job_id, ArtifactKind.RESULT)
+        logger.info(f"Returning CSV result for job {job_id}")
+        return artifact.path.read_text(encoding='utf-8')
+
+
+    async def get_job_artifact(self, job_id: UUID, kind: str = ArtifactKind.RESULT, format: str = ResultFormat.CSV) -> ResultArtifact:
+        """
+        Return the materialized file for a finished job (raw result or aggregated view) in the given format.
+        The file is serialized once per raw-row version and reused until retry/resume changes the rows.
+        :raises CPUQueueFullError: if the aggregation cannot be queued on the CPU pool
+        """
         job = self.repo.get_job(job_id)
 
         if job.status not in [JobStatus.DONE, JobStatus.DONE_WITH_ERRORS] or not hasattr(job, 'result') or job.result is None:
             raise RuntimeError(f"Job {job_id} is not done or has no result.")
 
-        logger.info(f"Returning CSV result for job {job_id}")
-        return job.result.to_csv(index=False)
+        artifact = job.get_artifact(kind, format)
+        if artifact is not None:
+            return artifact
+
+        # One lock per job and kind: the formats of a kind share its frame, other jobs are not held up
+        lock = self._artifact_locks.setdefault((job_id, kind), asyncio.Lock())
+        async with lock:
+            # Another request may have materialized it while we waited for the lock
+            artifact = job.get_artifact(kind, format)
+            if artifact is not None:
+                return artifact
+
+            result = job.result
+            artifact = await self._materialize_artifact(job, result, kind, format)
+
+            # Only keep the artifact if the rows did not change while it was being written
+            if job.result is result:
+                job.set_artifact(artifact)
+                self.repo.update_job(job)
+
+        return artifact
+
+    def cached_aggregated_result(self, job: Job) -> Optional[pd.DataFrame]:
+        """
+        Aggregated view of the job's current result if it was already computed (None otherwise).
+        """
+        if job.aggregated_result is not None and job.result is not None:
+            return job.aggregated_result
+        return None
+
+    def set_aggregated_result(self, job: Job, result: pd.DataFrame, aggregated: pd.DataFrame) -> None:
+        """
+        Keep an aggregation computed elsewhere (e.g. on the CPU pool), unless the job's result changed meanwhile.
+        """
+        if job.result is result:
+            job.aggregated_result = aggregated
+
+    async def _materialize_artifact(self, job: Job, result: pd.DataFrame, kind: str, format: str) -> ResultArtifact:
+        """
+        Serialize the job result (or its aggregation) to a file in the job temp dir.
+        """
+        frame = await self._artifact_frame(job, result, kind)
+        version = self._result_version(result)
+        path = get_job_temp_dir(str(job.id)) / f"{kind}_{job.id}.{format}"
+
+        # Write to a temporary file and swap it in, so ongoing downloads keep reading the old file
+        tmp_path = path.with_name(f"{path.name}.{version}.tmp")
+        await asyncio.to_thread(write_frame, frame, tmp_path, format)
+        os.replace(tmp_path, path)
+
+        logger.info(f"Materialized {kind}.{format} artifact for job {job.id} (version {version}, {len(frame)} rows)")
+        return ResultArtifact(kind=kind, path=path, version=version, row_count=len(result), format=format)
+
+    async def _artifact_frame(self, job: Job, result: pd.DataFrame, kind: str) -> pd.DataFrame:
+        """
+        Return the DataFrame behind an artifact kind; the aggregation is computed once per raw-row version,
+        on the CPU pool when one is configured.
+        """
+        if kind == ArtifactKind.RESULT:
+            return result
+        if kind != ArtifactKind.AGGREGATED:
+            raise ValueError(f"Unknown artifact kind: {kind}")
+
+        aggregated = self.cached_aggregated_result(job)
+        if aggregated is not None and job.result is result:
+            return aggregated
+
+        try:
+            if self.cpu_runner is not None:
+                aggregated = await self.cpu_runner.run(cpu_tasks.aggregate_frame, result)
+            else:
+                aggregated = self.aggregator.aggregate(result)
+        except CPUQueueFullError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Aggregation failed for job {job.id}: {e}")
+
+        self.set_aggregated_result(job, result, aggregated)
+        return aggregated
+
+    @staticmethod
+    def _result_version(result: pd.DataFrame) -> str:
+        """
+        Version of the raw rows: row count plus a content hash computed without CSV serialization.
+        """
+        digest = hashlib.sha256(",".join(map(str, result.columns)).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(result, index=False).to_numpy().tobytes())
+        return f"{len(result)}-{digest.hexdigest()[:16]}"
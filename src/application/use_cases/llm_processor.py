@@ -1,11 +1,23 @@
+import asyncio
 import logging
+import time
 import pandas as pd
 from pathlib import Path
-from typing import List, Callable, Optional, Dict, Any
+from typing import List, Callable, Optional, Dict, Any, Set, Tuple
 
-from application.interfaces.llm_client import BaseLLMClient
-from application.utils.prompt_builder import build_prompt
+from application.interfaces.llm_client import USAGE_KEY, BaseLLMClient, BaseLLMClientPool, LLMParseError
+from application.utils.cascade import EscalationReason, uncertain_columns
+from application.utils.metrics import (
+    DOCUMENTS_PROCESSED, LLM_COST, LLM_ERRORS, LLM_ESCALATED_FIELDS, LLM_ESCALATIONS, LLM_REQUESTS_IN_FLIGHT,
+    LLM_RETRIES, LLM_TOKENS
+)
+from application.utils.prompt_builder import PARSE_RETRY_NOTE, build_prompt
+from application.utils.retry_policy import ErrorClass, RetryPolicy, classify_error
 from domain.value_objects.column import Column
+from domain.value_objects.llm_usage import (
+    COST_COLUMN, ESCALATED_COLUMN, INPUT_TOKENS_COLUMN, LATENCY_COLUMN, MODEL_COLUMN, OUTPUT_TOKENS_COLUMN, LLMUsage,
+    TokenPricing
+)
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -13,9 +25,66 @@ logger = logging.getLogger(__name__)
 class LLMProcessor:
     """
     Use case for processing documents with an LLM client.
+
+    With an escalation client the processor runs a model cascade: every document goes to the (fast)
+    client first, and only documents whose answer could not be parsed, or the fields of an answer that
+    look uncertain (see uncertain_columns), are re-asked to the (stronger) escalation client.
+
+    With a client pool, a run can name the models it may use: each document goes to the client the pool
+    selects among them (all attempts of a document stay on that model).
     """
-    def __init__(self, llm_client: BaseLLMClient):
+    def __init__(
+        self,
+        llm_client: BaseLLMClient,
+        retry_policy: Optional[RetryPolicy] = None,
+        pricing: Optional[TokenPricing] = None,
+        escalation_client: Optional[BaseLLMClient] = None,
+        escalation_pricing: Optional[TokenPricing] = None,
+        client_pool: Optional[BaseLLMClientPool] = None,
+        model_pricing: Optional[Dict[str, TokenPricing]] = None,
+    ):
+        """
+        :param llm_client: Client of the runs that name no model.
+        :param pricing: Default token prices, for models missing from model_pricing.
+        :param client_pool: Clients of the models runs can name.
+        :param model_pricing: Token prices by model name.
+        """
         self.client = llm_client
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.pricing = pricing or TokenPricing()
+        self.escalation_client = escalation_client
+        self.escalation_pricing = escalation_pricing or self.pricing
+        self.client_pool = client_pool
+        self.model_pricing = model_pricing or {}
+
+    def available_models(self) -> List[str]:
+        """Models a run can name."""
+        if self.client_pool is None:
+            return [self.client.model_name]
+        return self.client_pool.models()
+
+    def _select_client(self, models: Optional[List[str]]) -> BaseLLMClient:
+        if not models:
+            return self.client
+        if self.client_pool is None:
+            if models != [self.client.model_name]:
+                raise ValueError(f"Unknown model: {', '.join(models)}. Available: {self.client.model_name}")
+            return self.client
+        return self.client_pool.select(models)
+
+    def _concurrency(self, models: Optional[List[str]]) -> int:
+        """
+        Documents of a run sent at once: the capacity of the models it may use, so a run can fill their
+        quotas; 1 (one document at a time) when a model declares no limit.
+        """
+        if not models:
+            capacity = self.client.capacity()
+        elif self.client_pool is None:
+            self._select_client(models)  # validates the names
+            capacity = self.client.capacity()
+        else:
+            capacity = self.client_pool.capacity(models)
+        return max(capacity or 1, 1)
 
     async def run(
         self,
@@ -24,73 +93,256 @@ class LLMProcessor:
         columns: List[Column],
         progress_callback: Optional[Callable[[int], None]] = None,
         row_callback: Optional[Callable[[Dict[str, Any], int, int], None]] = None,
+        should_continue: Optional[Callable[[], bool]] = None,
+        models: Optional[List[str]] = None,
+        max_concurrency: Optional[int] = None,
     ) -> pd.DataFrame:
         """
         Process a list of documents with the LLM client in a given context and return results as a DataFrame.
 
+        Documents are processed concurrently, up to the capacity of the models the run may use (see
+        _concurrency) or max_concurrency; the callbacks still see the rows in document order, a row being
+        held back until the rows before it are done.
+
         :param documents: List of document paths to process.
         :param context: Context for processing the documents.
         :param columns: Names of the columns for the structured output.
         :param progress_callback: Optional callback to report progress of the job.
         :param row_callback: Optional callback for each processed row.
-        :return: DataFrame containing the processed results.
+        :param should_continue: Optional check before each document is sent; when it returns False the
+            remaining documents are not sent (e.g. the job's budget is spent). Documents already in flight
+            still complete, so a budget can be overrun by up to the run's concurrency.
+        :param models: Models the documents may be sent to (default: the processor's client).
+        :param max_concurrency: Optional lower limit on the documents in flight (1 = one at a time).
+        :return: DataFrame containing the processed results (one row per document sent).
         """
         logger.info(f"LLM processor starting with {len(documents)} documents")
         records: List[Dict[str, Any]] = []
 
         total = len(documents)
-        for i, document in enumerate(documents, 1):
-                logger.info(f"Processing document {i}/{len(documents)}: {document.name}")
+        concurrency = self._concurrency(models)
+        if max_concurrency is not None:
+            concurrency = max(min(concurrency, max_concurrency), 1)
+        slots = asyncio.Semaphore(concurrency)
+        finished: Dict[int, Dict[str, Any]] = {}
+        in_flight: Set[asyncio.Task] = set()
+
+        def emit_ready() -> None:
+            # hand the rows to the callbacks in document order
+            while len(records) + 1 in finished:
+                i = len(records) + 1
+                record = finished.pop(i)
+                records.append(record)
+                if progress_callback and not record["error"]:
+                    progress_callback(i)
+                if row_callback:
+                    try:
+                        row_callback(record, i, total)
+                    except Exception as cb_err:
+                        logger.warning(f"row_callback failed for document {i}: {cb_err}")
+
+        async def process(i: int, document: Path) -> None:
+            try:
+                finished[i] = await self._process_one(i, total, document, context, columns, models)
+                emit_ready()
+            finally:
+                slots.release()
+
+        try:
+            for i, document in enumerate(documents, 1):
+                await slots.acquire()
+                for task in [task for task in in_flight if task.done()]:
+                    in_flight.discard(task)
+                    task.result()  # surface unexpected errors
+
+                if should_continue is not None and not should_continue():
+                    slots.release()
+                    logger.info(f"Stopping before document {i}/{total}: {total - i + 1} documents not sent")
+                    break
 
                 if not document.exists():
+                    slots.release()
                     logger.error(f"Document {document} does not exist")
                     raise FileNotFoundError(f"Document {document} does not exist.")
 
-                file_name = document.name
-                prompt = build_prompt(context, columns, file_name)
-
-                try:
-                    results = await self.client.process(
-                        document_path=document,
-                        prompt=prompt,
-                    )
+                in_flight.add(asyncio.create_task(process(i, document)))
 
-                    if not results:
-                        logger.error(f"No results returned for document {document}")
-                        raise ValueError(f"No results returned for document {document}.")
-
-                    item = results[0]
-                    record = {"source_file": file_name, **item, "error": ""}
-                    records.append(record)
-                    logger.info(f"Successfully processed document {i}/{len(documents)}: {document.name}")
-
-                    # tracks the progress
-                    if progress_callback:
-                        progress_callback(i)
-                    # incremental row callback
-                    if row_callback:
-                        try:
-                            row_callback(record, i, total)
-                        except Exception as cb_err:
-                            logger.warning(f"row_callback failed for document {i}: {cb_err}")
-
-                except Exception as e:
-                    # Store error message
-                    err_msg = str(e)
-                    logger.error(f"Failed to process document {i}/{len(documents)} ({document.name}): {err_msg}")
-                    record = {"source_file": file_name, "error": err_msg[:1000]}
-                    for col in columns:
-                        record.setdefault(col.name, '')
-                        record.setdefault(f"{col.name}_justification", '')
-                    records.append(record)
-
-                    # Call row_callback for error records too
-                    if row_callback:
-                        try:
-                            row_callback(record, i, len(documents))
-                        except Exception as cb_err:
-                            logger.warning(f"row_callback failed for error record {i}: {cb_err}")
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        finally:
+            for task in in_flight:
+                task.cancel()
 
         df = pd.DataFrame(records)
         logger.info(f"LLM processing completed. Generated DataFrame with {len(df)} records and {len(df.columns)} columns")
         return df
+
+    async def _process_one(
+        self,
+        i: int,
+        total: int,
+        document: Path,
+        context: str,
+        columns: List[Column],
+        models: Optional[List[str]],
+    ) -> Dict[str, Any]:
+        """
+        Process the i-th document of a run into its row; failures (retries exhausted) become an error row.
+        """
+        logger.info(f"Processing document {i}/{total}: {document.name}")
+        file_name = document.name
+        client = self._select_client(models)
+        started = time.perf_counter()
+
+        try:
+            item, usage, cost, escalated = await self._process_document(client, document, context, columns)
+
+            record = {"source_file": file_name, **item, "error": ""}
+            record.update(self._usage_fields(usage, cost, started, escalated, client.model_name))
+            DOCUMENTS_PROCESSED.labels("ok").inc()
+            logger.info(f"Successfully processed document {i}/{total}: {document.name}")
+            return record
+
+        except Exception as e:
+            # Store error message, tagged with its class (retries are already exhausted)
+            err_msg = f"[{classify_error(e)}] {e}"
+            logger.error(f"Failed to process document {i}/{total} ({document.name}): {err_msg}")
+            record = {"source_file": file_name, "error": err_msg[:1000]}
+            for col in columns:
+                record.setdefault(col.name, '')
+                record.setdefault(f"{col.name}_justification", '')
+            usage = getattr(e, "usage", None) or LLMUsage()
+            cost = getattr(e, "cost", None)
+            cost = self._pricing_for(client).cost(usage) if cost is None else cost
+            record.update(
+                self._usage_fields(usage, cost, started, getattr(e, "escalated", []), client.model_name)
+            )
+            DOCUMENTS_PROCESSED.labels("error").inc()
+            return record
+
+    def _pricing_for(self, client: BaseLLMClient) -> TokenPricing:
+        return self.model_pricing.get(client.model_name, self.pricing)
+
+    async def _process_document(
+        self, client: BaseLLMClient, document: Path, context: str, columns: List[Column]
+    ) -> Tuple[Dict[str, Any], LLMUsage, float, List[str]]:
+        """
+        Extract one document: returns its record, the usage and cost of all requests made for it, and the
+        fields answered by the escalation model. When giving up, the usage, cost and escalated fields are
+        set as attributes of the raised error.
+        """
+        prompt = build_prompt(context, columns, document.name)
+        pricing = self._pricing_for(client)
+        try:
+            results, usage = await self._process_with_retry(client, document, prompt, columns)
+        except Exception as e:
+            e.cost = pricing.cost(getattr(e, "usage", None) or LLMUsage())
+            if self.escalation_client is None or classify_error(e) != ErrorClass.PARSE:
+                raise
+            item, usage, cost = None, e.usage, e.cost
+            fields, reason = columns, EscalationReason.PARSE_ERROR
+        else:
+            item, cost = results[0], pricing.cost(usage)
+            if self.escalation_client is None:
+                return item, usage, cost, []
+            fields, reason = uncertain_columns(item, columns), EscalationReason.UNCERTAIN
+            if not fields:
+                return item, usage, cost, []
+
+        escalated = [col.name for col in fields]
+        LLM_ESCALATIONS.labels(reason).inc()
+        LLM_ESCALATED_FIELDS.inc(len(fields))
+        logger.info(f"Escalating {document.name} ({reason}): {', '.join(escalated)}")
+
+        escalation_prompt = build_prompt(context, fields, document.name)
+        try:
+            results, escalation_usage = await self._process_with_retry(
+                self.escalation_client, document, escalation_prompt, fields
+            )
+        except Exception as e:
+            escalation_usage = getattr(e, "usage", None) or LLMUsage()
+            usage, cost = usage + escalation_usage, cost + self.escalation_pricing.cost(escalation_usage)
+            if item is None:
+                e.usage, e.cost, e.escalated = usage, cost, escalated
+                raise
+            logger.warning(f"Escalation failed for {document.name}, keeping the first answer: {e}")
+            return item, usage, cost, []
+
+        usage, cost = usage + escalation_usage, cost + self.escalation_pricing.cost(escalation_usage)
+        answer = results[0]
+        if item is None:
+            return answer, usage, cost, escalated
+        for col in fields:
+            item[col.name] = answer.get(col.name, item.get(col.name))
+            item[f"{col.name}_justification"] = answer.get(
+                f"{col.name}_justification", item.get(f"{col.name}_justification")
+            )
+        return item, usage, cost, escalated
+
+    def _usage_fields(
+        self, usage: LLMUsage, cost: float, started: float, escalated: List[str], model: str
+    ) -> Dict[str, Any]:
+        """Accounting columns of a document's row: tokens and cost of all its attempts, and its wall time."""
+        LLM_TOKENS.labels("input").inc(usage.input_tokens)
+        LLM_TOKENS.labels("output").inc(usage.output_tokens)
+        LLM_COST.inc(cost)
+        return {
+            INPUT_TOKENS_COLUMN: usage.input_tokens,
+            OUTPUT_TOKENS_COLUMN: usage.output_tokens,
+            COST_COLUMN: round(cost, 8),
+            LATENCY_COLUMN: round((time.perf_counter() - started) * 1000),
+            ESCALATED_COLUMN: ";".join(escalated),
+            MODEL_COLUMN: model,
+        }
+
+    async def _process_with_retry(
+        self, client: BaseLLMClient, document: Path, prompt: str, columns: List[Column]
+    ) -> Tuple[List[Dict[str, Any]], LLMUsage]:
+        """
+        Send one document to a client, retrying within the RetryPolicy budgets:
+        transient errors after an exponential backoff with jitter, parse errors right away with a
+        reminder of the expected output, permanent errors never.
+
+        Returns the results with the usage of every attempt; when giving up, that usage is set as the
+        'usage' attribute of the raised error.
+        """
+        retries: Dict[str, int] = {}
+        attempt_prompt = prompt
+        usage = LLMUsage()
+
+        while True:
+            try:
+                with LLM_REQUESTS_IN_FLIGHT.track_in_progress():
+                    results = await client.process(
+                        document_path=document,
+                        prompt=attempt_prompt,
+                        columns=columns,
+                    )
+                if not results:
+                    raise LLMParseError(f"No results returned for document {document}.")
+                for item in results:
+                    usage += item.pop(USAGE_KEY, LLMUsage())
+                return results, usage
+
+            except Exception as e:
+                usage += getattr(e, "usage", None) or LLMUsage()
+                error_class = classify_error(e)
+                LLM_ERRORS.labels(error_class).inc()
+                retries_done = retries.get(error_class, 0)
+                if not self.retry_policy.should_retry(error_class, retries_done):
+                    e.usage = usage
+                    raise
+                retries[error_class] = retries_done + 1
+                LLM_RETRIES.labels(error_class).inc()
+
+                if error_class == ErrorClass.PARSE:
+                    attempt_prompt = prompt + PARSE_RETRY_NOTE
+                    delay = 0.0
+                else:
+                    delay = self.retry_policy.backoff(retries_done)
+
+                logger.warning(
+                    f"{error_class.capitalize()} error for {document.name} "
+                    f"(retry {retries_done + 1}/{self.retry_policy.max_retries[error_class]} in {delay:.1f}s): {e}"
+                )
+                await asyncio.sleep(delay)
@@ -0,0 +1,129 @@
+import logging
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobStore:
+    """
+    Content-addressed store of uploaded documents, shared by all jobs: each distinct PDF is kept once,
+    under its SHA-256, and a job's directory holds hard links to the blobs it uses.
+
+    The reference count of a blob is its hard link count minus the store's own link, so it survives
+    restarts without bookkeeping and drops when job directories are deleted. Where hard links are not
+    possible (job directories on another file system), the job gets a copy that the store does not count;
+    such blobs are marked as copied and never pruned, since their references are unknown.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, sha256: str) -> Path:
+        if not SHA256_PATTERN.match(sha256):
+            raise ValueError(f"Invalid SHA-256: {sha256!r}")
+        return self.root / sha256[:2] / f"{sha256}.pdf"
+
+    @staticmethod
+    def _copied_marker(blob: Path) -> Path:
+        return blob.with_suffix(".copied")
+
+    def contains(self, sha256: str) -> bool:
+        return self.path(sha256).exists()
+
+    def references(self, sha256: str) -> int:
+        """Job files linked to the blob (0 if it is unknown or only copied)."""
+        try:
+            return self.path(sha256).stat().st_nlink - 1
+        except FileNotFoundError:
+            return 0
+
+    def info(self, sha256: str) -> Optional[Dict[str, int]]:
+        try:
+            stat = self.path(sha256).stat()
+        except FileNotFoundError:
+            return None
+        return {"size": stat.st_size, "references": stat.st_nlink - 1}
+
+    def add(self, file: Path, sha256: str) -> bool:
+        """
+        Register an uploaded file under its hash. If the content is already stored, the file is
+        replaced by a link to the existing blob, so the job reuses it and its own copy is freed.
+
+        :param file: The uploaded file, in the job's directory.
+        :param sha256: Its content hash (computed during the upload).
+        :returns: True if the content was new to the store.
+        """
+        blob = self.path(sha256)
+        blob.parent.mkdir(exist_ok=True)
+        try:
+            os.link(file, blob)
+            return True
+        except FileExistsError:
+            pass  # already stored (possibly by a concurrent upload of the same document)
+        except OSError as e:
+            # no hard links here: keep a copy in the store, the job keeps its own file
+            logger.warning(f"Cannot hard link {file} into the blob store ({e}); copying it")
+            self._copy_into(file, blob)
+            self._copied_marker(blob).touch()
+            return True
+
+        self._replace_with_link(blob, file)
+        return False
+
+    def link(self, sha256: str, dest: Path) -> Path:
+        """
+        Give a job a view of a stored blob at dest.
+
+        :raises ValueError: if the blob is not in the store
+        """
+        blob = self.path(sha256)
+        if not blob.exists():
+            raise ValueError(f"Unknown document: {sha256}")
+        self._replace_with_link(blob, dest)
+        return dest
+
+    def prune(self) -> int:
+        """
+        Delete the blobs no job file links to anymore (copied blobs are kept).
+
+        :returns: the number of bytes freed
+        """
+        freed = 0
+        for blob in self.root.glob("*/*.pdf"):
+            try:
+                stat = blob.stat()
+                if stat.st_nlink <= 1 and not self._copied_marker(blob).exists():
+                    blob.unlink()
+                    freed += stat.st_size
+            except FileNotFoundError:
+                continue
+        if freed:
+            logger.info(f"Pruned {freed} bytes of unreferenced documents from {self.root}")
+        return freed
+
+    def _replace_with_link(self, blob: Path, dest: Path) -> None:
+        # link under a temporary name, then rename over dest, so dest is never missing or partial
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+        try:
+            os.link(blob, tmp)
+        except FileExistsError:
+            tmp.unlink()
+            os.link(blob, tmp)
+        except OSError:
+            shutil.copyfile(blob, tmp)
+        os.replace(tmp, dest)
+
+    @staticmethod
+    def _copy_into(file: Path, blob: Path) -> None:
+        fd, tmp = tempfile.mkstemp(dir=blob.parent, suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(file, tmp)
+        os.replace(tmp, blob)
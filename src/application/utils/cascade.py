@@ -0,0 +1,40 @@
+from typing import Any, Dict, List
+
+from domain.value_objects.column import Column
+
+# Answers that carry no information (compared case-insensitively)
+UNCERTAIN_VALUES = {"", "not specified", "not found", "nan", "none", "null"}
+MISSING_JUSTIFICATIONS = {"", "not found", "nan", "none", "null"}
+
+# Columns that list the same countries and must agree on their number
+COUNTRY_COLUMNS = ("country", "country_alpha_3_code")
+
+
+class EscalationReason:
+    UNCERTAIN = "uncertain"      # some fields were unanswered, unjustified or inconsistent
+    PARSE_ERROR = "parse_error"  # the fast model's answer could not be parsed at all
+
+
+def uncertain_columns(record: Dict[str, Any], columns: List[Column]) -> List[Column]:
+    """
+    Columns of a record worth re-asking to a stronger model: missing or "not specified" values,
+    missing justifications, and country names and alpha-3 codes that disagree on the number of countries.
+    """
+    uncertain = []
+    for col in columns:
+        value = str(record.get(col.name, "")).strip().lower()
+        justification = str(record.get(f"{col.name}_justification", "")).strip().lower()
+        if value in UNCERTAIN_VALUES or justification in MISSING_JUSTIFICATIONS:
+            uncertain.append(col)
+
+    by_name = {col.name: col for col in columns}
+    if all(name in by_name for name in COUNTRY_COLUMNS):
+        counts = {
+            len([part for part in str(record.get(name, "")).split(",") if part.strip()])
+            for name in COUNTRY_COLUMNS
+        }
+        if len(counts) > 1:
+            uncertain.extend(by_name[name] for name in COUNTRY_COLUMNS if by_name[name] not in uncertain)
+
+    # Keep the job's column order
+    return [col for col in columns if col in uncertain]
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Optional
+
+from application.interfaces.llm_client import LLMTransientError
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState:
+    CLOSED = "closed"        # calls flow
+    OPEN = "open"            # backend considered down: calls are held until the next probe
+    HALF_OPEN = "half_open"  # one trial call in flight decides whether to close or reopen
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for a backend, shared by every caller on the event loop.
+
+    Opens after 'failure_threshold' consecutive transient failures. While open, callers wait in acquire()
+    instead of sending requests doomed to fail; after 'open_seconds' a single half-open trial call is let
+    through: success closes the circuit and releases every waiting caller, failure reopens it for twice as
+    long (up to 'max_open_seconds').
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        open_seconds: float = 30.0,
+        max_open_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self._clock = clock
+
+        self.state = CircuitState.CLOSED
+        self.times_opened = 0
+        self._failures = 0
+        self._open_for = open_seconds
+        self._retry_at = 0.0
+        self._probe_in_flight = False
+        self._changed = asyncio.Event()
+
+    async def acquire(self, max_wait: Optional[float] = None) -> None:
+        """
+        Wait until a call may be sent. Returns immediately while closed.
+
+        :param max_wait: Give up after this many seconds of waiting (None waits until the backend recovers).
+        :raises LLMTransientError: if the circuit stayed open for max_wait seconds
+        """
+        deadline = None if max_wait is None else self._clock() + max_wait
+        while True:
+            if self.state == CircuitState.CLOSED:
+                return
+
+            now = self._clock()
+            if self.state == CircuitState.OPEN and now >= self._retry_at:
+                self._set_state(CircuitState.HALF_OPEN)
+            if self.state == CircuitState.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+
+            timeout = self._retry_at - now if self.state == CircuitState.OPEN else None
+            if deadline is not None:
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise LLMTransientError("LLM backend circuit is open; request not sent")
+                timeout = remaining if timeout is None else min(timeout, remaining)
+
+            changed = self._changed
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self.state == CircuitState.HALF_OPEN:
+            self._probe_in_flight = False
+            self._open_for = self.open_seconds
+            self._set_state(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        """Record a transient failure (the backend did not answer properly)."""
+        if self.state == CircuitState.HALF_OPEN:
+            self._probe_in_flight = False
+            self._open_for = min(self._open_for * 2, self.max_open_seconds)
+            self._open()
+        elif self.state == CircuitState.CLOSED:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._open_for = self.open_seconds
+                self._open()
+
+    def record_abandoned(self) -> None:
+        """The call ended without an answer (e.g. cancelled); let another caller probe."""
+        if self.state == CircuitState.HALF_OPEN and self._probe_in_flight:
+            self._probe_in_flight = False
+            self._notify()
+
+    def _open(self) -> None:
+        self._retry_at = self._clock() + self._open_for
+        self._failures = 0
+        self.times_opened += 1
+        logger.warning(f"LLM backend circuit opened; holding requests for {self._open_for:.0f}s before probing")
+        self._set_state(CircuitState.OPEN)
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.info(f"LLM backend circuit {self.state} -> {state}")
+            self.state = state
+        self._notify()
+
+    def _notify(self) -> None:
+        """Wake every waiting caller so it re-checks the state."""
+        self._changed.set()
+        self._changed = asyncio.Event()
@@ -0,0 +1,113 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from application.utils.metrics import CPU_TASK_SECONDS, CPU_TASK_WAIT_SECONDS, REGISTRY, run_forwarding
+
+logger = logging.getLogger(__name__)
+
+
+class CPUQueueFullError(RuntimeError):
+    """Raised when too many CPU-bound requests are already running or waiting."""
+    pass
+
+
+class CPUTaskRunner:
+    """
+    Runs CPU-bound functions on a bounded process pool so they never block the event loop.
+
+    At most 'max_concurrency' tasks are submitted to the pool at once; up to 'max_queue' further
+    requests wait for a slot and any request beyond that is rejected with CPUQueueFullError.
+    Functions and arguments must be picklable (module-level functions). Stage metrics they record
+    (e.g. aggregation and evaluation durations) are sent back and recorded in the API's registry.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_concurrency: Optional[int] = None,
+        max_queue: int = 16,
+        initializer: Optional[Callable[..., None]] = None,
+        initargs: tuple = (),
+    ):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        # spawn: workers must not inherit the API's threads and locks
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=initializer,
+            initargs=initargs,
+        )
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency or max_workers
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._running = 0
+        self._waiting = 0
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run fn(*args, **kwargs) in a worker process and await its result.
+
+        :raises CPUQueueFullError: if the wait queue is already full
+        """
+        if self._semaphore.locked() and self._waiting >= self.max_queue:
+            raise CPUQueueFullError(
+                f"CPU task queue is full ({self._running} running, {self._waiting} waiting)"
+            )
+
+        task = getattr(fn, "__name__", "task")
+        self._waiting += 1
+        start = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        CPU_TASK_WAIT_SECONDS.labels(task).observe(time.perf_counter() - start)
+
+        self._running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            with CPU_TASK_SECONDS.labels(task).time():
+                result, observations = await loop.run_in_executor(
+                    self._executor, functools.partial(run_forwarding, fn, *args, **kwargs)
+                )
+            REGISTRY.replay(observations)
+            return result
+        finally:
+            self._running -= 1
+            self._semaphore.release()
+
+    async def warm_up(self) -> None:
+        """
+        Start every worker process (and run its initializer) before the first real request.
+        """
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self._executor, _noop) for _ in range(self.max_workers)])
+        logger.info(f"CPU task runner started {self.max_workers} workers")
+
+    def stats(self) -> dict:
+        """
+        Current load of the runner.
+        """
+        return {
+            "workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "running": self._running,
+            "waiting": self._waiting,
+        }
+
+    def shutdown(self) -> None:
+        logger.info("Shutting down CPU task runner")
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _noop() -> None:
+    return None
@@ -0,0 +1,141 @@
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ManifestStatus:
+    DONE = "done"    # the document has a row; skipped on the next run
+    ERROR = "error"  # the document has an error row; retried on the next run
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """
+    Outcome of one document of a batch extraction: the file it was read from (path relative to the
+    input root, size, modification time and SHA-256) and where its row is in the row log.
+    """
+
+    file: str
+    sha256: str
+    size: int
+    mtime_ns: int
+    status: str
+    offset: int
+    length: int
+    error: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionManifest:
+    """
+    Append-only JSON-lines record of a batch extraction, so an interrupted run can be resumed.
+    Each line is one ManifestEntry; the last line of a file wins. A line is only written after the
+    document's row is in the row log, so every entry points to a complete row.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, ManifestEntry] = {}
+        self._torn = False  # last line cut short: the next entry must start on a new line
+        if path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        with self.path.open("r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                self._torn = not line.endswith("\n")
+                if not line.strip():
+                    continue
+                try:
+                    entry = ManifestEntry(**json.loads(line))
+                except (json.JSONDecodeError, TypeError) as e:
+                    # A line cut short by an interruption: the document is simply processed again
+                    logger.warning(f"Ignoring unreadable manifest line {line_number} of {self.path}: {e}")
+                    continue
+                self.entries[entry.file] = entry
+
+    def is_done(self, file: str, path: Path) -> bool:
+        """
+        Whether the document already has a row. Unchanged files (same size and modification time)
+        are recognized without reading them; otherwise the content hash decides.
+        """
+        entry = self.entries.get(file)
+        if entry is None or entry.status != ManifestStatus.DONE:
+            return False
+        stat = path.stat()
+        if stat.st_size == entry.size and stat.st_mtime_ns == entry.mtime_ns:
+            return True
+        return stat.st_size == entry.size and file_sha256(path) == entry.sha256
+
+    def record(self, entry: ManifestEntry) -> None:
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(("\n" if self._torn else "") + json.dumps(entry.to_dict()) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._torn = False
+        self.entries[entry.file] = entry
+
+
+class RowLog:
+    """
+    Append-only CSV of the raw rows of a batch extraction, addressed by byte offset and length,
+    so rows superseded by a retry stay in the file but are never read back.
+    """
+
+    def __init__(self, path: Path, fieldnames: List[str]):
+        self.path = path
+        self.fieldnames = fieldnames
+        if path.exists() and path.stat().st_size > 0:
+            with path.open("r", encoding="utf-8", newline="") as f:
+                header = next(csv.reader(f), [])
+            if header != fieldnames:
+                raise ValueError(f"{path} was written for other columns: {header}")
+        else:
+            self._write(self._encode(fieldnames))
+
+    @staticmethod
+    def _encode(values: Iterable[Any]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(values)
+        return buffer.getvalue().encode("utf-8")
+
+    def _write(self, data: bytes) -> int:
+        with self.path.open("ab") as f:
+            offset = f.tell()
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return offset
+
+    def append(self, record: Dict[str, Any]) -> Tuple[int, int]:
+        """Write one row; returns its offset and length."""
+        data = self._encode(record.get(name, "") for name in self.fieldnames)
+        return self._write(data), len(data)
+
+    def read(self, entries: List[ManifestEntry]) -> List[Dict[str, str]]:
+        """The rows the entries point to, in the order of the entries."""
+        rows = []
+        with self.path.open("rb") as f:
+            for entry in entries:
+                f.seek(entry.offset)
+                values = next(csv.reader(io.StringIO(f.read(entry.length).decode("utf-8"))))
+                rows.append(dict(zip(self.fieldnames, values)))
+        return rows
@@ -0,0 +1,56 @@
+import math
+from collections import deque
+from threading import Lock
+from typing import Optional
+
+
+class LatencyTracker:
+    """
+    Rolling window of observed request latencies (seconds), used to pick the hedging delay.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self._latencies = deque(maxlen=window)
+        self.min_samples = min_samples
+        self._lock = Lock()
+
+    def record(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """
+        Nearest-rank percentile of the window, or None until min_samples latencies were observed.
+        """
+        with self._lock:
+            if len(self._latencies) < max(1, self.min_samples):
+                return None
+            ordered = sorted(self._latencies)
+        rank = max(1, math.ceil(pct / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+
+class HedgeBudget:
+    """
+    Global cap on duplicate requests: a hedge may be sent only while hedges stay within
+    'ratio' of the primary requests sent so far (plus a small burst allowance at start-up).
+    """
+
+    def __init__(self, ratio: float = 0.1, burst: int = 2):
+        self.ratio = ratio
+        self.burst = burst
+        self.requests = 0
+        self.hedges = 0
+        self._lock = Lock()
+
+    def on_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def try_acquire(self) -> bool:
+        """Reserve one hedge if the budget allows it."""
+        with self._lock:
+            if self.hedges + 1 > self.ratio * self.requests + self.burst:
+                return False
+            self.hedges += 1
+            return True
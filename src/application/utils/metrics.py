@@ -0,0 +1,300 @@
+import bisect
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; covers fast local steps (row writes) up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# (metric name, label values, value) of the counter increments and histogram observations made by a task
+# in a CPU pool worker, whose own registry is never scraped; sent back with the result (see run_forwarding)
+Observation = Tuple[str, Tuple[str, ...], float]
+_forwarded: Optional[List[Observation]] = None
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    TYPE = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.labelvalues: Tuple[str, ...] = ()
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+        self._lock = Lock()
+
+    def labels(self, *values: str):
+        """The child metric for these label values (created on first use)."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    child.labelvalues = key
+                    self._children[key] = child
+        return child
+
+    def _new_child(self) -> "_Metric":
+        return type(self)(self.name, self.help)
+
+    def _series(self) -> Iterator[Tuple[Tuple[str, ...], "_Metric"]]:
+        if self.labelnames:
+            yield from sorted(self._children.items())
+        else:
+            yield (), self
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.TYPE}"]
+        for values, metric in self._series():
+            lines.extend(metric._samples(self.labelnames, values))
+        return lines
+
+    def _samples(self, names: Sequence[str], values: Sequence[str]) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        if _forwarded is not None:
+            _forwarded.append((self.name, self.labelvalues, amount))
+            return
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def _samples(self, names, values):
+        return [f"{self.name}{_format_labels(names, values)} {_format_value(self._value)}"]
+
+
+class Gauge(_Metric):
+    TYPE = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), callback: Optional[Callable[[], float]] = None):
+        super().__init__(name, help, labelnames)
+        self._value = 0.0
+        self._callback = callback
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    @contextmanager
+    def track_in_progress(self) -> Iterator[None]:
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+    @property
+    def value(self) -> float:
+        return float(self._callback()) if self._callback is not None else self._value
+
+    def _samples(self, names, values):
+        return [f"{self.name}{_format_labels(names, values)} {_format_value(self.value)}"]
+
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot: above the largest bucket
+        self._sum = 0.0
+        self._count = 0
+
+    def _new_child(self) -> "Histogram":
+        return Histogram(self.name, self.help, buckets=self.buckets)
+
+    def observe(self, value: float) -> None:
+        if _forwarded is not None:
+            _forwarded.append((self.name, self.labelvalues, value))
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the block, in seconds (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def _samples(self, names, values):
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(names, values, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(names, values)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(names, values)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process metrics rendered in the Prometheus text exposition format.
+    Recording is a lock-protected add (histograms: one bisect), cheap enough for every document and row.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = Lock()
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = (), callback: Optional[Callable[[], float]] = None) -> Gauge:
+        """A gauge; with a callback, its value is read from the callback at scrape time."""
+        return self._register(Gauge(name, help, labelnames, callback))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def replay(self, observations: List[Observation]) -> None:
+        """Record the counter increments and histogram observations forwarded by a CPU pool worker."""
+        for name, labelvalues, value in observations:
+            metric = self._metrics.get(name)
+            if metric is None:
+                continue
+            if labelvalues:
+                metric = metric.labels(*labelvalues)
+            if isinstance(metric, Histogram):
+                metric.observe(value)
+            elif isinstance(metric, Counter):
+                metric.inc(value)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} already registered as {existing.TYPE}")
+                if isinstance(metric, Gauge) and metric._callback is not None:
+                    existing._callback = metric._callback  # re-wired (e.g. app reload)
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+
+
+def run_forwarding(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, List[Observation]]:
+    """
+    Run fn in a CPU pool worker, collecting its counter and histogram recordings instead of applying
+    them to the worker's registry; the API process replays them with REGISTRY.replay.
+    """
+    global _forwarded
+    _forwarded = []
+    try:
+        return fn(*args, **kwargs), _forwarded
+    finally:
+        _forwarded = None
+
+
+REGISTRY = MetricsRegistry()
+
+# Pipeline stages
+UPLOAD_SECONDS = REGISTRY.histogram(
+    "hpm_upload_seconds", "Time to write the uploaded files of a new job to disk")
+UPLOAD_BYTES = REGISTRY.counter(
+    "hpm_upload_bytes_total", "Bytes of uploaded documents written to disk")
+UPLOAD_DEDUPLICATED_BYTES = REGISTRY.counter(
+    "hpm_upload_deduplicated_bytes_total", "Bytes of uploaded or referenced documents already in the blob store (not stored again)")
+DOCUMENT_READ_SECONDS = REGISTRY.histogram(
+    "hpm_llm_document_read_seconds", "Time to read (or upload to the LLM file API) a PDF before a request")
+LLM_GENERATE_SECONDS = REGISTRY.histogram(
+    "hpm_llm_generate_seconds", "Latency of one generate_content call", ("model",))
+LLM_PARSE_SECONDS = REGISTRY.histogram(
+    "hpm_llm_parse_seconds", "Time to parse and normalize one LLM response")
+ROW_WRITE_SECONDS = REGISTRY.histogram(
+    "hpm_raw_row_write_seconds", "Time to append one raw row to a job's CSV and update its progress")
+AGGREGATION_SECONDS = REGISTRY.histogram(
+    "hpm_aggregation_seconds", "Duration of an in-process aggregation")
+EVALUATION_SECONDS = REGISTRY.histogram(
+    "hpm_evaluation_seconds", "Duration of an in-process evaluation")
+CPU_TASK_SECONDS = REGISTRY.histogram(
+    "hpm_cpu_task_seconds", "Duration of a task on the CPU process pool (aggregation/evaluation requests)", ("task",))
+CPU_TASK_WAIT_SECONDS = REGISTRY.histogram(
+    "hpm_cpu_task_wait_seconds", "Time a CPU task waited for a pool slot", ("task",))
+
+# LLM requests
+LLM_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "hpm_llm_requests_in_flight", "LLM requests currently awaiting an answer")
+LLM_ERRORS = REGISTRY.counter(
+    "hpm_llm_errors_total", "Failed LLM attempts by error class", ("error_class",))
+LLM_RETRIES = REGISTRY.counter(
+    "hpm_llm_retries_total", "LLM retries by error class", ("error_class",))
+DOCUMENTS_PROCESSED = REGISTRY.counter(
+    "hpm_documents_processed_total", "Documents finished by outcome", ("outcome",))
+LLM_TOKENS = REGISTRY.counter(
+    "hpm_llm_tokens_total", "Tokens billed by the LLM backend", ("direction",))
+LLM_ESCALATIONS = REGISTRY.counter(
+    "hpm_llm_escalations_total", "Documents re-asked to the escalation model, by reason", ("reason",))
+LLM_ESCALATED_FIELDS = REGISTRY.counter(
+    "hpm_llm_escalated_fields_total", "Fields re-asked to the escalation model")
+LLM_COST = REGISTRY.counter(
+    "hpm_llm_cost_total", "Estimated cost of the LLM requests, in the currency of the configured prices")
+LLM_MODEL_IN_FLIGHT = REGISTRY.gauge(
+    "hpm_llm_model_requests_in_flight", "Requests holding a concurrency slot of a model", ("model",))
+LLM_MODEL_WAITING = REGISTRY.gauge(
+    "hpm_llm_model_requests_waiting", "Requests waiting for a concurrency slot or the rate limit of a model", ("model",))
+LLM_ROUTED_DOCUMENTS = REGISTRY.counter(
+    "hpm_llm_routed_documents_total", "Documents routed to each model of the client pool", ("model",))
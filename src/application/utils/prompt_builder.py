@@ -27,6 +27,10 @@ Always return the 'justification' field even if the value is "not found".
 The alpha-3 code for brazil is BRA.
 """
 
+PARSE_RETRY_NOTE = """
+**Note:** your previous answer could not be parsed. Output only the JSON object described above, with no other text.
+"""
+
 def build_prompt(context: str, columns: List[Column], file_name: str) -> str:
     """
     Build the prompt for the LLM given the context and columns. It will add a justification field for each column.
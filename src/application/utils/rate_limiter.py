@@ -0,0 +1,45 @@
+import asyncio
+import time
+from typing import Callable, Optional
+
+
+class RateLimiter:
+    """
+    Token bucket for request quotas: 'requests_per_minute' tokens per minute, at most 'burst' saved up.
+    acquire() waits until a token is available; callers are served roughly in arrival order.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        burst: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param requests_per_minute: Sustained request rate.
+        :param burst: Requests allowed back to back after an idle period (default: one second worth, at least 1).
+        """
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive.")
+        self.rate = requests_per_minute / 60.0
+        self.burst = burst if burst is not None else max(1, int(self.rate))
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        # Reserve the token right away (the balance may go negative) and wait for it to be refilled,
+        # so concurrent callers queue behind each other instead of all waking at the same time
+        self._refill()
+        self._tokens -= 1
+        if self._tokens < 0:
+            try:
+                await asyncio.sleep(-self._tokens / self.rate)
+            except asyncio.CancelledError:
+                self._tokens += 1  # give the reservation back
+                raise
@@ -0,0 +1,66 @@
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from application.interfaces.llm_client import LLMParseError
+from domain.value_objects.column import Column
+
+NOT_SPECIFIED = "Not specified"
+NOT_FOUND = "Not found"
+
+
+def build_response_schema(columns: List[Column]) -> Dict[str, Any]:
+    """
+    JSON Schema of the extraction output for the given columns: one required key per column,
+    each mapping to an object with a string 'value' and 'justification'.
+    """
+    return _cached_schema(tuple(columns))
+
+
+@lru_cache(maxsize=64)
+def _cached_schema(columns: Tuple[Column, ...]) -> Dict[str, Any]:
+    field_schema = {
+        "type": "object",
+        "properties": {
+            "value": {"type": "string"},
+            "justification": {"type": "string"},
+        },
+        "required": ["value", "justification"],
+        "additionalProperties": False,
+    }
+    properties = {}
+    for col in columns:
+        properties[col.name] = dict(field_schema, description=col.description) if col.description else field_schema
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": [col.name for col in columns],
+        "additionalProperties": False,
+    }
+
+
+def parse_structured_response(text: str, columns: List[Column]) -> Dict[str, Any]:
+    """
+    Parse a schema-constrained JSON response into a flat record with '<column>' and
+    '<column>_justification' for every requested column, in column order.
+    Keys the model added are ignored; a missing column or an empty value gets the usual placeholders.
+
+    :raises LLMParseError: if the text is not a JSON object
+    """
+    try:
+        data = json.loads(text)
+    except (TypeError, json.JSONDecodeError) as e:
+        raise LLMParseError(f"Structured response is not valid JSON: {e}")
+    if not isinstance(data, dict):
+        raise LLMParseError("Structured response is not a JSON object.")
+
+    record: Dict[str, Any] = {}
+    for col in columns:
+        field = data.get(col.name)
+        if isinstance(field, dict):
+            value, justification = field.get("value"), field.get("justification")
+        else:
+            value, justification = field, None
+        record[col.name] = str(value) if value not in (None, "") else NOT_SPECIFIED
+        record[f"{col.name}_justification"] = str(justification) if justification not in (None, "") else NOT_FOUND
+    return record
@@ -0,0 +1,146 @@
+import importlib.util
+import io
+import zlib
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+
+from domain.value_objects.result_artifact import ResultFormat
+
+try:
+    import zstandard  # optional: enables zstd-compressed CSV
+except ImportError:
+    zstandard = None
+
+CHUNK_BYTES = 64 * 1024
+CHUNK_ROWS = 1000
+
+
+class ContentEncoding:
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+
+# Pre-compressed CSV format matching each content encoding
+COMPRESSED_CSV_FORMATS = {
+    ContentEncoding.GZIP: ResultFormat.CSV_GZIP,
+    ContentEncoding.ZSTD: ResultFormat.CSV_ZSTD,
+}
+
+# Compression applied to the CSV body of compressed CSV formats
+FORMAT_COMPRESSION = {fmt: encoding for encoding, fmt in COMPRESSED_CSV_FORMATS.items()}
+
+
+def is_format_available(fmt: str) -> bool:
+    """
+    Check whether the optional dependencies needed to produce a format are installed.
+    """
+    if fmt == ResultFormat.CSV_ZSTD:
+        return zstandard is not None
+    if fmt == ResultFormat.PARQUET:
+        return importlib.util.find_spec("pyarrow") is not None or importlib.util.find_spec("fastparquet") is not None
+    return fmt in ResultFormat.ALL
+
+
+def is_encoding_available(encoding: str) -> bool:
+    """
+    Check whether a content encoding can be produced.
+    """
+    if encoding == ContentEncoding.ZSTD:
+        return zstandard is not None
+    return encoding == ContentEncoding.GZIP
+
+
+def write_frame(df: pd.DataFrame, path: Path, fmt: str) -> None:
+    """
+    Serialize a DataFrame to a file in the given format.
+    """
+    if fmt == ResultFormat.CSV:
+        df.to_csv(path, index=False)
+    elif fmt == ResultFormat.CSV_GZIP:
+        df.to_csv(path, index=False, compression="gzip")
+    elif fmt == ResultFormat.CSV_ZSTD:
+        df.to_csv(path, index=False, compression="zstd")
+    elif fmt == ResultFormat.PARQUET:
+        df.to_parquet(path, index=False)
+    elif fmt == ResultFormat.NDJSON:
+        df.to_json(path, orient="records", lines=True, force_ascii=False)
+    else:
+        raise ValueError(f"Unsupported result format: {fmt}")
+
+
+def iter_file(path: Path, chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    Read a file from disk in fixed-size chunks.
+    """
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_bytes):
+            yield chunk
+
+
+def iter_csv(df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Serialize a DataFrame to CSV a slice of rows at a time (header only in the first chunk).
+    """
+    if df.empty:
+        yield df.to_csv(index=False).encode("utf-8")
+        return
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=(start == 0)).encode("utf-8")
+
+
+def iter_ndjson(df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Serialize a DataFrame to newline-delimited JSON a slice of rows at a time.
+    """
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_json(orient="records", lines=True, force_ascii=False).encode("utf-8")
+
+
+def iter_frame(df: pd.DataFrame, fmt: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Serialize a DataFrame in the given format as a stream of chunks.
+    Compressed CSV formats yield plain CSV; apply compress_stream with FORMAT_COMPRESSION[fmt].
+    Parquet is columnar and is produced in a single chunk.
+    """
+    if fmt in (ResultFormat.CSV, ResultFormat.CSV_GZIP, ResultFormat.CSV_ZSTD):
+        yield from iter_csv(df, chunk_rows)
+    elif fmt == ResultFormat.NDJSON:
+        yield from iter_ndjson(df, chunk_rows)
+    elif fmt == ResultFormat.PARQUET:
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        yield buffer.getvalue()
+    else:
+        raise ValueError(f"Unsupported result format: {fmt}")
+
+
+def iter_csv_file_as_ndjson(path: Path, chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Convert a CSV file on disk to newline-delimited JSON without loading it all in memory.
+    """
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        yield chunk.to_json(orient="records", lines=True, force_ascii=False).encode("utf-8")
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    """
+    Compress a stream of byte chunks on the fly with the given content encoding (None = passthrough).
+    """
+    if encoding is None:
+        yield from chunks
+        return
+
+    if encoding == ContentEncoding.GZIP:
+        compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    elif encoding == ContentEncoding.ZSTD and zstandard is not None:
+        compressor = zstandard.ZstdCompressor().compressobj()
+    else:
+        raise ValueError(f"Unsupported content encoding: {encoding}")
+
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
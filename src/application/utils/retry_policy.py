@@ -0,0 +1,59 @@
+import asyncio
+import random
+from typing import Dict, Optional
+
+from application.interfaces.llm_client import LLMParseError, LLMPermanentError, LLMTransientError
+
+
+class ErrorClass:
+    TRANSIENT = "transient"  # timeouts, rate limits, server errors: retry the same request after a backoff
+    PARSE = "parse"          # unparseable answer: re-ask
+    PERMANENT = "permanent"  # bad document or rejected request: do not retry
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Map an exception raised while processing a document to its ErrorClass.
+    Clients raise the LLM*Error types; other exceptions are classified by type.
+    """
+    if isinstance(error, LLMTransientError):
+        return ErrorClass.TRANSIENT
+    if isinstance(error, LLMParseError):
+        return ErrorClass.PARSE
+    if isinstance(error, LLMPermanentError):
+        return ErrorClass.PERMANENT
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return ErrorClass.TRANSIENT
+    return ErrorClass.PERMANENT
+
+
+class RetryPolicy:
+    """
+    Per-document retry budgets by error class, with exponential backoff and full jitter:
+    the n-th retry waits a random time in [0, min(max_delay, base_delay * 2**n)].
+    """
+
+    def __init__(
+        self,
+        max_retries: Optional[Dict[str, int]] = None,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        rng: Optional[random.Random] = None,
+    ):
+        self.max_retries = {
+            ErrorClass.TRANSIENT: 4,
+            ErrorClass.PARSE: 2,
+            ErrorClass.PERMANENT: 0,
+        }
+        self.max_retries.update(max_retries or {})
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+
+    def should_retry(self, error_class: str, retries_done: int) -> bool:
+        """Whether another retry is allowed after 'retries_done' retries of this class."""
+        return retries_done < self.max_retries.get(error_class, 0)
+
+    def backoff(self, retry_number: int) -> float:
+        """Seconds to wait before the given retry (0-based)."""
+        return self._rng.uniform(0, min(self.max_delay, self.base_delay * (2 ** retry_number)))
@@ -0,0 +1,4 @@
+"""
+Performance benchmarks. Run from src/, e.g. `python -m benchmarks.pipeline`; results are saved as JSON
+and can be compared against a baseline run with --compare.
+"""
@@ -0,0 +1,167 @@
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT_DIR = Path(__file__).resolve().parents[2] / "data" / "benchmarks"
+
+# Metric name suffixes and whether a higher value is better; other metrics are informative only
+METRIC_DIRECTIONS = {
+    "_per_sec": True,
+    "_ms": False,
+    "_s": False,
+    "_mb": False,
+}
+
+
+def percentiles(values: Iterable[float], pcts: Iterable[int] = (50, 95, 99), scale: float = 1.0) -> Dict[str, float]:
+    """Nearest-rank percentiles as {'p50': ..., 'p95': ..., 'p99': ...}, values multiplied by scale."""
+    ordered = sorted(values)
+    if not ordered:
+        return {f"p{p}": float("nan") for p in pcts}
+    return {f"p{p}": ordered[max(1, math.ceil(p / 100 * len(ordered))) - 1] * scale for p in pcts}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_isolated(func: Callable[..., Dict[str, Any]], *args: Any) -> Dict[str, Any]:
+    """
+    Run one scenario in a fresh process, so its peak RSS (and warm caches) do not leak into the next one.
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(func, *args).result()
+
+
+def timed(func: Callable[[], Any], repeat: int = 1) -> float:
+    """Best wall time of 'repeat' calls, in seconds."""
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--output", type=Path, default=None,
+                        help=f"Results JSON file (default: {DEFAULT_OUTPUT_DIR}/<benchmark>_<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, default=None,
+                        help="Baseline results JSON; exit with status 1 if a metric regressed beyond --threshold")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative change counted as a regression (default: 0.10)")
+    parser.add_argument("--log-level", default="WARNING", help="Logging level while benchmarking (default: WARNING)")
+
+
+def configure_logging(level: str) -> None:
+    # Configured before the application modules so their DEBUG logging does not dominate the timings
+    logging.basicConfig(level=level.upper(), format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+def run_metadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_results(benchmark: str, config: Dict[str, Any], scenarios: Dict[str, Dict[str, Any]], output: Optional[Path]) -> Path:
+    """
+    Save a run as JSON: {"benchmark", "metadata", "config", "scenarios": {name: {metric: value}}}.
+    """
+    if output is None:
+        DEFAULT_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+        output = DEFAULT_OUTPUT_DIR / f"{benchmark}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
+    else:
+        output.parent.mkdir(parents=True, exist_ok=True)
+
+    payload = {"benchmark": benchmark, "metadata": run_metadata(), "config": config, "scenarios": scenarios}
+    output.write_text(json.dumps(payload, indent=2, default=str))
+    return output
+
+
+def compare_results(current: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+    """
+    Compare the scenarios of two runs metric by metric. Returns descriptions of the regressions
+    (changes in the bad direction larger than threshold, relative to the baseline).
+    """
+    regressions = []
+    for scenario, metrics in current.items():
+        base_metrics = baseline.get(scenario)
+        if base_metrics is None:
+            continue
+        for metric, value in metrics.items():
+            higher_is_better = _direction(metric)
+            base_value = base_metrics.get(metric)
+            if higher_is_better is None or not _is_number(value) or not _is_number(base_value) or base_value == 0:
+                continue
+            change = (value - base_value) / abs(base_value)
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append(f"{scenario}.{metric}: {base_value:.4g} -> {value:.4g} ({change:+.1%})")
+    return regressions
+
+
+def print_scenarios(scenarios: Dict[str, Dict[str, Any]]) -> None:
+    for scenario, metrics in scenarios.items():
+        print(f"\n{scenario}")
+        for metric, value in metrics.items():
+            shown = f"{value:.4g}" if isinstance(value, float) else value
+            print(f"  {metric:<32} {shown}")
+
+
+def finish(benchmark: str, args: argparse.Namespace, config: Dict[str, Any], scenarios: Dict[str, Dict[str, Any]]) -> int:
+    """Print and save the results, compare them with the baseline if given. Returns the exit status."""
+    print_scenarios(scenarios)
+    output = save_results(benchmark, config, scenarios, args.output)
+    print(f"\nResults saved to {output}")
+
+    if args.compare is None:
+        return 0
+    baseline = json.loads(args.compare.read_text())
+    regressions = compare_results(scenarios, baseline.get("scenarios", {}), args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regressions beyond {args.threshold:.0%} against {args.compare}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+def _direction(metric: str) -> Optional[bool]:
+    for suffix, higher_is_better in METRIC_DIRECTIONS.items():
+        if metric.endswith(suffix):
+            return higher_is_better
+    return None
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
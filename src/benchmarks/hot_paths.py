@@ -0,0 +1,306 @@
+"""
+Micro-benchmarks of the CPU hot paths: Aggregator.aggregate and PrepSTIEvaluator.evaluate_frame,
+timed stage by stage over a grid of table sizes.
+
+Synthetic tables are modeled on the real reference CSV (its countries and per-column Yes/No rates);
+columns beyond the reference's are drawn from the same rates.
+- aggregate: raw extraction tables (source_file, country, code, value + justification per column,
+  error) with a share of multi-country rows ("AUT, DEU") to explode.
+- evaluate: aggregated tables against a generated reference with one distinct key per row
+  (stored with its context config in a temporary directory), ~5% of keys missing or extra.
+
+Each grid point reports the best time of every stage over --repeat runs and the peak traced memory
+(tracemalloc, measured in a separate, slower run; --no-memory skips it). Along a curve (fixed columns
+and explosion rate), larger row counts are skipped once a point takes longer than --max-seconds.
+
+Usage (from src/):
+    python -m benchmarks.hot_paths [--rows 90 1000 10000 100000] [--columns 7 50 200] [--compare BASELINE.json]
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from benchmarks.common import add_common_arguments, configure_logging, finish
+
+REFERENCE_CSV = Path(__file__).resolve().parents[2] / "data" / "reference" / "reference_90_prep_sti_cleaned.csv"
+KEY_COLUMN = "country_alpha_3_code"
+
+Stage = Tuple[str, Callable[[Dict[str, Any]], None]]
+
+
+class ReferenceModel:
+    """Countries and Yes rates of the real reference dataset, used to draw synthetic values."""
+
+    def __init__(self, path: Path = REFERENCE_CSV):
+        df = pd.read_csv(path)
+        df.columns = [c.strip().lower().replace(" ", "_").replace("-", "_") for c in df.columns]
+        self.countries = list(zip(df["country"].astype(str), df[KEY_COLUMN].astype(str)))
+        self.policy_columns = [c for c in df.columns if c not in ("country", KEY_COLUMN)]
+        self.yes_rates = [float((df[c].astype(str).str.lower() == "yes").mean()) for c in self.policy_columns]
+
+    def columns(self, count: int) -> List[Tuple[str, float]]:
+        """'count' policy columns with their Yes rate: the real ones first, then synthetic ones."""
+        columns = list(zip(self.policy_columns, self.yes_rates))[:count]
+        for i in range(len(columns), count):
+            columns.append((f"policy_{i + 1}", self.yes_rates[i % len(self.yes_rates)]))
+        return columns
+
+
+def _value(rng: random.Random, yes_rate: float) -> str:
+    roll = rng.random()
+    if roll < yes_rate:
+        return "Yes"
+    return "Not specified" if roll < yes_rate + (1 - yes_rate) * 0.3 else "No"
+
+
+def make_raw_table(model: ReferenceModel, rows: int, columns: int, explode_rate: float, seed: int = 0) -> pd.DataFrame:
+    """Raw extraction rows as written by a job (several documents per country)."""
+    rng = random.Random(seed)
+    policy = model.columns(columns)
+    records = []
+    for i in range(rows):
+        countries = rng.sample(model.countries, rng.choice((2, 3)) if rng.random() < explode_rate else 1)
+        record = {
+            "source_file": f"doc_{i:06d}.pdf",
+            "country": ", ".join(name for name, _ in countries),
+            "country_justification": "Title page",
+            KEY_COLUMN: ", ".join(code for _, code in countries),
+            f"{KEY_COLUMN}_justification": "Title page",
+        }
+        for name, yes_rate in policy:
+            record[name] = _value(rng, yes_rate)
+            record[f"{name}_justification"] = f"Page {rng.randint(1, 60)}, paragraph {rng.randint(1, 8)}"
+        record["error"] = ""
+        records.append(record)
+    return pd.DataFrame(records)
+
+
+def make_eval_context(model: ReferenceModel, rows: int, columns: int, directory: Path, seed: int = 0) -> Tuple[str, pd.DataFrame]:
+    """
+    Write a reference with 'rows' distinct keys and its context config to directory;
+    return the context name and a generated (aggregated) frame to evaluate against it.
+    """
+    rng = random.Random(seed)
+    policy = model.columns(columns)
+    keys = [f"K{i:06d}" for i in range(rows)]
+
+    reference_data: Dict[str, List[str]] = {"Country": keys, "Country Alpha-3 Code": keys}
+    for name, yes_rate in policy:
+        reference_data[name] = [("Yes" if rng.random() < yes_rate else "No") for _ in keys]
+    reference = pd.DataFrame(reference_data)
+
+    generated_keys = [k for k in keys if rng.random() >= 0.05]
+    generated_keys += [f"X{i:06d}" for i in range(max(1, rows // 20))]
+    generated_data: Dict[str, List[str]] = {"country": generated_keys, KEY_COLUMN: generated_keys}
+    for name, yes_rate in policy:
+        generated_data[name] = [_value(rng, yes_rate) for _ in generated_keys]
+        generated_data[f"{name}_justification"] = ["doc.pdf: Page 1"] * len(generated_keys)
+    generated = pd.DataFrame(generated_data)
+
+    context = f"bench_{rows}_{columns}"
+    reference_file = f"{context}.csv"
+    reference.to_csv(directory / reference_file, index=False)
+    (directory / "contexts").mkdir(exist_ok=True)
+    (directory / "contexts" / f"{context}.json").write_text(json.dumps({
+        "name": context,
+        "reference_file": reference_file,
+        "key_column": KEY_COLUMN,
+        "columns_to_compare": [name for name, _ in policy],
+    }))
+    return context, generated
+
+
+def aggregate_stages(raw: pd.DataFrame) -> List[Stage]:
+    """The steps of Aggregator.aggregate, in order, sharing intermediate results through 'state'."""
+    from application.use_cases.aggregator import Aggregator
+
+    aggregator = Aggregator()
+
+    def explode(state):
+        state["exploded"] = aggregator._safe_explode_countries(raw)
+
+    def aggregate_regular(state):
+        regular, _ = aggregator._categorize_columns(state["exploded"])
+        state["regular"] = regular
+        state["result"] = aggregator._aggregate_regular_columns(state["exploded"], regular)
+
+    def add_justifications(state):
+        state["result"] = aggregator._add_justification_columns(state["exploded"], state["result"], state["regular"])
+
+    def reorder(state):
+        state["result"] = aggregator._reorder_columns(state["result"], state["regular"])
+
+    return [
+        ("safe_explode_countries", explode),
+        ("aggregate_regular_columns", aggregate_regular),
+        ("add_justification_columns", add_justifications),
+        ("reorder_columns", reorder),
+    ]
+
+
+def evaluate_stages(evaluator: Any, context: str, generated: pd.DataFrame) -> List[Stage]:
+    """The steps of PrepSTIEvaluator.evaluate_frame (without artifacts), in order."""
+    compiled = evaluator._get_compiled_context(context)
+    config = compiled.config
+
+    def preprocess(state):
+        state["generated"] = evaluator._preprocess_dataframe(generated, config, compiled.normalize_columns)
+
+    def find_common(state):
+        info = evaluator._find_common_countries(compiled.reference_keys, state["generated"], config.key_column)
+        state["reference"] = compiled.reference[compiled.reference[config.key_column].isin(info["common"])].copy()
+        state["generated"] = state["generated"][state["generated"][config.key_column].isin(info["common"])].copy()
+
+    def match_and_compare(state):
+        state["merged"] = evaluator._match_rows_and_compare(
+            state["reference"], state["generated"], [config.key_column], compiled.columns_to_compare
+        )
+
+    def compute_metrics(state):
+        evaluator._compute_all_metrics(state["merged"], compiled.columns_to_compare, config.key_column)
+
+    return [
+        ("preprocess_dataframe", preprocess),
+        ("find_common_countries", find_common),
+        ("match_rows_and_compare", match_and_compare),
+        ("compute_all_metrics", compute_metrics),
+    ]
+
+
+def measure(stages: List[Stage], repeat: int, memory: bool) -> Dict[str, float]:
+    """Best time of each stage (and of the whole sequence) over 'repeat' runs, plus the peak traced memory."""
+    best: Dict[str, float] = {name: float("inf") for name, _ in stages}
+    best_total = float("inf")
+    for _ in range(max(1, repeat)):
+        state: Dict[str, Any] = {}
+        total = 0.0
+        for name, stage in stages:
+            start = time.perf_counter()
+            stage(state)
+            elapsed = time.perf_counter() - start
+            best[name] = min(best[name], elapsed)
+            total += elapsed
+        best_total = min(best_total, total)
+        if total > 5:
+            break  # large points: one timing run is enough
+
+    metrics = {f"{name}_s": value for name, value in best.items()}
+    metrics["total_s"] = best_total
+
+    if memory:
+        tracemalloc.start()
+        state = {}
+        for _, stage in stages:
+            stage(state)
+        metrics["peak_traced_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    return metrics
+
+
+def scaling_exponent(points: List[Tuple[int, float]]) -> Optional[float]:
+    """Least-squares slope of log(time) against log(rows): ~1 linear, ~2 quadratic."""
+    points = [(r, t) for r, t in points if t > 0]
+    if len(points) < 2:
+        return None
+    xs = [math.log(r) for r, _ in points]
+    ys = [math.log(t) for _, t in points]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    denominator = sum((x - mean_x) ** 2 for x in xs)
+    if denominator == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / denominator
+
+
+def run_curves(
+    benchmark: str,
+    build: Callable[[int, int, float], List[Stage]],
+    rows_list: List[int],
+    columns_list: List[int],
+    explode_rates: List[float],
+    args: argparse.Namespace
+) -> Dict[str, Dict[str, Any]]:
+    scenarios: Dict[str, Dict[str, Any]] = {}
+    for columns in columns_list:
+        for explode_rate in explode_rates:
+            curve: List[Tuple[int, float]] = []
+            for rows in sorted(rows_list):
+                name = f"{benchmark}/rows={rows}/columns={columns}" + (f"/explode={explode_rate}" if benchmark == "aggregate" else "")
+                if curve and curve[-1][1] > args.max_seconds:
+                    print(f"  {name}: skipped (previous point exceeded {args.max_seconds}s)", file=sys.stderr)
+                    continue
+                stages = build(rows, columns, explode_rate)
+                metrics = measure(stages, args.repeat, memory=not args.no_memory)
+                metrics = {"rows": rows, "columns": columns, "explode_rate": explode_rate,
+                           "rows_per_sec": rows / metrics["total_s"], **metrics}
+                scenarios[name] = metrics
+                curve.append((rows, metrics["total_s"]))
+                print(f"  {name}: {metrics['total_s']:.3f}s", file=sys.stderr)
+
+            exponent = scaling_exponent(curve)
+            if exponent is not None:
+                label = f"{benchmark} columns={columns}" + (f" explode={explode_rate}" if benchmark == "aggregate" else "")
+                print(f"  scaling {label}: time ~ rows^{exponent:.2f}", file=sys.stderr)
+    return scenarios
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Stage-level micro-benchmarks of aggregation and evaluation.")
+    parser.add_argument("--benchmark", action="append", choices=["aggregate", "evaluate"],
+                        help="Benchmark to run (repeatable; default: both)")
+    parser.add_argument("--rows", type=int, nargs="+", default=[90, 1000, 10000, 100000])
+    parser.add_argument("--columns", type=int, nargs="+", default=[7, 50, 200])
+    parser.add_argument("--explode-rates", type=float, nargs="+", default=[0.0, 0.1, 0.5],
+                        help="Shares of multi-country raw rows (aggregate only)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per point; the best is kept (default: 3)")
+    parser.add_argument("--max-seconds", type=float, default=30.0,
+                        help="Skip larger row counts of a curve once a point takes longer (default: 30)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc memory run")
+    parser.add_argument("--seed", type=int, default=0)
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    configure_logging(args.log_level)
+    from application.use_cases.eval.prep_sti_evaluator import PrepSTIEvaluator
+
+    model = ReferenceModel()
+    benchmarks = args.benchmark or ["aggregate", "evaluate"]
+    scenarios: Dict[str, Dict[str, Any]] = {}
+
+    if "aggregate" in benchmarks:
+        print("Aggregator.aggregate", file=sys.stderr)
+        scenarios.update(run_curves(
+            "aggregate",
+            lambda rows, columns, rate: aggregate_stages(make_raw_table(model, rows, columns, rate, args.seed)),
+            args.rows, args.columns, args.explode_rates, args
+        ))
+
+    if "evaluate" in benchmarks:
+        print("PrepSTIEvaluator.evaluate_frame", file=sys.stderr)
+        with tempfile.TemporaryDirectory(prefix="hpm_bench_") as tmp:
+            directory = Path(tmp)
+            evaluator = PrepSTIEvaluator(reference_data_dir=directory, output_root=directory / "output")
+
+            def build(rows: int, columns: int, _rate: float) -> List[Stage]:
+                context, generated = make_eval_context(model, rows, columns, directory, args.seed)
+                return evaluate_stages(evaluator, context, generated)
+
+            scenarios.update(run_curves("evaluate", build, args.rows, args.columns, [0.0], args))
+
+    config = {
+        "rows": args.rows, "columns": args.columns, "explode_rates": args.explode_rates,
+        "repeat": args.repeat, "max_seconds": args.max_seconds, "seed": args.seed,
+    }
+    return finish("hot_paths", args, config, scenarios)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""
+End-to-end throughput benchmark of the job pipeline with the fake LLM client.
+
+Scenarios (each in a fresh process):
+- many_small_jobs: many concurrent 5-document jobs through JobLifecycle
+- large_job: one 1000-document job through JobLifecycle
+- mixed_columns: concurrent jobs extracting 7 to 200 columns through JobLifecycle
+- api_under_load: jobs created over HTTP against the FastAPI app (uvicorn), with clients polling
+  job status while they run
+
+Per-document latency is the time from a document's first LLM request to the next document of its job
+being dispatched (or the job finishing): it covers retries, the raw row write and the progress update.
+
+Usage (from src/):
+    python -m benchmarks.pipeline [--scenario NAME ...] [--scale 0.1] [--compare BASELINE.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.common import add_common_arguments, configure_logging, finish, peak_rss_mb, percentiles, run_isolated
+
+CONTEXT = "Benchmark: extract PrEP and STI policy fields from national guidelines."
+
+
+def fake_pdf(index: int) -> bytes:
+    """Placeholder PDF, unique per index so uploads are not merged as duplicates of each other."""
+    return f"%PDF-1.4\n% benchmark placeholder {index}\n%%EOF\n".encode("ascii")
+
+# name -> (kind, [(documents, columns) per job])
+SCENARIOS: Dict[str, Tuple[str, List[Tuple[int, int]]]] = {
+    "many_small_jobs": ("lifecycle", [(5, 7)] * 100),
+    "large_job": ("lifecycle", [(1000, 7)]),
+    "mixed_columns": ("lifecycle", [(100, 7), (100, 30), (100, 100), (100, 200)]),
+    "api_under_load": ("api", [(50, 7)] * 20),
+}
+
+
+def make_columns(count: int) -> List[Dict[str, str]]:
+    """Country columns (needed by aggregation) followed by generic Yes/No fields."""
+    columns = [
+        {"name": "Country", "description": "Country the document applies to"},
+        {"name": "Country Alpha-3 Code", "description": "ISO alpha-3 code of the country"},
+    ]
+    columns += [{"name": f"Field {i}", "description": f"Whether the policy covers item {i}"} for i in range(1, count - 1)]
+    return columns[:count]
+
+
+class DispatchRecorder:
+    """Records when each document's first request was dispatched, per job directory."""
+
+    def __init__(self):
+        self.dispatched: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self.finished: Dict[str, float] = {}
+
+    def wrap(self, client: Any) -> Any:
+        from application.interfaces.llm_client import BaseLLMClient
+
+        recorder = self
+
+        class _RecordingClient(BaseLLMClient):
+            def __init__(self):
+                super().__init__(client.api_key, client.model_name)
+
+            async def process(self, document_path, prompt, columns=None):
+                recorder.dispatched[document_path.parent.name].setdefault(document_path.name, time.perf_counter())
+                return await client.process(document_path=document_path, prompt=prompt, columns=columns)
+
+        return _RecordingClient()
+
+    def document_latencies(self) -> List[float]:
+        latencies = []
+        for job_dir, starts in self.dispatched.items():
+            times = sorted(starts.values())
+            ends = times[1:] + [self.finished.get(job_dir, times[-1])]
+            latencies.extend(end - start for start, end in zip(times, ends))
+        return latencies
+
+
+def _write_documents(job_dir: Path, count: int) -> List[Path]:
+    paths = []
+    for i in range(count):
+        path = job_dir / f"doc_{i:05d}.pdf"
+        path.write_bytes(fake_pdf(i))
+        paths.append(path)
+    return paths
+
+
+def _throughput_metrics(documents: int, wall: float, latencies: List[float]) -> Dict[str, Any]:
+    doc_latency = percentiles(latencies, scale=1000)
+    return {
+        "jobs_documents": documents,
+        "wall_s": wall,
+        "documents_per_sec": documents / wall if wall else float("nan"),
+        "doc_latency_p50_ms": doc_latency["p50"],
+        "doc_latency_p95_ms": doc_latency["p95"],
+        "doc_latency_p99_ms": doc_latency["p99"],
+    }
+
+
+def run_lifecycle_scenario(jobs: List[Tuple[int, int]], llm_latency: float, seed: int, log_level: str) -> Dict[str, Any]:
+    """Create the jobs directly in a JobLifecycle and process them concurrently."""
+    configure_logging(log_level)
+    from application.use_cases.aggregator import Aggregator
+    from application.use_cases.job_lifecycle import JobLifecycle
+    from application.use_cases.llm_processor import LLMProcessor
+    from application.utils.temp_file_handler import get_job_temp_dir
+    from domain.entities.job import JobStatus
+    from domain.value_objects.column import Column
+    from infrastructure.llm_clients.fake_client import FakeLLMClient
+    from infrastructure.repository.job_repo_inmemory import InMemoryJobRepository
+
+    recorder = DispatchRecorder()
+    client = recorder.wrap(FakeLLMClient(seed=seed, latency_median=llm_latency))
+    lifecycle = JobLifecycle(repo=InMemoryJobRepository(), llm_processor=LLMProcessor(client), aggregator=Aggregator())
+
+    job_ids = []
+    for documents, column_count in jobs:
+        job_id = uuid.uuid4()
+        files = _write_documents(get_job_temp_dir(str(job_id)), documents)
+        columns = [Column(**c) for c in make_columns(column_count)]
+        job_ids.append(lifecycle.create_job(files=files, context=CONTEXT, columns=columns, job_id=job_id))
+
+    async def process(job_id: uuid.UUID) -> None:
+        await lifecycle.process_job(job_id)
+        recorder.finished[str(job_id)] = time.perf_counter()
+
+    async def run_all() -> float:
+        start = time.perf_counter()
+        await asyncio.gather(*(process(job_id) for job_id in job_ids))
+        return time.perf_counter() - start
+
+    try:
+        wall = asyncio.run(run_all())
+        failed = [str(j) for j in job_ids if lifecycle.get_job(j).status != JobStatus.DONE]
+        if failed:
+            raise RuntimeError(f"{len(failed)} benchmark jobs did not finish cleanly, e.g. {failed[0]}")
+    finally:
+        for job_id in job_ids:
+            shutil.rmtree(get_job_temp_dir(str(job_id)), ignore_errors=True)
+
+    metrics = _throughput_metrics(sum(d for d, _ in jobs), wall, recorder.document_latencies())
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    return metrics
+
+
+def run_api_scenario(
+    jobs: List[Tuple[int, int]],
+    llm_latency: float,
+    seed: int,
+    log_level: str,
+    pollers: int = 8,
+    poll_interval: float = 0.05
+) -> Dict[str, Any]:
+    """
+    Create the jobs over HTTP against the full app served by uvicorn, while 'pollers' clients per job
+    poll its status every poll_interval seconds until it finishes.
+    """
+    configure_logging(log_level)
+    os.environ.update({
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_LATENCY": str(llm_latency),
+        "FAKE_LLM_SEED": str(seed),
+        "CPU_WORKERS": "1",
+    })
+    import httpx
+    import uvicorn
+    import main
+    from application.utils.temp_file_handler import get_job_temp_dir
+    from domain.entities.job import JobStatus
+
+    recorder = DispatchRecorder()
+    main.llm_processor.client = recorder.wrap(main.llm_processor.client)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(main.app, log_level=log_level.lower(), access_log=False))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Benchmark server failed to start")
+        time.sleep(0.01)
+
+    create_latencies: List[float] = []
+    poll_latencies: List[float] = []
+    job_ids: List[str] = []
+    final_status: Dict[str, Dict[str, Any]] = {}
+
+    async def run_job(client: httpx.AsyncClient, documents: int, column_count: int) -> None:
+        files = [("files", (f"doc_{i:05d}.pdf", fake_pdf(i), "application/pdf")) for i in range(documents)]
+        data = {"context": CONTEXT, "columns": json.dumps(make_columns(column_count))}
+        start = time.perf_counter()
+        response = await client.post("/jobs/", files=files, data=data)
+        create_latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+        job_ids.append(job_id)
+
+        async def poll() -> None:
+            while True:
+                poll_start = time.perf_counter()
+                status = await client.get(f"/jobs/{job_id}/status")
+                poll_latencies.append(time.perf_counter() - poll_start)
+                status.raise_for_status()
+                if status.json()["status"] not in (JobStatus.PENDING, JobStatus.RUNNING):
+                    recorder.finished.setdefault(job_id, time.perf_counter())
+                    final_status[job_id] = status.json()
+                    return
+                await asyncio.sleep(poll_interval)
+
+        await asyncio.gather(*(poll() for _ in range(pollers)))
+
+    async def run_all() -> float:
+        limits = httpx.Limits(max_connections=len(jobs) * pollers + len(jobs))
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=300, limits=limits) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(run_job(client, documents, columns) for documents, columns in jobs))
+            return time.perf_counter() - start
+
+    try:
+        wall = asyncio.run(run_all())
+        failed = [job_id for job_id in job_ids if final_status[job_id]["status"] != JobStatus.DONE]
+        if failed:
+            raise RuntimeError(f"{len(failed)} benchmark jobs did not finish cleanly, e.g. {failed[0]}")
+    finally:
+        server.should_exit = True
+        thread.join(timeout=30)
+        for job_id in job_ids:
+            shutil.rmtree(get_job_temp_dir(job_id), ignore_errors=True)
+
+    # Documents the server actually processed (uploads it merged as duplicates are not counted)
+    documents_processed = sum(status["total_files"] for status in final_status.values())
+    metrics = _throughput_metrics(documents_processed, wall, recorder.document_latencies())
+    create = percentiles(create_latencies, scale=1000)
+    poll = percentiles(poll_latencies, scale=1000)
+    metrics.update({
+        "create_job_p50_ms": create["p50"],
+        "create_job_p95_ms": create["p95"],
+        "polls": len(poll_latencies),
+        "poll_latency_p50_ms": poll["p50"],
+        "poll_latency_p95_ms": poll["p95"],
+        "poll_latency_p99_ms": poll["p99"],
+        "peak_rss_mb": peak_rss_mb(),
+    })
+    return metrics
+
+
+def scaled_jobs(jobs: List[Tuple[int, int]], scale: float) -> List[Tuple[int, int]]:
+    """Scale the number of identical jobs, or the documents of each job when they differ (or there is one)."""
+    if len(jobs) > 1 and len(set(jobs)) == 1:
+        return jobs[:max(1, round(len(jobs) * scale))]
+    return [(max(1, round(documents * scale)), columns) for documents, columns in jobs]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end throughput benchmark of the job pipeline (fake LLM).")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable; default: all)")
+    parser.add_argument("--llm-latency", type=float, default=0.005,
+                        help="Median fake LLM latency in seconds (default: 0.005, so pipeline overhead dominates)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Scale the workload size (default: 1.0)")
+    parser.add_argument("--seed", type=int, default=0)
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    names = args.scenario or list(SCENARIOS)
+    scenarios: Dict[str, Dict[str, Any]] = {}
+    for name in names:
+        kind, jobs = SCENARIOS[name]
+        jobs = scaled_jobs(jobs, args.scale)
+        print(f"Running {name}: {len(jobs)} jobs, {sum(d for d, _ in jobs)} documents...", file=sys.stderr)
+        runner = run_api_scenario if kind == "api" else run_lifecycle_scenario
+        scenarios[name] = run_isolated(runner, jobs, args.llm_latency, args.seed, args.log_level)
+
+    config = {"llm_latency": args.llm_latency, "scale": args.scale, "seed": args.seed}
+    return finish("pipeline", args, config, scenarios)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,8 @@
 import os
+import json
 import logging
 from dotenv import load_dotenv
-from typing import List
+from typing import Any, Dict, List
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -15,15 +16,149 @@ class Settings:
             "http://localhost:3000", "http://127.0.0.1:3000",
             "https://health-policy-mapper.lovable.app"
         ]
+        # LLM backend: "gemini", or "fake" for offline load tests and benchmarks (no API key needed)
+        self.LLM_PROVIDER: str = "gemini"
         self.GOOGLE_API_KEY: str | None = None
         self.MODEL_NAME: str = "gemini-2.5-flash-lite"
+        # Fake backend: deterministic log-normal latency and injected failure rates
+        self.FAKE_LLM_SEED: int = 0
+        self.FAKE_LLM_LATENCY: float = 1.0
+        self.FAKE_LLM_LATENCY_SIGMA: float = 0.5
+        self.FAKE_LLM_ERROR_RATE: float = 0.0
+        self.FAKE_LLM_THROTTLE_RATE: float = 0.0
+        # Constrain LLM output to a JSON schema built from the job columns
+        self.LLM_STRUCTURED_OUTPUT: bool = True
+
+        # Deadline of one LLM request in seconds (0 = none)
+        self.LLM_REQUEST_TIMEOUT: float = 300.0
+        # Hedged requests (opt-in): duplicate a request still unanswered after this latency percentile
+        # (0 = off), with at most LLM_HEDGE_BUDGET hedges per request sent
+        self.LLM_HEDGE_PERCENTILE: float = 0.0
+        self.LLM_HEDGE_BUDGET: float = 0.1
+
+        # Circuit breaker: after this many consecutive transient LLM failures (0 = off), hold requests
+        # and probe the backend every LLM_BREAKER_OPEN_SECONDS (doubling up to the max) until it recovers;
+        # LLM_BREAKER_MAX_WAIT > 0 fails held requests after that many seconds instead
+        self.LLM_BREAKER_FAILURES: int = 5
+        self.LLM_BREAKER_OPEN_SECONDS: float = 30.0
+        self.LLM_BREAKER_MAX_OPEN_SECONDS: float = 300.0
+        self.LLM_BREAKER_MAX_WAIT: float = 0.0
+
+        # Automatic per-document retries (by error class) with exponential backoff and jitter
+        self.LLM_MAX_TRANSIENT_RETRIES: int = 4
+        self.LLM_MAX_PARSE_RETRIES: int = 2
+        self.LLM_RETRY_BASE_DELAY: float = 1.0
+        self.LLM_RETRY_MAX_DELAY: float = 30.0
+
+        # Model prices per million tokens, for the per-document and per-job cost (default: MODEL_NAME list price, USD)
+        self.LLM_INPUT_PRICE_PER_MTOK: float = 0.10
+        self.LLM_OUTPUT_PRICE_PER_MTOK: float = 0.40
+
+        # Model cascade: re-ask unparseable documents and uncertain fields to this stronger model ("" = off),
+        # priced per million tokens (default: gemini-2.5-pro list price, USD)
+        self.LLM_ESCALATION_MODEL: str = ""
+        self.LLM_ESCALATION_INPUT_PRICE_PER_MTOK: float = 1.25
+        self.LLM_ESCALATION_OUTPUT_PRICE_PER_MTOK: float = 10.0
+
+        # Client pool: models jobs can name, each with its own quota, as a JSON list of
+        # {"model", "max_concurrency", "requests_per_minute" (0 = unlimited), "input_price", "output_price"};
+        # MODEL_NAME is always in the pool, with the LLM_MAX_CONCURRENCY/LLM_REQUESTS_PER_MINUTE/LLM_*_PRICE_PER_MTOK defaults
+        self.LLM_MODELS: List[Dict[str, Any]] = []
+        self.LLM_MAX_CONCURRENCY: int = 16
+        self.LLM_REQUESTS_PER_MINUTE: float = 0.0
+
+        # CPU-bound work (evaluation, aggregation) runs on a process pool
+        self.CPU_WORKERS: int = min(4, os.cpu_count() or 1)
+        self.CPU_MAX_CONCURRENCY: int = self.CPU_WORKERS
+        self.CPU_MAX_QUEUE: int = 16
+
+        # Upload limits of a job's documents, in MB (per file and per job)
+        self.UPLOAD_MAX_FILE_MB: int = 100
+        self.UPLOAD_MAX_TOTAL_MB: int = 1024
+
+        # Shared store of uploaded documents, deduplicated by content across jobs ("" = next to the job directories)
+        self.BLOB_STORE_ENABLED: bool = True
+        self.BLOB_STORE_DIR: str = ""
+
+        # Evaluation output directories kept per context (0 = keep all)
+        self.EVAL_MAX_OUTPUT_DIRS: int = 0
 
     def load_env(self):
         load_dotenv()
+        self.LLM_PROVIDER = os.getenv("LLM_PROVIDER", self.LLM_PROVIDER).strip().lower()
+        if self.LLM_PROVIDER not in ("gemini", "fake"):
+            raise RuntimeError(f"Unsupported LLM_PROVIDER: {self.LLM_PROVIDER}. Supported: gemini, fake")
+
         self.GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-        if not self.GOOGLE_API_KEY:
+        if self.LLM_PROVIDER == "gemini" and not self.GOOGLE_API_KEY:
             raise RuntimeError("Missing GOOGLE_API_KEY")
 
+        self.FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", self.FAKE_LLM_SEED))
+        self.FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", self.FAKE_LLM_LATENCY))
+        self.FAKE_LLM_LATENCY_SIGMA = float(os.getenv("FAKE_LLM_LATENCY_SIGMA", self.FAKE_LLM_LATENCY_SIGMA))
+        self.FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", self.FAKE_LLM_ERROR_RATE))
+        self.FAKE_LLM_THROTTLE_RATE = float(os.getenv("FAKE_LLM_THROTTLE_RATE", self.FAKE_LLM_THROTTLE_RATE))
+
+        self.LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "true").strip().lower() not in ("0", "false", "no")
+
+        self.LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", self.LLM_REQUEST_TIMEOUT))
+        self.LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", self.LLM_HEDGE_PERCENTILE))
+        self.LLM_HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", self.LLM_HEDGE_BUDGET))
+        self.LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", self.LLM_BREAKER_FAILURES))
+        self.LLM_BREAKER_OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", self.LLM_BREAKER_OPEN_SECONDS))
+        self.LLM_BREAKER_MAX_OPEN_SECONDS = float(os.getenv("LLM_BREAKER_MAX_OPEN_SECONDS", self.LLM_BREAKER_MAX_OPEN_SECONDS))
+        self.LLM_BREAKER_MAX_WAIT = float(os.getenv("LLM_BREAKER_MAX_WAIT", self.LLM_BREAKER_MAX_WAIT))
+        self.LLM_MAX_TRANSIENT_RETRIES = int(os.getenv("LLM_MAX_TRANSIENT_RETRIES", self.LLM_MAX_TRANSIENT_RETRIES))
+        self.LLM_MAX_PARSE_RETRIES = int(os.getenv("LLM_MAX_PARSE_RETRIES", self.LLM_MAX_PARSE_RETRIES))
+        self.LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", self.LLM_RETRY_BASE_DELAY))
+        self.LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", self.LLM_RETRY_MAX_DELAY))
+        self.LLM_INPUT_PRICE_PER_MTOK = float(os.getenv("LLM_INPUT_PRICE_PER_MTOK", self.LLM_INPUT_PRICE_PER_MTOK))
+        self.LLM_OUTPUT_PRICE_PER_MTOK = float(os.getenv("LLM_OUTPUT_PRICE_PER_MTOK", self.LLM_OUTPUT_PRICE_PER_MTOK))
+        self.LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", self.LLM_MAX_CONCURRENCY))
+        self.LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", self.LLM_REQUESTS_PER_MINUTE))
+        self.LLM_MODELS = self._parse_models(os.getenv("LLM_MODELS", ""))
+        self.LLM_ESCALATION_MODEL = os.getenv("LLM_ESCALATION_MODEL", self.LLM_ESCALATION_MODEL).strip()
+        self.LLM_ESCALATION_INPUT_PRICE_PER_MTOK = float(
+            os.getenv("LLM_ESCALATION_INPUT_PRICE_PER_MTOK", self.LLM_ESCALATION_INPUT_PRICE_PER_MTOK))
+        self.LLM_ESCALATION_OUTPUT_PRICE_PER_MTOK = float(
+            os.getenv("LLM_ESCALATION_OUTPUT_PRICE_PER_MTOK", self.LLM_ESCALATION_OUTPUT_PRICE_PER_MTOK))
+
+        self.CPU_WORKERS = int(os.getenv("CPU_WORKERS", self.CPU_WORKERS))
+        self.CPU_MAX_CONCURRENCY = int(os.getenv("CPU_MAX_CONCURRENCY", self.CPU_WORKERS))
+        self.CPU_MAX_QUEUE = int(os.getenv("CPU_MAX_QUEUE", self.CPU_MAX_QUEUE))
+        self.EVAL_MAX_OUTPUT_DIRS = int(os.getenv("EVAL_MAX_OUTPUT_DIRS", self.EVAL_MAX_OUTPUT_DIRS))
+        self.UPLOAD_MAX_FILE_MB = int(os.getenv("UPLOAD_MAX_FILE_MB", self.UPLOAD_MAX_FILE_MB))
+        self.UPLOAD_MAX_TOTAL_MB = int(os.getenv("UPLOAD_MAX_TOTAL_MB", self.UPLOAD_MAX_TOTAL_MB))
+        self.BLOB_STORE_ENABLED = os.getenv("BLOB_STORE_ENABLED", "true").strip().lower() not in ("0", "false", "no")
+        self.BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", self.BLOB_STORE_DIR).strip()
+
+    def _parse_models(self, raw: str) -> List[Dict[str, Any]]:
+        """
+        Pool entries from LLM_MODELS, defaults filled in, with MODEL_NAME first unless listed.
+        """
+        defaults = {
+            "max_concurrency": self.LLM_MAX_CONCURRENCY,
+            "requests_per_minute": self.LLM_REQUESTS_PER_MINUTE,
+            "input_price": self.LLM_INPUT_PRICE_PER_MTOK,
+            "output_price": self.LLM_OUTPUT_PRICE_PER_MTOK,
+        }
+        try:
+            entries = json.loads(raw) if raw.strip() else []
+        except json.JSONDecodeError as e:
+            raise RuntimeError(f"Invalid LLM_MODELS (expected a JSON list): {e}")
+        if not isinstance(entries, list) or not all(isinstance(entry, dict) and entry.get("model") for entry in entries):
+            raise RuntimeError("Invalid LLM_MODELS: expected a JSON list of objects with a 'model' name")
+
+        models = []
+        for entry in entries:
+            unknown = set(entry) - set(defaults) - {"model"}
+            if unknown:
+                raise RuntimeError(f"Invalid LLM_MODELS entry for {entry['model']}: unknown keys {sorted(unknown)}")
+            models.append({**defaults, **entry})
+        if self.MODEL_NAME not in [entry["model"] for entry in models]:
+            models.insert(0, {"model": self.MODEL_NAME, **defaults})
+        return models
+
     def configure_logging(self):
         logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
         logging.getLogger("httpcore.http11").setLevel(logging.WARNING)
@@ -1,6 +1,8 @@
 from uuid import UUID, uuid4
 from typing import List, Optional, Any, Dict
 from domain.value_objects.column import Column
+from domain.value_objects.llm_usage import LLMUsage, UsageBudget
+from domain.value_objects.result_artifact import ResultArtifact, ResultFormat
 
 import pandas as pd
 
@@ -11,6 +13,7 @@ class JobStatus:
     FAILED = "failed"
     DONE = "done"
     DONE_WITH_ERRORS = "done_with_errors"
+    PAUSED = "paused"  # dispatch stopped because the usage budget was exceeded; resumable
 
 class Job:
     """
@@ -23,6 +26,9 @@ class Job:
         context: str,
         columns: List[Column],
         job_id: Optional[UUID] = None,
+        budget: Optional[UsageBudget] = None,
+        models: Optional[List[str]] = None,
+        file_hashes: Optional[Dict[str, str]] = None,
     ):
         self.id = job_id or uuid4()
         self.files = files
@@ -34,6 +40,15 @@ class Job:
         self.total_files = len(files)
         self.files_processed = 0
         self.error_count = 0
+        self.artifacts: Dict[str, ResultArtifact] = {}
+        self.aggregated_result: Optional[pd.DataFrame] = None
+        self.rows_revision = 0  # Bumped whenever the result rows are replaced (not when rows are appended)
+        self.budget = budget
+        self.models = models  # Models the documents may be sent to (None = the default model)
+        self.file_hashes: Dict[str, str] = file_hashes or {}  # SHA-256 of each file, by file name
+        self.usage = LLMUsage()
+        self.cost = 0.0
+        self.llm_seconds = 0.0
 
     def start(self) -> None:
         """
@@ -51,6 +66,53 @@ class Job:
         if error_count is not None:
             self.error_count = error_count
 
+    def add_usage(self, usage: LLMUsage, cost: float, seconds: float) -> None:
+        """
+        Account the tokens, cost and LLM time spent on one document.
+        """
+        self.usage = self.usage + usage
+        self.cost += cost
+        self.llm_seconds += seconds
+
+    def budget_exceeded(self) -> Optional[str]:
+        """
+        Description of the exceeded budget limit, or None while within budget (or without budget).
+        """
+        if self.budget is None:
+            return None
+        return self.budget.exceeded_by(self.usage, self.cost)
+
+    def pause(self, message: str) -> None:
+        """
+        Stop dispatching documents (budget exceeded); the job can be resumed later.
+        """
+        if self.status != JobStatus.RUNNING:
+            raise ValueError("Job can only be paused if it is running.")
+        self.status = JobStatus.PAUSED
+        self.error_message = message
+
+    def resume(self, budget: Optional[UsageBudget] = None) -> None:
+        """
+        Resume a paused job, optionally with a new budget.
+        """
+        if self.status != JobStatus.PAUSED:
+            raise ValueError("Job can only be resumed if it is paused.")
+        if budget is not None:
+            self.budget = budget
+        self.status = JobStatus.RUNNING
+        self.error_message = None
+
+    def usage_dict(self) -> Dict[str, Any]:
+        """
+        Usage accounted so far and the budget, as returned in the job status.
+        """
+        return {
+            **self.usage.to_dict(),
+            "cost": round(self.cost, 6),
+            "llm_seconds": round(self.llm_seconds, 3),
+            "budget": self.budget.to_dict() if self.budget else None,
+        }
+
     def complete(self, result: pd.DataFrame) -> None:
         """
         Mark the job as completed with the result.
@@ -64,6 +126,7 @@ class Job:
         else:
             self.status = JobStatus.DONE
         self.result = result
+        self.invalidate_artifacts()
 
     def complete_with_errors(self, result: pd.DataFrame) -> None:
         """
@@ -73,6 +136,7 @@ class Job:
             raise ValueError("Job can only be completed if it is running.")
         self.status = JobStatus.DONE_WITH_ERRORS
         self.result = result
+        self.invalidate_artifacts()
 
     def _has_errors(self, result: pd.DataFrame) -> bool:
         """
@@ -108,6 +172,30 @@ class Job:
             raise ValueError("Job can only be restarted if it has done_with_errors status.")
         self.status = JobStatus.RUNNING
         self.files_processed = new_files_processed
+        self.rows_revision += 1
+        self.invalidate_artifacts()
+
+    def get_artifact(self, kind: str, format: str = ResultFormat.CSV) -> Optional[ResultArtifact]:
+        """
+        Return the materialized artifact of the given kind and format, if still valid.
+        """
+        artifact = self.artifacts.get(f"{kind}.{format}")
+        if artifact is None or not artifact.path.exists():
+            return None
+        return artifact
+
+    def set_artifact(self, artifact: ResultArtifact) -> None:
+        """
+        Store a materialized artifact for the job.
+        """
+        self.artifacts[artifact.key] = artifact
+
+    def invalidate_artifacts(self) -> None:
+        """
+        Drop all materialized artifacts; called whenever the raw rows change.
+        """
+        self.artifacts = {}
+        self.aggregated_result = None
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -123,5 +211,9 @@ class Job:
             "files_processed": self.files_processed,
             "error_count": self.error_count,
             "result": self.result.to_dict() if isinstance(self.result, pd.DataFrame) else self.result,
-            "error_message": self.error_message
+            "error_message": self.error_message,
+            "usage": self.usage_dict(),
+            "models": self.models,
+            "file_hashes": self.file_hashes,
+            "artifacts": {key: artifact.to_dict() for key, artifact in self.artifacts.items()}
         }
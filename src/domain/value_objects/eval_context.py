@@ -0,0 +1,50 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Tuple
+
+
+@dataclass(frozen=True)
+class EvalContextConfig:
+    """
+    Value Object describing an evaluation context: which reference dataset to compare against,
+    the key column rows are matched on, and the yes/no columns that are compared.
+    """
+
+    name: str = field()
+    reference_file: str = field()
+    key_column: str = field()
+    columns_to_compare: Tuple[str, ...] = field()
+    description: str = field(default="")
+
+    def __post_init__(self):
+        if not self.name or not self.reference_file or not self.key_column:
+            raise ValueError("Evaluation context needs a name, a reference_file and a key_column.")
+        if not self.columns_to_compare:
+            raise ValueError(f"Evaluation context {self.name} has no columns_to_compare.")
+        object.__setattr__(self, 'columns_to_compare', tuple(self.columns_to_compare))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], default_name: str = "") -> "EvalContextConfig":
+        """
+        Build a context from its JSON config; the name defaults to the config file name.
+
+        :raises ValueError: if a required field is missing or invalid
+        """
+        try:
+            return cls(
+                name=data.get("name") or default_name,
+                reference_file=data["reference_file"],
+                key_column=data["key_column"],
+                columns_to_compare=tuple(data["columns_to_compare"]),
+                description=data.get("description", ""),
+            )
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid evaluation context config {default_name}: missing or invalid {e}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "reference_file": self.reference_file,
+            "key_column": self.key_column,
+            "columns_to_compare": list(self.columns_to_compare),
+        }
@@ -0,0 +1,75 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+# Accounting columns of the raw rows (not extracted fields: ignored by aggregation and evaluation)
+INPUT_TOKENS_COLUMN = "llm_input_tokens"
+OUTPUT_TOKENS_COLUMN = "llm_output_tokens"
+COST_COLUMN = "llm_cost"
+LATENCY_COLUMN = "llm_latency_ms"
+ESCALATED_COLUMN = "llm_escalated"  # fields re-asked to the escalation model (';'-separated), model cascade only
+MODEL_COLUMN = "llm_model"  # model the document was sent to
+USAGE_COLUMNS = [INPUT_TOKENS_COLUMN, OUTPUT_TOKENS_COLUMN, COST_COLUMN, LATENCY_COLUMN, ESCALATED_COLUMN, MODEL_COLUMN]
+
+
+@dataclass(frozen=True)
+class LLMUsage:
+    """
+    Value Object with the tokens billed for one or more LLM requests.
+    """
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    def __add__(self, other: "LLMUsage") -> "LLMUsage":
+        return LLMUsage(self.input_tokens + other.input_tokens, self.output_tokens + other.output_tokens)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "total_tokens": self.total_tokens,
+        }
+
+
+@dataclass(frozen=True)
+class TokenPricing:
+    """
+    Value Object with the price of a model, in currency units per million tokens.
+    """
+
+    input_per_million: float = 0.0
+    output_per_million: float = 0.0
+
+    def cost(self, usage: LLMUsage) -> float:
+        return (usage.input_tokens * self.input_per_million + usage.output_tokens * self.output_per_million) / 1_000_000
+
+
+@dataclass(frozen=True)
+class UsageBudget:
+    """
+    Value Object with the token and/or cost limits of a job (None = unlimited).
+    """
+
+    max_tokens: Optional[int] = None
+    max_cost: Optional[float] = None
+
+    def __post_init__(self):
+        if self.max_tokens is not None and self.max_tokens <= 0:
+            raise ValueError("Token budget must be positive.")
+        if self.max_cost is not None and self.max_cost <= 0:
+            raise ValueError("Cost budget must be positive.")
+
+    def exceeded_by(self, usage: LLMUsage, cost: float) -> Optional[str]:
+        """Description of the exceeded limit, or None while within budget."""
+        if self.max_tokens is not None and usage.total_tokens >= self.max_tokens:
+            return f"token budget exceeded ({usage.total_tokens} of {self.max_tokens} tokens)"
+        if self.max_cost is not None and cost >= self.max_cost:
+            return f"cost budget exceeded ({cost:.4f} of {self.max_cost:.4f})"
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"max_tokens": self.max_tokens, "max_cost": self.max_cost}
@@ -0,0 +1,64 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any
+
+
+class ArtifactKind:
+    RESULT = "result"
+    AGGREGATED = "aggregated"
+
+
+class ResultFormat:
+    CSV = "csv"
+    CSV_GZIP = "csv.gz"
+    CSV_ZSTD = "csv.zst"
+    PARQUET = "parquet"
+    NDJSON = "ndjson"
+
+    ALL = [CSV, CSV_GZIP, CSV_ZSTD, PARQUET, NDJSON]
+
+    MEDIA_TYPES = {
+        CSV: "text/csv",
+        CSV_GZIP: "application/gzip",
+        CSV_ZSTD: "application/zstd",
+        PARQUET: "application/vnd.apache.parquet",
+        NDJSON: "application/x-ndjson",
+    }
+
+
+@dataclass(frozen=True)
+class ResultArtifact:
+    """
+    Value Object representing a materialized job result file.
+
+    The 'version' identifies the raw rows the file was built from (row count + content hash),
+    so it doubles as the HTTP ETag for downloads.
+    """
+
+    kind: str = field()
+    path: Path = field()
+    version: str = field()
+    row_count: int = field(default=0)
+    format: str = field(default=ResultFormat.CSV)
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}.{self.format}"
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.kind}-{self.format}-{self.version}"'
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the ResultArtifact object to a dictionary.
+
+        :return: Dictionary representation of the ResultArtifact.
+        """
+        return {
+            "kind": self.kind,
+            "path": str(self.path),
+            "version": self.version,
+            "row_count": self.row_count,
+            "format": self.format
+        }
@@ -0,0 +1,54 @@
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from application.interfaces.llm_client import BaseLLMClient
+from application.utils.circuit_breaker import CircuitBreaker
+from application.utils.retry_policy import ErrorClass, classify_error
+from domain.value_objects.column import Column
+
+
+class CircuitBreakerLLMClient(BaseLLMClient):
+    """
+    Wraps a client with a CircuitBreaker: during a backend outage requests are held (document dispatch
+    pauses) instead of each failing after a full attempt, and resume once a trial call succeeds.
+    Only transient errors count as failures; parse and permanent errors mean the backend answered.
+    """
+
+    def __init__(self, inner: BaseLLMClient, breaker: Optional[CircuitBreaker] = None, max_wait: Optional[float] = None):
+        """
+        :param inner: The client to protect.
+        :param breaker: The breaker (default: opens after 5 consecutive transient failures).
+        :param max_wait: Fail fast with a transient error after holding a request this many seconds (None = hold until recovery).
+        """
+        super().__init__(inner.api_key, inner.model_name)
+        self.inner = inner
+        self.breaker = breaker or CircuitBreaker()
+        self.max_wait = max_wait
+
+    def load(self) -> float:
+        return self.inner.load()
+
+    def capacity(self) -> Optional[int]:
+        return self.inner.capacity()
+
+    async def process(
+        self,
+        document_path: Path,
+        prompt: str,
+        columns: Optional[List[Column]] = None,
+    ) -> List[Dict[str, Any]]:
+        await self.breaker.acquire(self.max_wait)
+        try:
+            result = await self.inner.process(document_path=document_path, prompt=prompt, columns=columns)
+        except asyncio.CancelledError:
+            self.breaker.record_abandoned()
+            raise
+        except Exception as e:
+            if classify_error(e) == ErrorClass.TRANSIENT:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return result
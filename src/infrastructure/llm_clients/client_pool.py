@@ -0,0 +1,125 @@
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from application.interfaces.llm_client import BaseLLMClient, BaseLLMClientPool
+from application.utils.hedging import LatencyTracker
+from application.utils.metrics import LLM_MODEL_IN_FLIGHT, LLM_MODEL_WAITING, LLM_ROUTED_DOCUMENTS
+from application.utils.rate_limiter import RateLimiter
+from domain.value_objects.column import Column
+
+
+class LimitedLLMClient(BaseLLMClient):
+    """
+    Wraps a client with the quota of its model: at most 'max_concurrency' requests in flight and,
+    with a rate limiter, at most its requests per minute. Excess requests wait for a slot.
+    It wraps the provider client directly (under hedging), so every request sent, hedges included,
+    takes a slot and a rate limiter token.
+    """
+
+    def __init__(
+        self,
+        inner: BaseLLMClient,
+        max_concurrency: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        latency_tracker: Optional[LatencyTracker] = None,
+    ):
+        """
+        :param inner: The client of one model.
+        :param max_concurrency: Requests allowed in flight at once.
+        :param rate_limiter: Optional request rate limit of the model.
+        :param latency_tracker: Optional window recording the latency of the provider calls, excluding the
+            wait for a slot (the hedging delay is based on it).
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        super().__init__(inner.api_key, inner.model_name)
+        self.inner = inner
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter
+        self.latency_tracker = latency_tracker
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+
+    def load(self) -> float:
+        """Requests in flight or waiting, relative to the concurrency limit (>= 1: no free slot)."""
+        return (self.in_flight + self.waiting) / self.max_concurrency
+
+    def capacity(self) -> Optional[int]:
+        return self.max_concurrency
+
+    async def process(
+        self,
+        document_path: Path,
+        prompt: str,
+        columns: Optional[List[Column]] = None,
+    ) -> List[Dict[str, Any]]:
+        self.waiting += 1
+        try:
+            with LLM_MODEL_WAITING.labels(self.model_name).track_in_progress():
+                await self._slots.acquire()
+                try:
+                    if self.rate_limiter is not None:
+                        await self.rate_limiter.acquire()
+                except BaseException:
+                    self._slots.release()
+                    raise
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            with LLM_MODEL_IN_FLIGHT.labels(self.model_name).track_in_progress():
+                start = time.perf_counter()
+                result = await self.inner.process(document_path=document_path, prompt=prompt, columns=columns)
+                if self.latency_tracker is not None:
+                    self.latency_tracker.record(time.perf_counter() - start)
+                return result
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+
+class LLMClientPool(BaseLLMClientPool):
+    """
+    Clients of several models, each limited to its own quota. A job allowing several models has each
+    document routed to the least loaded of them, so concurrent jobs use the capacity of every model.
+    """
+
+    def __init__(self, clients: List[BaseLLMClient]):
+        """
+        :param clients: One client per model; their load() (from a LimitedLLMClient in the chain) drives the routing.
+        """
+        if not clients:
+            raise ValueError("The client pool needs at least one client.")
+        self._clients: Dict[str, BaseLLMClient] = {}
+        for client in clients:
+            if client.model_name in self._clients:
+                raise ValueError(f"Model {client.model_name} is configured twice.")
+            self._clients[client.model_name] = client
+
+    def models(self) -> List[str]:
+        return list(self._clients)
+
+    def get(self, model: str) -> BaseLLMClient:
+        try:
+            return self._clients[model]
+        except KeyError:
+            raise ValueError(f"Unknown model: {model}. Available: {', '.join(self._clients)}")
+
+    def select(self, models: List[str]) -> BaseLLMClient:
+        candidates = [self.get(model) for model in models]
+        if not candidates:
+            raise ValueError("No model to select from.")
+        # min() keeps the first of equally loaded models: the job's order is its preference
+        client = min(candidates, key=lambda c: c.load())
+        LLM_ROUTED_DOCUMENTS.labels(client.model_name).inc()
+        return client
+
+    def capacity(self, models: List[str]) -> Optional[int]:
+        capacities = [self.get(model).capacity() for model in models]
+        if not capacities or None in capacities:
+            return None
+        return sum(capacities)
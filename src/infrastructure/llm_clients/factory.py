@@ -0,0 +1,92 @@
+from typing import Optional
+
+from application.interfaces.llm_client import BaseLLMClient
+from application.utils.circuit_breaker import CircuitBreaker
+from application.utils.hedging import HedgeBudget, LatencyTracker
+from application.utils.rate_limiter import RateLimiter
+from application.utils.retry_policy import ErrorClass, RetryPolicy
+from config import Settings
+from infrastructure.llm_clients.breaker_client import CircuitBreakerLLMClient
+from infrastructure.llm_clients.client_pool import LimitedLLMClient
+from infrastructure.llm_clients.fake_client import FakeLLMClient
+from infrastructure.llm_clients.gemini_client import GeminiClient
+from infrastructure.llm_clients.hedged_client import HedgedLLMClient
+
+
+def build_llm_client(
+    settings: Settings,
+    model_name: str,
+    max_concurrency: Optional[int] = None,
+    requests_per_minute: float = 0,
+    hedge: bool = True,
+    fake_seed: Optional[int] = None,
+) -> BaseLLMClient:
+    """
+    Client of one model for the configured provider, with hedging (opt-in) and circuit breaker as configured.
+
+    :param max_concurrency: Quota of the model (None = unlimited); applied under the hedging, so hedges count against it.
+    :param requests_per_minute: Request rate quota of the model (0 = none).
+    :param hedge: Whether to hedge slow requests (when enabled in the settings).
+    :param fake_seed: Seed of the fake client (default: FAKE_LLM_SEED).
+    """
+    client: BaseLLMClient
+    if settings.LLM_PROVIDER == "fake":
+        client = FakeLLMClient(
+            model_name=model_name,
+            seed=settings.FAKE_LLM_SEED if fake_seed is None else fake_seed,
+            latency_median=settings.FAKE_LLM_LATENCY,
+            latency_sigma=settings.FAKE_LLM_LATENCY_SIGMA,
+            error_rate=settings.FAKE_LLM_ERROR_RATE,
+            throttle_rate=settings.FAKE_LLM_THROTTLE_RATE,
+        )
+    else:
+        client = GeminiClient(
+            api_key=settings.GOOGLE_API_KEY,
+            model_name=model_name,
+            structured_output=settings.LLM_STRUCTURED_OUTPUT,
+            request_timeout=settings.LLM_REQUEST_TIMEOUT or None,
+        )
+    hedge = hedge and settings.LLM_HEDGE_PERCENTILE > 0
+    # with a quota, the hedging delay comes from the provider calls, timed inside the limiter
+    tracker = LatencyTracker() if hedge else None
+    limited = max_concurrency is not None or requests_per_minute > 0
+    if limited:
+        client = LimitedLLMClient(
+            client,
+            max_concurrency=max_concurrency or settings.LLM_MAX_CONCURRENCY,
+            rate_limiter=RateLimiter(requests_per_minute) if requests_per_minute > 0 else None,
+            latency_tracker=tracker,
+        )
+    if hedge:
+        client = HedgedLLMClient(
+            client,
+            percentile=settings.LLM_HEDGE_PERCENTILE,
+            budget=HedgeBudget(ratio=settings.LLM_HEDGE_BUDGET),
+            tracker=tracker,
+            track_latency=not limited,
+        )
+    if settings.LLM_BREAKER_FAILURES > 0:
+        client = CircuitBreakerLLMClient(
+            client,
+            breaker=CircuitBreaker(
+                failure_threshold=settings.LLM_BREAKER_FAILURES,
+                open_seconds=settings.LLM_BREAKER_OPEN_SECONDS,
+                max_open_seconds=settings.LLM_BREAKER_MAX_OPEN_SECONDS,
+            ),
+            max_wait=settings.LLM_BREAKER_MAX_WAIT or None,
+        )
+    return client
+
+
+def build_retry_policy(settings: Settings) -> RetryPolicy:
+    """
+    Per-document retry budgets and backoff from the settings.
+    """
+    return RetryPolicy(
+        max_retries={
+            ErrorClass.TRANSIENT: settings.LLM_MAX_TRANSIENT_RETRIES,
+            ErrorClass.PARSE: settings.LLM_MAX_PARSE_RETRIES,
+        },
+        base_delay=settings.LLM_RETRY_BASE_DELAY,
+        max_delay=settings.LLM_RETRY_MAX_DELAY,
+    )
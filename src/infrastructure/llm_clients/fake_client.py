@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from application.interfaces.llm_client import USAGE_KEY, BaseLLMClient, LLMPermanentError, LLMTransientError
+from application.utils.metrics import LLM_GENERATE_SECONDS, LLM_PARSE_SECONDS
+from application.utils.response_schema import parse_structured_response
+from domain.value_objects.column import Column
+from domain.value_objects.llm_usage import LLMUsage
+
+logger = logging.getLogger(__name__)
+
+COUNTRIES = [
+    ("Albania", "ALB"), ("Argentina", "ARG"), ("Australia", "AUS"), ("Austria", "AUT"),
+    ("Belgium", "BEL"), ("Brazil", "BRA"), ("Canada", "CAN"), ("Chile", "CHL"),
+    ("Germany", "DEU"), ("Spain", "ESP"), ("France", "FRA"), ("India", "IND"),
+    ("Italy", "ITA"), ("Japan", "JPN"), ("Kenya", "KEN"), ("Mexico", "MEX"),
+    ("Nigeria", "NGA"), ("Portugal", "PRT"), ("South Africa", "ZAF"), ("Thailand", "THA"),
+]
+
+
+class FakeLLMClient(BaseLLMClient):
+    """
+    Local stand-in for an LLM backend, for load tests and benchmarks without API calls.
+
+    Everything is deterministic given the seed: a document always gets the same answer, and the n-th
+    attempt on a document always gets the same latency and outcome, whatever the order or concurrency of
+    the calls. Attempts are counted per request (document path, which includes the job directory, and
+    prompt), so jobs do not affect each other; a hedged duplicate sent while an attempt is in flight
+    is the same attempt. A request's count is dropped once it reaches a terminal outcome (answer, permanent
+    error, cancellation); requests abandoned after throttling are evicted oldest first beyond
+    max_tracked_requests. Latencies follow a log-normal distribution; a share of attempts is throttled (transient
+    error) or rejected (permanent error). Answers are built from the requested columns and go through the
+    same structured-response parsing as a real client.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "fake",
+        seed: int = 0,
+        latency_median: float = 1.0,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        max_tracked_requests: int = 10000,
+    ):
+        """
+        :param seed: Seed of every random choice.
+        :param latency_median: Median request latency in seconds (0 = answer immediately).
+        :param latency_sigma: Sigma of the log-normal latency distribution (tail heaviness).
+        :param error_rate: Share of attempts failing with a permanent error.
+        :param throttle_rate: Share of attempts failing with a transient (rate limit) error.
+        :param max_tracked_requests: Throttled requests whose attempt count is kept for their retries.
+        """
+        super().__init__("fake", model_name)
+        self.seed = seed
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.document_tokens = 2000
+        self.max_tracked_requests = max_tracked_requests
+        # finished attempts of the requests being retried, least recently throttled first
+        self._attempts: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+
+    async def process(
+        self,
+        document_path: Path,
+        prompt: str,
+        columns: Optional[List[Column]] = None,
+    ) -> List[Dict[str, Any]]:
+        key = document_path.name
+        request = (str(document_path), hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+        attempt = self._attempts.get(request, 0)
+
+        retried = False
+        try:
+            rng = random.Random(f"{self.seed}:{key}:{attempt}")
+            latency = self.latency_median * rng.lognormvariate(0, self.latency_sigma) if self.latency_median > 0 else 0.0
+            outcome = rng.random()
+            with LLM_GENERATE_SECONDS.labels(self.model_name).time():
+                await asyncio.sleep(latency)
+
+            if outcome < self.throttle_rate:
+                # Counted once the attempt finished, so concurrent duplicates of it (hedges) do not advance it
+                self._attempts[request] = max(self._attempts.get(request, 0), attempt + 1)
+                self._attempts.move_to_end(request)
+                retried = True
+                raise LLMTransientError(f"Fake LLM throttled {key} (attempt {attempt + 1})")
+            if outcome < self.throttle_rate + self.error_rate:
+                raise LLMPermanentError(f"Fake LLM rejected {key} (attempt {attempt + 1})")
+
+            columns = columns or [Column(name="country"), Column(name="country_alpha_3_code")]
+            answer = self._answer(key, columns)
+            with LLM_PARSE_SECONDS.time():
+                record = parse_structured_response(answer, columns)
+            # Rough token counts: ~4 characters per token, plus a fixed cost for the document pages
+            record[USAGE_KEY] = LLMUsage(input_tokens=len(prompt) // 4 + self.document_tokens, output_tokens=len(answer) // 4)
+            return [record]
+        finally:
+            if not retried:
+                self._attempts.pop(request, None)  # terminal outcome: nothing left to count
+            while len(self._attempts) > self.max_tracked_requests:
+                self._attempts.popitem(last=False)
+
+    def _answer(self, key: str, columns: List[Column]) -> str:
+        """JSON answer for a document, the same on every attempt."""
+        rng = random.Random(f"{self.seed}:{key}")
+        # One country per document, sometimes two, to exercise the aggregation's multi-country rows
+        countries = rng.sample(COUNTRIES, 2 if rng.random() < 0.1 else 1)
+        answer = {}
+        for col in columns:
+            if col.name == "country":
+                value = ", ".join(name for name, _ in countries)
+            elif col.name == "country_alpha_3_code":
+                value = ", ".join(code for _, code in countries)
+            else:
+                value = rng.choice(["Yes", "No", "Not specified"])
+            answer[col.name] = {
+                "value": value,
+                "justification": f"Page {rng.randint(1, 40)}, paragraph {rng.randint(1, 6)}",
+            }
+        return json.dumps(answer)
@@ -1,85 +1,153 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from google import genai
+from google.genai import errors as genai_errors
 from google.genai import types
+import httpx
 from pathlib import Path
 import json
 import re
 import logging
 import asyncio
 
-from application.interfaces.llm_client import BaseLLMClient
+from application.interfaces.llm_client import (
+    USAGE_KEY, BaseLLMClient, LLMParseError, LLMPermanentError, LLMTransientError
+)
+from application.utils.metrics import DOCUMENT_READ_SECONDS, LLM_GENERATE_SECONDS, LLM_PARSE_SECONDS
+from application.utils.response_schema import build_response_schema, parse_structured_response
+from domain.value_objects.column import Column
+from domain.value_objects.llm_usage import LLMUsage
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
 class GeminiClient(BaseLLMClient):
-    def __init__(self, api_key: str | None, model_name: str):
+    def __init__(
+        self,
+        api_key: str | None,
+        model_name: str,
+        structured_output: bool = True,
+        request_timeout: Optional[float] = None,
+    ):
         """
         Initialize the Gemini client with the provided API key.
 
         :param api_key: The API key for authenticating with the Gemini service.
+        :param structured_output: Request JSON constrained to a schema built from the columns
+            (parsed strictly) instead of free text parsed with fallbacks.
+        :param request_timeout: Deadline in seconds for one request (upload included); None waits indefinitely.
         """
         super().__init__(api_key, model_name)
         self._client = genai.Client(api_key=self.api_key)
         self._model = model_name
         self._seed = 44
+        self.structured_output = structured_output
+        self.request_timeout = request_timeout
 
     async def process(
         self,
         document_path: Path,
         prompt: str,
+        columns: Optional[List[Column]] = None,
     ) -> List[Dict[str, Any]]:
         """
-        Async wrapper: executes the blocking logic in a thread to avoid blocking the event loop.
+        Send the document to Gemini with the async API, so a request that misses its deadline
+        (or is cancelled, e.g. by a hedged duplicate winning) is actually aborted.
         """
-        return await asyncio.to_thread(self._send_gemini_request, document_path, prompt)
+        return await self._send_gemini_request(document_path, prompt, columns)
+
+    def _generation_config(self, columns: Optional[List[Column]]) -> types.GenerateContentConfig:
+        if self.structured_output and columns:
+            return types.GenerateContentConfig(
+                seed=self._seed,
+                response_mime_type="application/json",
+                response_json_schema=build_response_schema(columns),
+            )
+        return types.GenerateContentConfig(
+            seed=self._seed,
+        )
 
-    def _send_gemini_request(
+    async def _send_gemini_request(
         self,
         document_path: Path,
         prompt: str,
+        columns: Optional[List[Column]] = None,
     ) -> List[Dict[str, Any]]:
+        try:
+            response = await asyncio.wait_for(
+                self._generate(document_path, prompt, self._generation_config(columns)),
+                timeout=self.request_timeout,
+            )
+        except asyncio.TimeoutError as e:
+            raise LLMTransientError(f"Gemini request exceeded its {self.request_timeout}s deadline") from e
+        except genai_errors.APIError as e:
+            raise self._classify_api_error(e) from e
+        except httpx.TransportError as e:  # timeouts and connection failures
+            raise LLMTransientError(f"Gemini request failed: {e!r}") from e
+
+        raw_text = getattr(response, "text", "") or ""
+        logger.debug(f"*********Raw response text: {raw_text}")
+        usage = self._usage(response)
+
+        try:
+            with LLM_PARSE_SECONDS.time():
+                if self.structured_output and columns:
+                    record = parse_structured_response(raw_text, columns)
+                else:
+                    parsed = self._parse_response(raw_text)
+                    if not isinstance(parsed, dict):
+                        raise LLMParseError("Parsed response is not a JSON object.")
+                    record = self._normalize(parsed)
+        except LLMParseError as e:
+            e.usage = usage  # the unparseable answer was billed too
+            raise
+
+        record[USAGE_KEY] = usage
+        return [record]
+
+    @staticmethod
+    def _usage(response: Any) -> LLMUsage:
+        """Tokens billed for a response; thinking tokens are billed as output."""
+        metadata = getattr(response, "usage_metadata", None)
+        if metadata is None:
+            return LLMUsage()
+        output_tokens = (metadata.candidates_token_count or 0) + (getattr(metadata, "thoughts_token_count", None) or 0)
+        return LLMUsage(input_tokens=metadata.prompt_token_count or 0, output_tokens=output_tokens)
+
+    async def _generate(self, document_path: Path, prompt: str, config: types.GenerateContentConfig) -> Any:
         file_size = document_path.stat().st_size
 
         if file_size > 20 * 1024 * 1024:  # 20 MB limit
-            sample_file = self._client.files.upload(file=str(document_path))
-            response = self._client.models.generate_content(
-                model=self._model,
-                contents=[sample_file, prompt],
-                config=types.GenerateContentConfig(
-                    seed=self._seed,
-                )
-            )
+            with DOCUMENT_READ_SECONDS.time():
+                document = await self._client.aio.files.upload(file=str(document_path))
         else:
-            response = self._client.models.generate_content(
-                model=self._model,
-                contents=[
-                    types.Part.from_bytes(
-                        data=document_path.read_bytes(),
-                        mime_type="application/pdf"
-                    ),
-                    prompt,
-                ],
-                config=types.GenerateContentConfig(
-                    seed=self._seed,
-                )
+            with DOCUMENT_READ_SECONDS.time():
+                data = await asyncio.to_thread(document_path.read_bytes)
+            document = types.Part.from_bytes(
+                data=data,
+                mime_type="application/pdf"
             )
 
-        raw_text = getattr(response, "text", "")
-        logger.debug(f"*********Raw response text: {raw_text}")
-        parsed = self._parse_response(raw_text)
-
-        if not isinstance(parsed, dict):
-            raise ValueError("Parsed response is not a JSON object.")
+        with LLM_GENERATE_SECONDS.labels(self._model).time():
+            response = await self._client.aio.models.generate_content(
+                model=self._model,
+                contents=[document, prompt],
+                config=config
+            )
+        return response
 
-        normalized_record = self._normalize(parsed)
-        return [normalized_record]
+    @staticmethod
+    def _classify_api_error(error: genai_errors.APIError) -> Exception:
+        """Rate limits, timeouts and server errors are transient; other API errors (e.g. invalid PDF) are permanent."""
+        code = getattr(error, "code", None) or 0
+        if code in (408, 429) or code >= 500:
+            return LLMTransientError(f"Gemini API error {code}: {error}")
+        return LLMPermanentError(f"Gemini API error {code}: {error}")
 
 
     def _parse_response(self, text: str) -> Dict[str, Any]:
         """
         Try to load the response text as JSON. If that fails, extract a markdown
-        ```json ...``` block and parse that. Raises ValueError if no valid JSON found.
+        ```json ...``` block and parse that. Raises LLMParseError if no valid JSON found.
         """
         try:
             return json.loads(text)
@@ -87,11 +155,11 @@ class GeminiClient(BaseLLMClient):
             pattern = r'```(?:json)?\s*(\{.*?\})\s*```'
             match = re.search(pattern, text, re.DOTALL)
             if not match:
-                raise ValueError("Response does not contain valid JSON or a JSON markdown block.")
+                raise LLMParseError("Response does not contain valid JSON or a JSON markdown block.")
             try:
                 return json.loads(match.group(1))
             except json.JSONDecodeError as e:
-                raise ValueError(f"Failed to parse JSON from markdown block: {e}")
+                raise LLMParseError(f"Failed to parse JSON from markdown block: {e}")
 
     def _normalize(self, record: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -108,7 +176,7 @@ class GeminiClient(BaseLLMClient):
                 value = str(info) if info is not None else "Not specified"
                 just = ""
             else:
-                raise ValueError(f"Field '{field}' has unexpected structure: {info!r}")
+                raise LLMParseError(f"Field '{field}' has unexpected structure: {info!r}")
 
             normalized[field] = value or "Not specified"
             normalized[f"{field}_justification"] = just
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from application.interfaces.llm_client import BaseLLMClient
+from application.utils.hedging import HedgeBudget, LatencyTracker
+from domain.value_objects.column import Column
+
+logger = logging.getLogger(__name__)
+
+
+class HedgedLLMClient(BaseLLMClient):
+    """
+    Wraps a client to cut tail latency with hedged requests: when a request has not answered after the
+    configured percentile of recently observed latencies, an identical request is sent and whichever
+    answers first wins; the other is cancelled. Hedges are capped by a global HedgeBudget, and none is
+    sent while the wrapped client's quota has no free slot (it would only queue behind the primary).
+
+    Over a quota-limited client, the latencies must be those of the provider calls, not of the time
+    spent waiting for a slot: the LimitedLLMClient records them in the shared tracker, and this client
+    is built with track_latency=False.
+    """
+
+    def __init__(
+        self,
+        inner: BaseLLMClient,
+        percentile: float = 95.0,
+        budget: Optional[HedgeBudget] = None,
+        tracker: Optional[LatencyTracker] = None,
+        min_delay: float = 1.0,
+        track_latency: bool = True,
+    ):
+        """
+        :param inner: The client whose requests are hedged.
+        :param percentile: Latency percentile after which a hedge is sent.
+        :param budget: Global cap on hedges (default: 10% of requests).
+        :param tracker: Latency window (default: last 200 requests, hedging starts after 20).
+        :param min_delay: Never hedge earlier than this many seconds.
+        :param track_latency: Record each request's latency in the tracker (False when the wrapped client does).
+        """
+        super().__init__(inner.api_key, inner.model_name)
+        self.inner = inner
+        self.percentile = percentile
+        self.budget = budget or HedgeBudget()
+        self.tracker = tracker or LatencyTracker()
+        self.min_delay = min_delay
+        self.track_latency = track_latency
+        self.hedges_won = 0
+
+    async def process(
+        self,
+        document_path: Path,
+        prompt: str,
+        columns: Optional[List[Column]] = None,
+    ) -> List[Dict[str, Any]]:
+        self.budget.on_request()
+        primary = asyncio.create_task(self._timed(document_path, prompt, columns))
+        tasks = {primary}
+        try:
+            delay = self._hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self.inner.load() < 1 and self.budget.try_acquire():
+                    logger.debug(f"Hedging {document_path.name} after {delay:.1f}s")
+                    tasks.add(asyncio.create_task(self._timed(document_path, prompt, columns)))
+
+            # First successful answer wins; fail only when every request failed
+            first_error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedges_won += 1
+                        return task.result()
+                    if first_error is None or task is primary:
+                        first_error = task.exception()
+            raise first_error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def load(self) -> float:
+        return self.inner.load()
+
+    def capacity(self) -> Optional[int]:
+        return self.inner.capacity()
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while too few latencies were observed."""
+        if self.percentile <= 0:
+            return None
+        latency = self.tracker.percentile(self.percentile)
+        if latency is None:
+            return None
+        return max(self.min_delay, latency)
+
+    async def _timed(self, document_path: Path, prompt: str, columns: Optional[List[Column]]) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        result = await self.inner.process(document_path=document_path, prompt=prompt, columns=columns)
+        if self.track_latency:
+            self.tracker.record(time.perf_counter() - start)
+        return result
@@ -1,4 +1,5 @@
 from threading import Lock
+from typing import List
 from uuid import UUID
 from domain.entities.job import Job
 from application.interfaces.job_repository import JobRepository
@@ -26,3 +27,7 @@ class InMemoryJobRepository(JobRepository):
             if job.id not in self._store:
                 raise ValueError(f"Job not found: {job.id}")
             self._store[job.id] = job
+
+    def list_jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._store.values())
@@ -1,18 +1,32 @@
 import os
 import logging
+from pathlib import Path
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from config import Settings
 from presentation.controllers.job_controller import router as job_router
 from presentation.controllers.eval_controller import router as eval_router
-from presentation.dependencies import set_lifecycle
+from presentation.controllers.metrics_controller import router as metrics_router
+from presentation.dependencies import set_lifecycle, set_evaluator, set_cpu_runner, set_job_evaluator, set_upload_limits, set_blob_store
+from presentation.uploads import UploadLimits, UploadSizeLimitMiddleware
 from application.interfaces.job_repository import JobRepository
+from application.interfaces.llm_client import BaseLLMClient
 from infrastructure.repository.job_repo_inmemory import InMemoryJobRepository
 from application.use_cases.llm_processor import LLMProcessor
 from application.use_cases.aggregator import Aggregator
 from application.use_cases.job_lifecycle import JobLifecycle
-from infrastructure.llm_clients.gemini_client import GeminiClient
+from infrastructure.llm_clients.client_pool import LLMClientPool
+from infrastructure.llm_clients.factory import build_llm_client, build_retry_policy
+from application.use_cases.eval.prep_sti_evaluator import PrepSTIEvaluator
+from application.use_cases.cpu_tasks import init_worker
+from application.use_cases.eval.job_evaluator import JobEvaluator
+from application.utils.cpu_task_runner import CPUTaskRunner
+from application.utils.blob_store import BlobStore
+from application.utils.temp_file_handler import tmp_root
+from application.utils.metrics import REGISTRY
+from domain.value_objects.llm_usage import TokenPricing
 
 settings = Settings()
 settings.load_env()
@@ -21,19 +35,116 @@ settings.configure_logging()
 logger = logging.getLogger(__name__)
 
 # load dependencies
-llm_client = GeminiClient(api_key=settings.GOOGLE_API_KEY, model_name=settings.MODEL_NAME)
-llm_processor = LLMProcessor(llm_client)
+if settings.LLM_PROVIDER == "fake":
+    logger.warning("Using the fake LLM client: results are synthetic")
+
+# one client per model, each limited to the model's quota; MODEL_NAME serves the jobs that name no model
+client_pool = LLMClientPool([
+    build_llm_client(
+        settings,
+        entry["model"],
+        max_concurrency=int(entry["max_concurrency"]),
+        requests_per_minute=entry["requests_per_minute"],
+    )
+    for entry in settings.LLM_MODELS
+])
+model_pricing = {
+    entry["model"]: TokenPricing(input_per_million=entry["input_price"], output_per_million=entry["output_price"])
+    for entry in settings.LLM_MODELS
+}
+llm_client: BaseLLMClient = client_pool.get(settings.MODEL_NAME)
+retry_policy = build_retry_policy(settings)
+pricing = TokenPricing(
+    input_per_million=settings.LLM_INPUT_PRICE_PER_MTOK,
+    output_per_million=settings.LLM_OUTPUT_PRICE_PER_MTOK,
+)
+
+# model cascade: a stronger model for what the first one left uncertain. It shares the quota of its pool
+# client when it is listed in LLM_MODELS; otherwise it gets its own (no hedging: it is the expensive one)
+escalation_client: BaseLLMClient | None = None
+if settings.LLM_ESCALATION_MODEL:
+    if settings.LLM_ESCALATION_MODEL in client_pool.models():
+        escalation_client = client_pool.get(settings.LLM_ESCALATION_MODEL)
+    else:
+        escalation_client = build_llm_client(
+            settings,
+            settings.LLM_ESCALATION_MODEL,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+            hedge=False,
+            fake_seed=settings.FAKE_LLM_SEED + 1,
+        )
+    logger.info(f"Model cascade enabled: {settings.MODEL_NAME} -> {settings.LLM_ESCALATION_MODEL}")
+escalation_pricing = TokenPricing(
+    input_per_million=settings.LLM_ESCALATION_INPUT_PRICE_PER_MTOK,
+    output_per_million=settings.LLM_ESCALATION_OUTPUT_PRICE_PER_MTOK,
+)
+llm_processor = LLMProcessor(
+    llm_client,
+    retry_policy=retry_policy,
+    pricing=pricing,
+    escalation_client=escalation_client,
+    escalation_pricing=escalation_pricing,
+    client_pool=client_pool,
+    model_pricing=model_pricing,
+)
 aggregator     = Aggregator()
 repo: JobRepository = InMemoryJobRepository()
 
-# initialize the job lifecycle
-lifecycle = JobLifecycle(repo=repo, llm_processor=llm_processor, aggregator=aggregator)
+# uploaded documents stored once across jobs; job directories hard link them (same file system by default)
+blob_store = None
+if settings.BLOB_STORE_ENABLED:
+    blob_store = BlobStore(Path(settings.BLOB_STORE_DIR) if settings.BLOB_STORE_DIR else tmp_root.parent / "hpm_blobs")
+
+# evaluator shared by all requests; reference datasets are parsed once here
+evaluator = PrepSTIEvaluator(max_output_dirs=settings.EVAL_MAX_OUTPUT_DIRS)
+evaluator.preload_references()
+
+# process pool for CPU-bound evaluation and aggregation (each worker preloads the references)
+cpu_runner = CPUTaskRunner(
+    max_workers=settings.CPU_WORKERS,
+    max_concurrency=settings.CPU_MAX_CONCURRENCY,
+    max_queue=settings.CPU_MAX_QUEUE,
+    initializer=init_worker,
+    initargs=(evaluator.reference_data_dir, evaluator.max_output_dirs),
+)
+
+# initialize the job lifecycle (aggregated downloads are computed on the CPU pool)
+lifecycle = JobLifecycle(repo=repo, llm_processor=llm_processor, aggregator=aggregator, cpu_runner=cpu_runner)
+
+# evaluates jobs from their rows (incrementally while they run), on the CPU pool
+job_evaluator = JobEvaluator(lifecycle=lifecycle, cpu_runner=cpu_runner)
+
+# queue and backend state, read when /metrics is scraped
+REGISTRY.gauge("hpm_jobs_pending", "Jobs waiting to start", callback=lambda: lifecycle.get_queue_stats()["jobs_pending"])
+REGISTRY.gauge("hpm_jobs_running", "Jobs being processed", callback=lambda: lifecycle.get_queue_stats()["jobs_running"])
+REGISTRY.gauge("hpm_documents_queued", "Documents of pending and running jobs not processed yet",
+               callback=lambda: lifecycle.get_queue_stats()["documents_queued"])
+REGISTRY.gauge("hpm_cpu_tasks_running", "Tasks running on the CPU process pool", callback=lambda: cpu_runner.stats()["running"])
+REGISTRY.gauge("hpm_cpu_tasks_waiting", "Tasks waiting for a CPU pool slot", callback=lambda: cpu_runner.stats()["waiting"])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if blob_store is not None:
+        blob_store.prune()  # documents of job directories deleted while the server was down
+    await cpu_runner.warm_up()
+    yield
+    cpu_runner.shutdown()
+
 
 # create FastAPI app
-app = FastAPI(title="Health Policy Mapper")
+app = FastAPI(title="Health Policy Mapper", lifespan=lifespan)
 
 settings.apply_cors(app)
 
+upload_limits = UploadLimits(
+    max_file_bytes=settings.UPLOAD_MAX_FILE_MB * 1024 * 1024,
+    max_total_bytes=settings.UPLOAD_MAX_TOTAL_MB * 1024 * 1024,
+)
+# reject oversized job uploads from their Content-Length, before the multipart body is parsed
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=upload_limits.max_total_bytes, paths=["/jobs", "/jobs/"])
+
 @app.get("/")
 def root():
     return {
@@ -44,6 +155,11 @@ def root():
 
 
 set_lifecycle(lifecycle)
+set_evaluator(evaluator)
+set_cpu_runner(cpu_runner)
+set_job_evaluator(job_evaluator)
+set_upload_limits(upload_limits)
+set_blob_store(blob_store)
 
 # include the job router
 app.include_router(
@@ -52,6 +168,9 @@ app.include_router(
     tags=["jobs"],
 )
 
+# include the metrics endpoint
+app.include_router(metrics_router, tags=["metrics"])
+
 # include the evaluation router
 app.include_router(
     eval_router,
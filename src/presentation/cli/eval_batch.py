@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from application.interfaces.eval import ArtifactMode, BatchEvalResult
+from application.use_cases.cpu_tasks import init_worker
+from application.use_cases.eval.batch_evaluator import BatchEvaluator
+from application.utils.cpu_task_runner import CPUTaskRunner
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_runs(inputs: List[Path]) -> Dict[str, Path]:
+    """
+    Map model names to CSV files. A CSV is named after its file; a directory
+    (e.g. data/output/<context>/<model>_<timestamp>) contributes the input CSV stored in it
+    and is named after the directory.
+    """
+    runs: Dict[str, Path] = {}
+    for path in inputs:
+        if path.is_dir():
+            candidates = [p for p in sorted(path.glob("*.csv")) if p.name != "highlighted_errors.csv"]
+            if len(candidates) != 1:
+                raise ValueError(f"Expected exactly one input CSV in {path}, found {len(candidates)}")
+            name, csv_path = path.name, candidates[0]
+        elif path.suffix.lower() == ".csv" and path.exists():
+            name, csv_path = path.stem, path
+        else:
+            raise ValueError(f"Not a CSV file or directory: {path}")
+
+        if name in runs:
+            raise ValueError(f"Duplicate model name: {name}")
+        runs[name] = csv_path
+    return runs
+
+
+async def run_batch(
+    runs: Dict[str, Path],
+    context: str,
+    reference_dir: Path,
+    workers: int,
+    bootstrap_samples: int = 0,
+    artifacts: str = ArtifactMode.SYNC
+) -> BatchEvalResult:
+    """
+    Evaluate all runs on a dedicated process pool.
+    """
+    runner = CPUTaskRunner(
+        max_workers=max(1, min(workers, len(runs))),
+        max_queue=len(runs),
+        initializer=init_worker,
+        initargs=(reference_dir,),
+    )
+    try:
+        return await BatchEvaluator(runner).evaluate(runs, context, bootstrap_samples, artifacts)
+    finally:
+        runner.shutdown()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="eval_batch",
+        description="Evaluate several model outputs against a reference dataset and compare them."
+    )
+    parser.add_argument("inputs", nargs="+", type=Path, help="Raw/aggregated CSV files or evaluation output directories")
+    parser.add_argument("--context", default="90_prep_sti", help="Evaluation context (default: 90_prep_sti)")
+    parser.add_argument("--reference-dir", type=Path, default=Path("data/reference"), help="Reference data directory")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Worker processes")
+    parser.add_argument("--bootstrap", type=int, default=0, metavar="N",
+                        help="Bootstrap resamples for confidence intervals and paired significance tests (0 = none)")
+    parser.add_argument("--no-artifacts", action="store_true",
+                        help="Only compute metrics; do not write per-run output directories")
+    parser.add_argument("--output", type=Path, help="Directory to write comparison.csv and comparison_per_column.csv")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    try:
+        runs = resolve_runs(args.inputs)
+    except ValueError as e:
+        parser.error(str(e))
+
+    batch = asyncio.run(run_batch(runs, args.context, args.reference_dir, args.workers, args.bootstrap,
+                                ArtifactMode.NONE if args.no_artifacts else ArtifactMode.SYNC))
+
+    with pd.option_context("display.width", 200, "display.max_columns", None, "display.float_format", "{:.2%}".format):
+        print(f"Context: {batch.context}\n")
+        print(batch.comparison.to_string(index=False))
+        print()
+        metric_by_column = batch.per_column.pivot(index="column", columns="model", values="f1")
+        print("Per-column F1:")
+        print(metric_by_column.to_string())
+
+        if batch.paired_tests:
+            print("\nPaired bootstrap tests (difference = model_a - model_b):")
+            print(pd.DataFrame([t.to_dict() for t in batch.paired_tests]).to_string(index=False))
+
+    if args.output:
+        args.output.mkdir(parents=True, exist_ok=True)
+        batch.comparison.to_csv(args.output / "comparison.csv", index=False)
+        batch.per_column.to_csv(args.output / "comparison_per_column.csv", index=False)
+        if batch.paired_tests:
+            pd.DataFrame([t.to_dict() for t in batch.paired_tests]).to_csv(args.output / "paired_tests.csv", index=False)
+        print(f"\nComparison tables written to {args.output}")
+
+    for name, error in batch.errors.items():
+        print(f"ERROR {name}: {error}", file=sys.stderr)
+    return 1 if batch.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import queue
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from fastapi import HTTPException
+
+from application.use_cases.aggregator import Aggregator
+from application.use_cases.llm_processor import LLMProcessor
+from application.utils.extraction_manifest import (
+    ExtractionManifest, ManifestEntry, ManifestStatus, RowLog, file_sha256
+)
+from config import Settings
+from domain.value_objects.column import Column
+from domain.value_objects.llm_usage import COST_COLUMN, INPUT_TOKENS_COLUMN, OUTPUT_TOKENS_COLUMN, USAGE_COLUMNS, TokenPricing
+from infrastructure.llm_clients.factory import build_llm_client, build_retry_policy
+from presentation.parsers.column_parser import parse_columns_payload
+
+logger = logging.getLogger(__name__)
+
+# Per-worker state, set by init_worker: one LLM client per process, the queue of documents shared by
+# the workers and the queue their results are sent back on, one at a time as documents finish
+_processor: Optional[LLMProcessor] = None
+_concurrency = 1
+_documents: Optional["multiprocessing.Queue"] = None
+_results: Optional["multiprocessing.Queue"] = None
+
+
+def init_worker(
+    model_name: str,
+    concurrency: int,
+    requests_per_minute: float,
+    log_level: int,
+    documents: "multiprocessing.Queue",
+    results: "multiprocessing.Queue",
+) -> None:
+    """
+    Process pool initializer: build the worker's LLM client from the environment, as the API does.
+    """
+    global _processor, _concurrency, _documents, _results
+    logging.basicConfig(level=log_level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    settings = Settings()
+    settings.load_env()
+
+    client = build_llm_client(settings, model_name, max_concurrency=concurrency, requests_per_minute=requests_per_minute)
+    _processor = LLMProcessor(client, retry_policy=build_retry_policy(settings), pricing=model_pricing(settings, model_name))
+    _concurrency = concurrency
+    _documents, _results = documents, results
+
+
+def model_pricing(settings: Settings, model_name: str) -> TokenPricing:
+    for entry in settings.LLM_MODELS:
+        if entry["model"] == model_name:
+            return TokenPricing(input_per_million=entry["input_price"], output_per_million=entry["output_price"])
+    return TokenPricing(settings.LLM_INPUT_PRICE_PER_MTOK, settings.LLM_OUTPUT_PRICE_PER_MTOK)
+
+
+def extract_documents(context: str, columns: List[Column]) -> int:
+    """
+    Worker entry point: take documents from the shared queue until its end marker (None), keeping up to
+    'concurrency' of them in flight, and send (path, sha256, size, mtime_ns, raw row) back as each one
+    finishes. Returns the number of documents extracted.
+    """
+    return asyncio.run(_extract_from_queue(context, columns))
+
+
+async def _extract_from_queue(context: str, columns: List[Column]) -> int:
+    slots = asyncio.Semaphore(_concurrency)
+    tasks = set()
+    extracted = 0
+
+    async def extract(path: str) -> None:
+        nonlocal extracted
+        try:
+            _results.put(await _extract_one(Path(path), context, columns))
+            extracted += 1
+        finally:
+            slots.release()
+
+    while True:
+        await slots.acquire()  # a free slot first, so other workers take the documents this one cannot start
+        path = await asyncio.to_thread(_documents.get)
+        if path is None:
+            slots.release()
+            break
+        task = asyncio.create_task(extract(path))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+    return extracted
+
+
+async def _extract_one(path: Path, context: str, columns: List[Column]) -> Tuple[str, str, int, int, Dict[str, Any]]:
+    stat = path.stat()
+    sha256 = await asyncio.to_thread(file_sha256, path)
+    rows: List[Dict[str, Any]] = []
+    try:
+        await _processor.run([path], context, columns, row_callback=lambda record, i, total: rows.append(record))
+    except Exception as e:
+        rows = [{"source_file": path.name, "error": f"{type(e).__name__}: {e}"[:1000]}]
+    return str(path), sha256, stat.st_size, stat.st_mtime_ns, rows[0]
+
+
+def find_documents(root: Path) -> List[Path]:
+    return sorted(p for p in root.rglob("*") if p.is_file() and p.suffix.lower() == ".pdf")
+
+
+def raw_fieldnames(columns: List[Column]) -> List[str]:
+    fieldnames = ["source_file"]
+    for col in columns:
+        fieldnames += [col.name, f"{col.name}_justification"]
+    return fieldnames + ["error"] + USAGE_COLUMNS
+
+
+def check_run_config(output: Path, config: Dict[str, Any]) -> None:
+    """
+    Store the run parameters with the manifest; resuming with other columns, context or model would mix rows.
+    """
+    path = output / "run.json"
+    if path.exists():
+        previous = json.loads(path.read_text(encoding="utf-8"))
+        changed = sorted(key for key in config if previous.get(key) != config[key])
+        if changed:
+            raise ValueError(f"{output} holds a run with other {', '.join(changed)}; use another --output directory")
+    else:
+        path.write_text(json.dumps(config, indent=2), encoding="utf-8")
+
+
+def read_argument(value: str) -> str:
+    """The value itself, or the contents of a file for '@path'."""
+    if value.startswith("@"):
+        return Path(value[1:]).read_text(encoding="utf-8")
+    return value
+
+
+def run_extraction(
+    root: Path,
+    output: Path,
+    context: str,
+    columns: List[Column],
+    model_name: str,
+    workers: int,
+    concurrency: int,
+    requests_per_minute: float,
+    log_level: int = logging.WARNING,
+) -> Dict[str, Any]:
+    """
+    Extract every PDF under root not already done according to the manifest in output, then write
+    raw_data.csv and aggregated.csv from the rows of all documents.
+    """
+    output.mkdir(parents=True, exist_ok=True)
+    check_run_config(output, {
+        "root": str(root.resolve()),
+        "context": context,
+        "columns": [col.to_dict() for col in columns],
+        "model": model_name,
+    })
+    manifest = ExtractionManifest(output / "manifest.jsonl")
+    row_log = RowLog(output / "rows.csv", raw_fieldnames(columns))
+
+    documents = find_documents(root)
+    started = time.perf_counter()
+    pending = [p for p in documents if not manifest.is_done(p.relative_to(root).as_posix(), p)]
+    logger.info(f"Resume check of {len(documents)} documents took {time.perf_counter() - started:.2f}s")
+    print(f"{len(documents)} documents, {len(documents) - len(pending)} already done, {len(pending)} to extract")
+
+    processed = errors = 0
+    if pending:
+        workers = max(1, min(workers, len(pending)))
+        mp_context = multiprocessing.get_context("spawn")
+        documents_queue, results_queue = mp_context.Queue(), mp_context.Queue()
+        for path in pending:
+            documents_queue.put(str(path))
+        for _ in range(workers):
+            documents_queue.put(None)  # one end marker per worker
+
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp_context,
+            initializer=init_worker,
+            initargs=(model_name, max(1, concurrency), requests_per_minute / workers, log_level,
+                      documents_queue, results_queue),
+        )
+        futures: List[Future] = [pool.submit(extract_documents, context, columns) for _ in range(workers)]
+        try:
+            # Each document is recorded as soon as it is extracted, so an interruption loses none of them
+            while processed < len(pending):
+                try:
+                    path, sha256, size, mtime_ns, record = results_queue.get(timeout=0.5)
+                except queue.Empty:
+                    if all(future.done() for future in futures):
+                        break
+                    continue
+                file = Path(path).relative_to(root).as_posix()
+                record["source_file"] = file
+                offset, length = row_log.append(record)
+                status = ManifestStatus.ERROR if record.get("error") else ManifestStatus.DONE
+                manifest.record(ManifestEntry(
+                    file=file, sha256=sha256, size=size, mtime_ns=mtime_ns, status=status,
+                    offset=offset, length=length, error=str(record.get("error") or ""),
+                ))
+                processed += 1
+                errors += status == ManifestStatus.ERROR
+                print(f"[{processed}/{len(pending)}] extracted, {errors} errors", flush=True)
+        except KeyboardInterrupt:
+            print(f"Interrupted after {processed} documents; rerun the same command to resume", file=sys.stderr)
+            pool.shutdown(wait=False, cancel_futures=True)
+            for q in (documents_queue, results_queue):
+                q.cancel_join_thread()  # do not wait at exit to flush documents no worker will take
+            raise
+
+        for future in futures:
+            if future.exception() is not None:
+                logger.error(f"Worker failed: {future.exception()}")
+        if processed < len(pending):
+            # Nothing recorded: these documents are extracted again on the next run
+            missing = len(pending) - processed
+            logger.error(f"{missing} documents were not extracted (worker failure)")
+            processed += missing
+            errors += missing
+        pool.shutdown()
+
+    entries = [
+        manifest.entries[file]
+        for file in (p.relative_to(root).as_posix() for p in documents)
+        if file in manifest.entries
+    ]
+    pd.DataFrame(row_log.read(entries), columns=row_log.fieldnames).to_csv(output / "raw_data.csv", index=False)
+    # Read back like the API reads a job's raw CSV, so both aggregate the same values
+    raw = pd.read_csv(output / "raw_data.csv")
+
+    aggregated_rows = None
+    try:
+        aggregated = Aggregator().aggregate(raw)
+        aggregated.to_csv(output / "aggregated.csv", index=False)
+        aggregated_rows = len(aggregated)
+    except (KeyError, ValueError) as e:
+        logger.warning(f"Aggregated CSV not written: {e}")
+
+    return {
+        "documents": len(documents),
+        "skipped": len(documents) - len(pending),
+        "processed": processed,
+        "errors": int((raw["error"].fillna("") != "").sum()),
+        "aggregated_rows": aggregated_rows,
+        "input_tokens": int(pd.to_numeric(raw[INPUT_TOKENS_COLUMN], errors="coerce").fillna(0).sum()),
+        "output_tokens": int(pd.to_numeric(raw[OUTPUT_TOKENS_COLUMN], errors="coerce").fillna(0).sum()),
+        "cost": float(pd.to_numeric(raw[COST_COLUMN], errors="coerce").fillna(0).sum()),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="extract_batch",
+        description="Extract every PDF of a directory tree with the LLM, resumably, without going through the API."
+    )
+    parser.add_argument("root", type=Path, help="Directory searched recursively for PDF files")
+    parser.add_argument("--output", type=Path, required=True,
+                        help="Directory for manifest.jsonl, rows.csv, raw_data.csv and aggregated.csv (reuse it to resume)")
+    parser.add_argument("--context", required=True, help="Research context, or @file to read it from a file")
+    parser.add_argument("--columns", required=True,
+                        help="JSON list of fields (name + description), or @file to read it from a file")
+    parser.add_argument("--model", help="Model to use (default: MODEL_NAME)")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Worker processes")
+    parser.add_argument("--concurrency", type=int, default=8, help="Documents in flight per worker process")
+    parser.add_argument("--requests-per-minute", type=float,
+                        help="Request quota shared by the workers (default: the model's LLM_MODELS entry, 0 = unlimited)")
+    parser.add_argument("--log-level", default="WARNING", help="Logging level (default: WARNING)")
+    args = parser.parse_args(argv)
+
+    log_level = getattr(logging, args.log_level.upper(), logging.WARNING)
+    logging.basicConfig(level=log_level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if not args.root.is_dir():
+        parser.error(f"Not a directory: {args.root}")
+    try:
+        context = read_argument(args.context)
+        columns = parse_columns_payload(read_argument(args.columns))
+    except OSError as e:
+        parser.error(str(e))
+    except HTTPException as e:
+        parser.error(e.detail)
+
+    settings = Settings()
+    settings.load_env()  # fail here, not in every worker, on a missing API key
+    model_name = args.model or settings.MODEL_NAME
+    requests_per_minute = args.requests_per_minute
+    if requests_per_minute is None:
+        entry = next((e for e in settings.LLM_MODELS if e["model"] == model_name), None)
+        requests_per_minute = entry["requests_per_minute"] if entry else settings.LLM_REQUESTS_PER_MINUTE
+
+    try:
+        summary = run_extraction(
+            args.root, args.output, context, columns, model_name,
+            args.workers, args.concurrency, requests_per_minute, log_level,
+        )
+    except ValueError as e:
+        print(f"ERROR {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        return 130
+
+    print(
+        f"{summary['documents']} documents ({summary['skipped']} skipped, {summary['processed']} extracted, "
+        f"{summary['errors']} with errors) in {summary['seconds']}s; "
+        f"{summary['input_tokens'] + summary['output_tokens']} tokens, cost {summary['cost']:.4f}"
+    )
+    print(f"Raw rows: {args.output / 'raw_data.csv'}")
+    if summary["aggregated_rows"] is not None:
+        print(f"Aggregated: {args.output / 'aggregated.csv'} ({summary['aggregated_rows']} countries)")
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Response
-from enum import Enum
-from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Form, HTTPException, Response, Depends
+from typing import Any, Dict, List, Optional
 import tempfile
 import logging
 from pathlib import Path
+import uuid
 
-from application.use_cases.eval.prep_sti_evaluator import PrepSTIEvaluator
-from application.interfaces.eval import EvalResult
+from application.interfaces.eval import ArtifactMode, BaseEvaluator, EvalArtifacts, EvalResult
+from application.use_cases import cpu_tasks
+from application.use_cases.eval.batch_evaluator import BatchEvaluator
+from application.use_cases.eval.job_evaluator import JobEvaluator
+from application.utils.cpu_task_runner import CPUTaskRunner, CPUQueueFullError
+from presentation.dependencies import get_evaluator, get_cpu_runner, get_job_evaluator
 from config import Settings
 
 settings = Settings()
@@ -14,41 +18,44 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-class EvalContext(str, Enum):
-    """Supported evaluation contexts."""
-    STI_90_PREP = "90_prep_sti"
+# Upper bound on bootstrap resamples per request
+MAX_BOOTSTRAP_SAMPLES = 100_000
+
 
 @router.post("/", status_code=200)
 async def evaluate_csv(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(..., description="CSV file to evaluate"),
-    context: EvalContext = Form(..., description="Evaluation context")
+    context: str = Form(..., description="Evaluation context (see GET /eval/contexts)"),
+    bootstrap_samples: int = Form(0, ge=0, le=MAX_BOOTSTRAP_SAMPLES, description="Bootstrap resamples for confidence intervals (0 = none)"),
+    artifacts: str = Form(ArtifactMode.SYNC, description="Output files: sync, background or none (metrics only)"),
+    evaluator: BaseEvaluator = Depends(get_evaluator),
+    cpu_runner: CPUTaskRunner = Depends(get_cpu_runner)
 ):
     """
     Evaluate an uploaded CSV file against a reference dataset.
+    The evaluation runs on the CPU process pool so it does not block other requests.
 
     Args:
         file: CSV file to evaluate
-        context: Evaluation context (currently only 90_prep_sti supported)
+        context: Evaluation context registered in data/reference/contexts (e.g. 90_prep_sti)
+        bootstrap_samples: Number of bootstrap resamples of countries for 95% confidence intervals
+        artifacts: "sync" writes the output files before responding, "background" writes them after
+            the response is sent and "none" skips them (metrics only)
 
     Returns:
         JSON response with evaluation metrics and file paths
     """
     model_name = settings.MODEL_NAME
-    logger.info(f"Evaluation request received for context: {context.value}, model: {model_name}")
+    logger.info(f"Evaluation request received for context: {context}, model: {model_name}")
 
     # Validate file type
     if not file.filename or not file.filename.lower().endswith('.csv'):
         raise HTTPException(status_code=400, detail="Only CSV files are supported")
 
-    # Create evaluator
-    evaluator = PrepSTIEvaluator()
+    _validate_artifact_mode(artifacts)
 
-    # Validate context
-    if context.value not in evaluator.get_supported_contexts():
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported context: {context.value}. Supported: {evaluator.get_supported_contexts()}"
-        )
+    _validate_context(evaluator, context)
 
     # Save uploaded file temporarily
     with tempfile.NamedTemporaryFile(mode='wb', suffix='.csv', delete=False) as tmp_file:
@@ -57,44 +64,35 @@ async def evaluate_csv(
         temp_path = Path(tmp_file.name)
 
     try:
-        # Perform evaluation
-        result: EvalResult = evaluator.evaluate(
-            input_csv_path=temp_path,
-            context=context.value,
-            model_name=model_name
+        # Perform evaluation off the event loop
+        result: EvalResult = await cpu_runner.run(
+            cpu_tasks.evaluate_csv,
+            temp_path,
+            context,
+            model_name,
+            bootstrap_samples,
+            artifacts
         )
 
         # Prepare response
         response_data = {
             "status": "success",
-            "context": context.value,
+            "context": context,
             "model_name": model_name,
-            "metrics": {
-                "accuracy": result.accuracy,
-                "precision": result.precision,
-                "recall": result.recall,
-                "f1_score": result.f1,
-                "total_matches": result.total_matches,
-                "total_cells": result.total_cells,
-                "per_column_accuracy": result.per_column_accuracy
-            },
-            "dataset_info": {
-                "common_countries": result.common_countries,
-                "ref_countries": result.ref_countries,
-                "generated_countries": result.generated_countries,
-                "missing_in_generated": result.missing_in_generated,
-                "extra_in_generated": result.extra_in_generated
-            },
-            "output_files": {
-                "output_directory": str(result.output_dir),
-                "highlighted_errors_csv": str(result.highlighted_errors_path),
-                "metrics_txt": str(result.metrics_txt_path)
-            }
+            **_result_payload(result)
         }
 
+        # The input copy is part of the artifacts, so the temporary file lives until they are written
+        if result.pending_artifacts is not None:
+            background_tasks.add_task(_write_pending_artifacts, evaluator, [result.pending_artifacts], [temp_path])
+            temp_path = None
+
         logger.info(f"Evaluation completed successfully. Accuracy: {result.accuracy:.2%}")
         return response_data
 
+    except CPUQueueFullError as e:
+        logger.warning(f"Evaluation rejected: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except ValueError as e:
         logger.error(f"Validation error during evaluation: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -106,24 +104,201 @@ async def evaluate_csv(
         raise HTTPException(status_code=500, detail=f"Evaluation failed: {str(e)}")
     finally:
         # Cleanup temporary file
+        if temp_path is not None:
+            _cleanup_temp_files([temp_path])
+
+
+def _validate_context(evaluator: BaseEvaluator, context: str) -> None:
+    supported = evaluator.get_supported_contexts()
+    if context not in supported:
+        raise HTTPException(status_code=400, detail=f"Unsupported context: {context}. Supported: {supported}")
+
+
+def _validate_artifact_mode(artifacts: str) -> None:
+    if artifacts not in ArtifactMode.ALL:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported artifacts mode: {artifacts}. Supported: {ArtifactMode.ALL}"
+        )
+
+
+def _write_pending_artifacts(evaluator: BaseEvaluator, pending: List[EvalArtifacts], temp_paths: List[Path]) -> None:
+    """Background task: write deferred evaluation artifacts, then remove the uploaded temporary files."""
+    try:
+        for artifacts in pending:
+            try:
+                evaluator.write_artifacts(artifacts)
+            except Exception as e:
+                logger.error(f"Failed to write evaluation artifacts to {artifacts.output_dir}: {str(e)}", exc_info=True)
+    finally:
+        _cleanup_temp_files(temp_paths)
+
+
+def _cleanup_temp_files(temp_paths: List[Path]) -> None:
+    for temp_path in temp_paths:
         try:
             temp_path.unlink()
         except Exception:
             logger.warning(f"Failed to cleanup temporary file: {temp_path}")
 
 
+def _result_payload(result: EvalResult) -> Dict[str, Any]:
+    """Metrics, dataset info and output files of one evaluation, as returned by the API."""
+    return {
+        "metrics": {
+            "accuracy": result.accuracy,
+            "precision": result.precision,
+            "recall": result.recall,
+            "f1_score": result.f1,
+            "total_matches": result.total_matches,
+            "total_cells": result.total_cells,
+            "per_column_accuracy": result.per_column_accuracy,
+            "confusion": result.metrics.overall.to_dict() if result.metrics else None,
+            "per_column": result.metrics.to_dict()["per_column"] if result.metrics else None,
+            "confidence_intervals": {name: ci.to_dict() for name, ci in result.confidence_intervals.items()}
+        },
+        "dataset_info": {
+            "common_countries": result.common_countries,
+            "ref_countries": result.ref_countries,
+            "generated_countries": result.generated_countries,
+            "missing_in_generated": result.missing_in_generated,
+            "extra_in_generated": result.extra_in_generated
+        },
+        "output_files": {
+            "output_directory": str(result.output_dir),
+            "highlighted_errors_csv": str(result.highlighted_errors_path),
+            "metrics_txt": str(result.metrics_txt_path),
+            "status": "pending" if result.pending_artifacts is not None else "written"
+        } if result.output_dir is not None else None
+    }
+
+
+@router.post("/batch", status_code=200)
+async def evaluate_batch(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(..., description="Raw or aggregated CSV files, one per model run"),
+    context: str = Form(..., description="Evaluation context (see GET /eval/contexts)"),
+    model_names: Optional[str] = Form(None, description="Comma-separated model names, one per file (default: file names)"),
+    bootstrap_samples: int = Form(0, ge=0, le=MAX_BOOTSTRAP_SAMPLES, description="Bootstrap resamples for confidence intervals and paired tests (0 = none)"),
+    artifacts: str = Form(ArtifactMode.SYNC, description="Output files per run: sync, background or none (metrics only)"),
+    evaluator: BaseEvaluator = Depends(get_evaluator),
+    cpu_runner: CPUTaskRunner = Depends(get_cpu_runner)
+):
+    """
+    Evaluate several model outputs against the same reference in parallel and compare them.
+
+    Returns:
+        JSON response with per-run metrics and comparison tables per model and per column,
+        plus paired bootstrap tests between every two runs when bootstrap_samples > 0
+    """
+    logger.info(f"Batch evaluation request received for context: {context} with {len(files)} files")
+
+    _validate_artifact_mode(artifacts)
+    _validate_context(evaluator, context)
+
+    for upload in files:
+        if not upload.filename or not upload.filename.lower().endswith('.csv'):
+            raise HTTPException(status_code=400, detail="Only CSV files are supported")
+
+    names = [n.strip() for n in model_names.split(",")] if model_names else [Path(f.filename).stem for f in files]
+    if len(names) != len(files):
+        raise HTTPException(status_code=400, detail="model_names must have one entry per file")
+    if len(set(names)) != len(names):
+        raise HTTPException(status_code=400, detail=f"Duplicate model names: {names}")
+
+    # Save uploaded files temporarily
+    runs: Dict[str, Path] = {}
+    for name, upload in zip(names, files):
+        with tempfile.NamedTemporaryFile(mode='wb', suffix='.csv', delete=False) as tmp_file:
+            tmp_file.write(await upload.read())
+            runs[name] = Path(tmp_file.name)
+
+    temp_paths = list(runs.values())
+    try:
+        batch = await BatchEvaluator(cpu_runner).evaluate(runs, context, bootstrap_samples, artifacts)
+
+        pending = [r.pending_artifacts for r in batch.results.values() if r.pending_artifacts is not None]
+        if pending:
+            background_tasks.add_task(_write_pending_artifacts, evaluator, pending, temp_paths)
+            temp_paths = []
+    except CPUQueueFullError as e:
+        logger.warning(f"Batch evaluation rejected: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    finally:
+        _cleanup_temp_files(temp_paths)
+
+    return {
+        "status": "success" if not batch.errors else "partial",
+        "context": batch.context,
+        "runs": {name: _result_payload(result) for name, result in batch.results.items()},
+        "errors": batch.errors,
+        "comparison": batch.comparison.to_dict(orient="records"),
+        "per_column": batch.per_column.to_dict(orient="records"),
+        "paired_tests": [test.to_dict() for test in batch.paired_tests]
+    }
+
+
+@router.post("/jobs/{job_id}", status_code=200)
+async def evaluate_job(
+    job_id: str,
+    background_tasks: BackgroundTasks,
+    context: str = Form(..., description="Evaluation context (see GET /eval/contexts)"),
+    bootstrap_samples: int = Form(0, ge=0, le=MAX_BOOTSTRAP_SAMPLES, description="Bootstrap resamples for confidence intervals (0 = none)"),
+    artifacts: str = Form(ArtifactMode.NONE, description="Output files: sync, background or none (metrics only, default)"),
+    evaluator: BaseEvaluator = Depends(get_evaluator),
+    job_evaluator: JobEvaluator = Depends(get_job_evaluator)
+):
+    """
+    Evaluate a job directly from its rows, without downloading, aggregating and uploading its CSV.
+    While the job is running the rows processed so far are evaluated (accuracy-so-far); repeated calls
+    only aggregate the rows that arrived in between, and return the cached result when nothing changed.
+
+    Returns:
+        JSON response with job progress, whether the evaluation is final, and the evaluation metrics
+    """
+    _validate_artifact_mode(artifacts)
+    _validate_context(evaluator, context)
+    try:
+        job_uuid = uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid job ID format")
+
+    model_name = settings.MODEL_NAME
+    try:
+        job_result = await job_evaluator.evaluate(job_uuid, context, model_name, bootstrap_samples, artifacts)
+    except CPUQueueFullError as e:
+        logger.warning(f"Job evaluation rejected: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except ValueError as e:
+        status = 404 if "not found" in str(e).lower() else 400
+        raise HTTPException(status_code=status, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    result = job_result.result
+    if result.pending_artifacts is not None:
+        background_tasks.add_task(_write_pending_artifacts, evaluator, [result.pending_artifacts], [])
+
+    return {
+        "status": "success",
+        "context": context,
+        "model_name": model_name,
+        "job": job_result.to_dict(),
+        **_result_payload(result)
+    }
+
+
 @router.get("/contexts", status_code=200)
-def get_supported_contexts():
+def get_supported_contexts(evaluator: BaseEvaluator = Depends(get_evaluator)):
     """
-    Get list of supported evaluation contexts.
+    Get list of supported evaluation contexts, as registered by their config files.
 
     Returns:
-        List of supported evaluation contexts
+        List of supported evaluation contexts with their descriptions and configs
     """
-    evaluator = PrepSTIEvaluator()
+    configs = evaluator.get_context_configs()
     return {
-        "supported_contexts": evaluator.get_supported_contexts(),
-        "descriptions": {
-            "90_prep_sti": "Evaluation for 90 countries STI/PrEP policy analysis"
-        }
+        "supported_contexts": [config.name for config in configs],
+        "descriptions": {config.name: config.description for config in configs},
+        "contexts": [config.to_dict() for config in configs]
     }
@@ -1,69 +1,143 @@
-from fastapi import APIRouter, UploadFile, File, Form, BackgroundTasks, Depends, HTTPException, Response
-from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, Form, BackgroundTasks, Depends, HTTPException, Request, Response
+from typing import Dict, List, Optional
+import json
 import uuid
 import shutil
 import logging
+from pathlib import Path
 
 import pandas as pd
+from starlette.concurrency import run_in_threadpool
 
-from application.use_cases.job_lifecycle import JobLifecycle
-from application.use_cases.aggregator import Aggregator
+from application.use_cases.job_lifecycle import JobLifecycle, JobStateConflictError
 from application.utils.temp_file_handler import get_job_temp_dir
+from application.utils.cpu_task_runner import CPUTaskRunner, CPUQueueFullError
+from application.utils.blob_store import BlobStore
+from application.utils.metrics import UPLOAD_BYTES, UPLOAD_DEDUPLICATED_BYTES, UPLOAD_SECONDS
+from application.use_cases import cpu_tasks
+from application.utils.result_formats import iter_csv_file_as_ndjson, iter_file, iter_frame
+from domain.value_objects.llm_usage import UsageBudget
+from domain.value_objects.result_artifact import ArtifactKind, ResultFormat
 from presentation.schema import (
     JobCreatedResponse,
     JobStatusResponse,
     RawIncrementalResponse,
     ResumeResponse,
 )
-from presentation.dependencies import get_lifecycle
+from presentation.dependencies import get_lifecycle, get_cpu_runner, get_upload_limits, get_blob_store
 from presentation.parsers.column_parser import parse_columns_payload
+from presentation.responses import (
+    accepts_file_format,
+    artifact_format,
+    file_response,
+    negotiate_format,
+    stream_response,
+)
+from presentation.uploads import UploadLimits, store_upload
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
 
 router = APIRouter()
-aggregator = Aggregator()
-
 
 
 @router.post("/", status_code=202, response_model=JobCreatedResponse)
 async def create_job(
     background_tasks: BackgroundTasks,
-    files: List[UploadFile] = File(..., description="One or more PDF files to process"),
+    files: List[UploadFile] = File([], description="PDF files to process"),
     context: str = Form(..., description="Research context for the extraction"),
     columns: str = Form(..., description="List of fields (name + description) as a JSON string"),
+    token_budget: Optional[int] = Form(None, description="Pause the job once this many tokens are spent"),
+    cost_budget: Optional[float] = Form(None, description="Pause the job once this cost is reached"),
+    models: Optional[str] = Form(None, description="Comma-separated models the job may use, in order of preference (default: the server's model)"),
+    documents: Optional[str] = Form(None, description="Already uploaded PDFs to process without sending them again, as a JSON object of file name to SHA-256"),
     lifecycle: JobLifecycle = Depends(get_lifecycle),
+    limits: UploadLimits = Depends(get_upload_limits),
+    blob_store: Optional[BlobStore] = Depends(get_blob_store),
 ):
     """
     Start a new extraction job
     Returns a job_id immediately and processes in background.
+    Files are rejected (and nothing is queued) if one is not a PDF or the size limits are exceeded.
+    A file with the same content as an earlier one of the job is not processed twice ('duplicates').
     """
     logger.info(f"New job request received with {len(files)} files")
 
     domain_columns = parse_columns_payload(columns)
+    budget = _parse_budget(token_budget, cost_budget)
+    job_models = _parse_models(models, lifecycle)
+    referenced = _parse_documents(documents, blob_store)
+    if not files and not referenced:
+        raise HTTPException(status_code=400, detail="No files to process")
 
     # Create job first to get the actual job ID
     temp_job_id = uuid.uuid4()
     tmp_dir = get_job_temp_dir(str(temp_job_id))
 
     paths = []
+    file_hashes = {}
+    duplicates: Dict[str, str] = {}  # file name -> name of the file of the job with the same content
+    names_by_hash: Dict[str, str] = {}
+    total_bytes = 0
+
+    def keep(path: Path, sha256: str) -> None:
+        if sha256 in names_by_hash:
+            duplicates[path.name] = names_by_hash[sha256]
+            path.unlink()
+            return
+        names_by_hash[sha256] = path.name
+        paths.append(path)
+        file_hashes[path.name] = sha256
 
-    for upload in files:
-
-        if upload.filename is None:
-            raise HTTPException(status_code=400, detail="Filename missing")
-        dest = tmp_dir / upload.filename
-        with dest.open("wb") as out_file:
-            shutil.copyfileobj(upload.file, out_file)
-        paths.append(dest)
+    try:
+        for name, sha256 in referenced.items():
+            await run_in_threadpool(blob_store.link, sha256, tmp_dir / name)
+            UPLOAD_DEDUPLICATED_BYTES.inc(blob_store.path(sha256).stat().st_size)
+            keep(tmp_dir / name, sha256)
+
+        with UPLOAD_SECONDS.time():
+            for upload in files:
+
+                if upload.filename is None:
+                    raise HTTPException(status_code=400, detail="Filename missing")
+                # Keep only the base name: the client's name must not choose the destination directory
+                name = _safe_filename(upload.filename)
+                if not name or name in file_hashes or name in duplicates:
+                    raise HTTPException(status_code=400, detail=f"Invalid or duplicate filename: {upload.filename!r}")
+                if upload.size is not None and upload.size > limits.max_file_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"{name} exceeds the file upload limit ({limits.max_file_bytes // (1024 * 1024)} MB)",
+                    )
+
+                remaining = limits.max_total_bytes - total_bytes
+                stored = await store_upload(
+                    upload,
+                    tmp_dir / name,
+                    max_bytes=min(limits.max_file_bytes, remaining),
+                    limit_name="file upload limit" if limits.max_file_bytes <= remaining else "job upload limit",
+                )
+                total_bytes += stored.size
+                UPLOAD_BYTES.inc(stored.size)
+                if blob_store is not None and stored.sha256 not in names_by_hash:
+                    # share one copy of the document with every other job that uploaded it
+                    if not await run_in_threadpool(blob_store.add, stored.path, stored.sha256):
+                        UPLOAD_DEDUPLICATED_BYTES.inc(stored.size)
+                keep(stored.path, stored.sha256)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
 
     # Create job with the same UUID used for temp directory
     job_id = lifecycle.create_job(
         files=paths,
         context=context,
         columns=domain_columns,
-        job_id=temp_job_id  # Pass the same UUID
+        job_id=temp_job_id,  # Pass the same UUID
+        budget=budget,
+        models=job_models,
+        file_hashes=file_hashes,
     )
 
     background_tasks.add_task(
@@ -72,7 +146,96 @@ async def create_job(
     )
 
     logger.info(f"Job {job_id} created and queued for processing")
-    return JobCreatedResponse(job_id=str(job_id))
+    if duplicates:
+        logger.info(f"Job {job_id}: skipped {len(duplicates)} duplicate files")
+    return JobCreatedResponse(job_id=str(job_id), file_hashes=file_hashes, duplicates=duplicates)
+
+
+def _parse_budget(token_budget: Optional[int], cost_budget: Optional[float]) -> Optional[UsageBudget]:
+    """Build the usage budget of a job from the form fields (None when neither is given)."""
+    if token_budget is None and cost_budget is None:
+        return None
+    try:
+        return UsageBudget(max_tokens=token_budget, max_cost=cost_budget)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _parse_models(models: Optional[str], lifecycle: JobLifecycle) -> Optional[List[str]]:
+    """Models named by a job (None when not given); unknown models are rejected before the upload."""
+    if not models or not models.strip():
+        return None
+    names = list(dict.fromkeys(name.strip() for name in models.split(",") if name.strip()))
+    unknown = [name for name in names if name not in lifecycle.available_models()]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown model: {', '.join(unknown)}. Available: {', '.join(lifecycle.available_models())}",
+        )
+    return names
+
+
+def _safe_filename(filename: str) -> Optional[str]:
+    """Base name of a client file name, so it cannot choose the destination directory (None if unusable)."""
+    name = Path(filename).name
+    if name in ("", ".", ".."):
+        return None
+    return name
+
+
+def _parse_documents(documents: Optional[str], blob_store: Optional[BlobStore]) -> Dict[str, str]:
+    """Stored documents named by a job, by file name; unknown hashes are rejected so the client uploads them."""
+    if not documents or not documents.strip():
+        return {}
+    if blob_store is None:
+        raise HTTPException(status_code=400, detail="Document references are not enabled on this server")
+    try:
+        parsed = json.loads(documents)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid documents JSON: {e}")
+    if not isinstance(parsed, dict):
+        raise HTTPException(status_code=400, detail="documents must be a JSON object of file name to SHA-256")
+
+    referenced = {}
+    missing = []
+    for filename, sha256 in parsed.items():
+        name = _safe_filename(filename)
+        if not name or name in referenced or not isinstance(sha256, str):
+            raise HTTPException(status_code=400, detail=f"Invalid or duplicate document: {filename!r}")
+        sha256 = sha256.lower()
+        try:
+            if not blob_store.contains(sha256):
+                missing.append(sha256)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        referenced[name] = sha256
+    if missing:
+        raise HTTPException(status_code=404, detail={"message": "Unknown documents; upload them", "missing": missing})
+    return referenced
+
+
+@router.get("/documents/{sha256}")
+def get_document(sha256: str, blob_store: Optional[BlobStore] = Depends(get_blob_store)) -> dict:
+    """
+    Whether a document is already stored, so a client can reference it in 'documents' instead of uploading it
+    """
+    if blob_store is None:
+        raise HTTPException(status_code=404, detail="Document store not enabled")
+    try:
+        info = blob_store.info(sha256.lower())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if info is None:
+        raise HTTPException(status_code=404, detail=f"Unknown document: {sha256}")
+    return {"sha256": sha256.lower(), **info}
+
+
+@router.get("/models")
+def list_models(lifecycle: JobLifecycle = Depends(get_lifecycle)) -> dict:
+    """
+    Models jobs can name in 'models'
+    """
+    return {"models": lifecycle.available_models()}
 
 
 @router.get("/{job_id}/status", response_model=JobStatusResponse)
@@ -103,11 +266,40 @@ def get_job_status(job_id: str, lifecycle: JobLifecycle = Depends(get_lifecycle)
 
 
 @router.get("/{job_id}/result")
-def get_job_result(job_id: str, lifecycle: JobLifecycle = Depends(get_lifecycle)):
+async def get_job_result(
+    job_id: str,
+    request: Request,
+    format: Optional[str] = None,
+    lifecycle: JobLifecycle = Depends(get_lifecycle)
+):
     """
-    Get the result of a job as CSV
+    Get the result of a job as CSV (or csv.gz|csv.zst|parquet|ndjson via ?format= or Accept)
     """
-    logger.info(f"CSV download requested for job: {job_id}")
+    return await _get_job_artifact(job_id, ArtifactKind.RESULT, f"job_{job_id}", request, format, lifecycle)
+
+
+@router.get("/{job_id}/aggregated")
+async def get_job_aggregated(
+    job_id: str,
+    request: Request,
+    format: Optional[str] = None,
+    lifecycle: JobLifecycle = Depends(get_lifecycle)
+):
+    """
+    Get the result of a job aggregated by country as CSV (or csv.gz|csv.zst|parquet|ndjson)
+    """
+    return await _get_job_artifact(job_id, ArtifactKind.AGGREGATED, f"job_{job_id}_aggregated", request, format, lifecycle)
+
+
+async def _get_job_artifact(
+    job_id: str,
+    kind: str,
+    filename_stem: str,
+    request: Request,
+    format: Optional[str],
+    lifecycle: JobLifecycle
+) -> Response:
+    logger.info(f"Download ({kind}) requested for job: {job_id}")
 
     # transform job_id from string to UUID
     try:
@@ -115,29 +307,42 @@ def get_job_result(job_id: str, lifecycle: JobLifecycle = Depends(get_lifecycle)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid job ID format")
 
+    fmt, encoding = negotiate_format(request, format)
+    file_format = artifact_format(fmt, encoding)
+
     try:
-        csv_text = lifecycle.get_job_result(job_uuid)
-        logger.info(f"CSV download successful for job: {job_id}")
+        artifact = await lifecycle.get_job_artifact(job_uuid, kind, file_format)
+        logger.info(f"Download ({kind}.{file_format}) successful for job: {job_id}")
+    except CPUQueueFullError as e:
+        raise HTTPException(503, str(e), headers={"Retry-After": "5"})
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Job not found")
     except RuntimeError as e:
-        logger.error(f"CSV download failed for job {job_id}: {str(e)}")
+        logger.error(f"Download failed for job {job_id}: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
 
-    return Response(
-        content=csv_text,
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=job_{job_id}.csv"}
+    return file_response(
+        request,
+        artifact.path,
+        artifact.etag,
+        filename_stem,
+        fmt=fmt,
+        encoding=encoding,
+        precompressed=(file_format != fmt)
     )
 
 
 @router.get("/{job_id}/raw", response_model=RawIncrementalResponse)
 def get_raw_data(
     job_id: str,
-    format: str = "csv",
+    request: Request,
+    format: Optional[str] = None,
     since: Optional[int] = None,
     lifecycle: JobLifecycle = Depends(get_lifecycle)
 ):
     """Return raw (non-aggregated) data for a job.
-    format=csv|json ; since=N (1-based row index) returns only new rows in JSON.
+    format=csv|csv.gz|csv.zst|parquet|ndjson|json (default: JSON, unless Accept asks for a file format) ;
+    since=N (1-based row index) returns only new rows in JSON.
     """
     try:
         job_uuid = uuid.UUID(job_id)
@@ -153,12 +358,24 @@ def get_raw_data(
     if not raw_path.exists():
         raise HTTPException(404, "Raw data not available yet")
 
-    if format == "csv" and since is None:
-        return Response(
-            content=raw_path.read_text(encoding='utf-8'),
-            media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename=raw_{job_id}.csv"}
-        )
+    wants_file = format != "json" if format is not None else accepts_file_format(request)
+    if wants_file and since is None:
+        fmt, encoding = negotiate_format(request, format)
+        stem = f"raw_{job_id}"
+        if fmt == ResultFormat.CSV:
+            # The raw file only grows by appends or is rewritten on retry, so size + mtime identify its version
+            stat = raw_path.stat()
+            etag = f'"raw-{stat.st_size}-{stat.st_mtime_ns}"'
+            return file_response(request, raw_path, etag, stem, fmt=fmt, encoding=encoding)
+        if fmt in (ResultFormat.CSV_GZIP, ResultFormat.CSV_ZSTD):
+            return stream_response(iter_file(raw_path), stem, fmt=fmt)
+        if fmt == ResultFormat.NDJSON:
+            return stream_response(iter_csv_file_as_ndjson(raw_path), stem, fmt=fmt, encoding=encoding)
+        try:
+            df = pd.read_csv(raw_path)
+        except Exception as e:
+            raise HTTPException(500, f"Failed reading raw CSV: {e}")
+        return stream_response(iter_frame(df, fmt), stem, fmt=fmt)
 
     # JSON / incremental
     try:
@@ -232,35 +449,55 @@ async def retry_failed_records(job_id: str, lifecycle: JobLifecycle = Depends(ge
         background=background
     )
 @router.post("/{job_id}/resume", status_code=202, response_model=ResumeResponse)
-async def resume_job(job_id: str, lifecycle: JobLifecycle = Depends(get_lifecycle)) -> ResumeResponse:
-    """Resume a failed/incomplete job; continues processing remaining files."""
+async def resume_job(
+    job_id: str,
+    background_tasks: BackgroundTasks,
+    token_budget: Optional[int] = Form(None, description="New token budget for a paused job"),
+    cost_budget: Optional[float] = Form(None, description="New cost budget for a paused job"),
+    lifecycle: JobLifecycle = Depends(get_lifecycle),
+) -> ResumeResponse:
+    """Resume a job paused by its budget; continues processing the remaining files.
+    It needs a budget above what it already spent. Jobs in any other state get 409
+    (failed documents are retried with /retry-failed-records)."""
     try:
         job_uuid = uuid.UUID(job_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid job ID format")
 
-    background = BackgroundTasks()
-    background.add_task(lifecycle.process_job, job_uuid, True)
+    budget = _parse_budget(token_budget, cost_budget)
+    try:
+        lifecycle.get_job(job_uuid)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    try:
+        lifecycle.resume_job(job_uuid, budget)
+    except JobStateConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # only scheduled once the job moved from PAUSED to RUNNING (at most one caller does)
+    background_tasks.add_task(lifecycle.process_job, job_uuid, True)
     return ResumeResponse(job_id=job_id, status="resuming")
 
 
 @router.post("/aggregate", status_code=200)
-def aggregate_csv(upload: UploadFile = File(..., description="Raw CSV produced by extraction")):
-    """Aggregate an uploaded raw CSV (stateless)."""
-    import io
+async def aggregate_csv(
+    request: Request,
+    upload: UploadFile = File(..., description="Raw CSV produced by extraction"),
+    format: Optional[str] = Form(None, description="csv|csv.gz|csv.zst|parquet|ndjson (default: negotiated from Accept)"),
+    cpu_runner: CPUTaskRunner = Depends(get_cpu_runner)
+):
+    """Aggregate an uploaded raw CSV (stateless). Parsing and aggregation run on the CPU process pool."""
     if not upload.filename or not upload.filename.lower().endswith('.csv'):
         raise HTTPException(400, "A .csv file is required")
+    fmt, encoding = negotiate_format(request, format)
+    content = await upload.read()
     try:
-        content = upload.file.read()
-        df = pd.read_csv(io.BytesIO(content))
-    except Exception as e:
-        raise HTTPException(400, f"Failed to read CSV: {e}")
-    try:
-        agg_df = aggregator.aggregate(df)
-    except Exception as e:
-        raise HTTPException(400, f"Aggregation failed: {e}")
-    return Response(
-        content=agg_df.to_csv(index=False),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=aggregated.csv"}
-    )
+        agg_df = await cpu_runner.run(cpu_tasks.aggregate_csv_bytes, content)
+    except CPUQueueFullError as e:
+        raise HTTPException(503, str(e), headers={"Retry-After": "5"})
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return stream_response(iter_frame(agg_df, fmt), "aggregated", fmt=fmt, encoding=encoding)
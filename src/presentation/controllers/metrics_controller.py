@@ -0,0 +1,20 @@
+import logging
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from application.utils.metrics import REGISTRY
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics() -> PlainTextResponse:
+    """
+    Pipeline metrics (stage timings, queue depth, in-flight requests, errors) in the Prometheus text format
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,7 +1,17 @@
 from typing import Optional
 from application.use_cases.job_lifecycle import JobLifecycle
+from application.interfaces.eval import BaseEvaluator
+from application.use_cases.eval.job_evaluator import JobEvaluator
+from application.utils.cpu_task_runner import CPUTaskRunner
+from application.utils.blob_store import BlobStore
+from presentation.uploads import UploadLimits
 
 _lifecycle: Optional[JobLifecycle] = None
+_evaluator: Optional[BaseEvaluator] = None
+_cpu_runner: Optional[CPUTaskRunner] = None
+_job_evaluator: Optional[JobEvaluator] = None
+_upload_limits: UploadLimits = UploadLimits()
+_blob_store: Optional[BlobStore] = None
 
 def set_lifecycle(lc: JobLifecycle) -> None:
     global _lifecycle
@@ -11,3 +21,44 @@ def get_lifecycle() -> JobLifecycle:
     if _lifecycle is None:
         raise RuntimeError("JobLifecycle dependency not set")
     return _lifecycle
+
+def set_evaluator(evaluator: BaseEvaluator) -> None:
+    global _evaluator
+    _evaluator = evaluator
+
+def get_evaluator() -> BaseEvaluator:
+    if _evaluator is None:
+        raise RuntimeError("Evaluator dependency not set")
+    return _evaluator
+
+def set_cpu_runner(runner: CPUTaskRunner) -> None:
+    global _cpu_runner
+    _cpu_runner = runner
+
+def get_cpu_runner() -> CPUTaskRunner:
+    if _cpu_runner is None:
+        raise RuntimeError("CPUTaskRunner dependency not set")
+    return _cpu_runner
+
+def set_job_evaluator(job_evaluator: JobEvaluator) -> None:
+    global _job_evaluator
+    _job_evaluator = job_evaluator
+
+def get_job_evaluator() -> JobEvaluator:
+    if _job_evaluator is None:
+        raise RuntimeError("JobEvaluator dependency not set")
+    return _job_evaluator
+
+def set_upload_limits(limits: UploadLimits) -> None:
+    global _upload_limits
+    _upload_limits = limits
+
+def get_upload_limits() -> UploadLimits:
+    return _upload_limits
+
+def set_blob_store(blob_store: Optional[BlobStore]) -> None:
+    global _blob_store
+    _blob_store = blob_store
+
+def get_blob_store() -> Optional[BlobStore]:
+    return _blob_store
@@ -0,0 +1,158 @@
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from application.utils.result_formats import (
+    COMPRESSED_CSV_FORMATS,
+    FORMAT_COMPRESSION,
+    ContentEncoding,
+    compress_stream,
+    is_encoding_available,
+    is_format_available,
+    iter_file,
+)
+from domain.value_objects.result_artifact import ResultFormat
+
+# Accept media types mapped to result formats
+ACCEPT_FORMATS = {
+    "application/x-ndjson": ResultFormat.NDJSON,
+    "application/ndjson": ResultFormat.NDJSON,
+    "application/vnd.apache.parquet": ResultFormat.PARQUET,
+    "application/x-parquet": ResultFormat.PARQUET,
+    "application/gzip": ResultFormat.CSV_GZIP,
+    "application/zstd": ResultFormat.CSV_ZSTD,
+    "text/csv": ResultFormat.CSV,
+}
+
+# Formats that can additionally be sent with a transparent Content-Encoding
+ENCODABLE_FORMATS = (ResultFormat.CSV, ResultFormat.NDJSON)
+
+
+def _parse_header_tokens(value: str) -> List[str]:
+    """Return header tokens (media types / encodings) in client order, dropping those with q=0."""
+    tokens = []
+    for part in value.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, val = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(val)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            tokens.append(token)
+    return tokens
+
+
+def negotiate_format(request: Request, format: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """
+    Pick the result format (explicit ?format= wins over the Accept header) and, for CSV/NDJSON,
+    the content encoding to apply from Accept-Encoding (zstd preferred over gzip).
+    """
+    if format is not None:
+        fmt = format.lower()
+        if fmt not in ResultFormat.ALL:
+            raise HTTPException(status_code=400, detail=f"Unsupported format: {format}. Supported: {ResultFormat.ALL}")
+    else:
+        fmt = ResultFormat.CSV
+        for media_type in _parse_header_tokens(request.headers.get("accept", "")):
+            if media_type in ACCEPT_FORMATS:
+                fmt = ACCEPT_FORMATS[media_type]
+                break
+
+    if not is_format_available(fmt):
+        raise HTTPException(status_code=406, detail=f"Format {fmt} is not available on this server")
+
+    encoding = None
+    if fmt in ENCODABLE_FORMATS:
+        accepted = _parse_header_tokens(request.headers.get("accept-encoding", ""))
+        for candidate in (ContentEncoding.ZSTD, ContentEncoding.GZIP):
+            if candidate in accepted and is_encoding_available(candidate):
+                encoding = candidate
+                break
+
+    return fmt, encoding
+
+
+def accepts_file_format(request: Request) -> bool:
+    """
+    True if the Accept header asks for one of the file formats before JSON, for endpoints whose default
+    representation is JSON and that only switch to a file download on request.
+    """
+    for media_type in _parse_header_tokens(request.headers.get("accept", "")):
+        if media_type in ACCEPT_FORMATS:
+            return True
+        if media_type == "application/json":
+            return False
+    return False
+
+
+def artifact_format(fmt: str, encoding: Optional[str]) -> str:
+    """Format of the file to serve: plain CSV with an encoding is served from the pre-compressed CSV."""
+    if fmt == ResultFormat.CSV and encoding is not None:
+        return COMPRESSED_CSV_FORMATS[encoding]
+    return fmt
+
+
+def _download_headers(fmt: str, encoding: Optional[str], filename_stem: str, etag: Optional[str] = None) -> dict:
+    headers = {"Content-Disposition": f'attachment; filename="{filename_stem}.{fmt}"'}
+    if fmt in ENCODABLE_FORMATS:
+        headers["Vary"] = "Accept, Accept-Encoding"
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    if etag is not None:
+        headers["ETag"] = etag
+    return headers
+
+
+def file_response(
+    request: Request,
+    path: Path,
+    etag: str,
+    filename_stem: str,
+    fmt: str = ResultFormat.CSV,
+    encoding: Optional[str] = None,
+    precompressed: bool = False,
+) -> Response:
+    """
+    Send a result file from disk with its ETag, answering 304 when the client already has this version.
+    If 'encoding' is set, the file is either already compressed ('precompressed') or compressed while streaming.
+    """
+    if encoding is not None:
+        etag = f'{etag[:-1]}-{encoding}"'
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    headers = _download_headers(fmt, encoding, filename_stem, etag)
+    media_type = ResultFormat.MEDIA_TYPES[fmt]
+
+    if encoding is not None and not precompressed:
+        return StreamingResponse(compress_stream(iter_file(path), encoding), media_type=media_type, headers=headers)
+
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+def stream_response(
+    chunks: Iterable[bytes],
+    filename_stem: str,
+    fmt: str = ResultFormat.CSV,
+    encoding: Optional[str] = None,
+) -> StreamingResponse:
+    """
+    Stream generated chunks to the client. Compressed CSV formats are compressed on the fly,
+    and CSV/NDJSON get a transparent Content-Encoding if one was negotiated.
+    """
+    body = compress_stream(chunks, FORMAT_COMPRESSION.get(fmt))
+    return StreamingResponse(
+        compress_stream(body, encoding),
+        media_type=ResultFormat.MEDIA_TYPES[fmt],
+        headers=_download_headers(fmt, encoding, filename_stem),
+    )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any
 
 
 class ColumnInput(BaseModel):
@@ -15,6 +15,8 @@ class ColumnInput(BaseModel):
 
 class JobCreatedResponse(BaseModel):
     job_id: str = Field(..., description="UUID of the created job")
+    file_hashes: Dict[str, str] = Field(default_factory=dict, description="SHA-256 of each uploaded file, by file name")
+    duplicates: Dict[str, str] = Field(default_factory=dict, description="Files skipped for having the same content as another file of the job (file name -> file kept)")
 
 
 class JobStatusResponse(BaseModel):
@@ -24,6 +26,8 @@ class JobStatusResponse(BaseModel):
     total_files: int
     error_count: int = 0
     error_message: Optional[str] = None
+    usage: Optional[dict] = None  # tokens, cost and LLM seconds spent so far, with the job budget
+    models: Optional[List[str]] = None  # models the job may use (None = the default model)
 
 
 class RawRow(BaseModel):
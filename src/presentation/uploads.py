@@ -0,0 +1,96 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# PDF header; the spec allows it anywhere in the first 1024 bytes
+PDF_MAGIC = b"%PDF-"
+PDF_HEADER_WINDOW = 1024
+CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class UploadLimits:
+    """
+    Size limits of the documents uploaded with a job.
+    """
+
+    max_file_bytes: int = 100 * 1024 * 1024
+    max_total_bytes: int = 1024 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    path: Path
+    sha256: str
+    size: int
+
+
+def _write_chunk(out: BinaryIO, digest, chunk: bytes) -> None:
+    # hashlib releases the GIL on large buffers, so hashing overlaps with the event loop too
+    digest.update(chunk)
+    out.write(chunk)
+
+
+async def store_upload(upload: UploadFile, dest: Path, max_bytes: int, limit_name: str) -> StoredUpload:
+    """
+    Stream an uploaded PDF to dest in chunks, off the event loop, computing its SHA-256 on the way.
+
+    :param max_bytes: Size at which the upload is rejected (checked while copying).
+    :param limit_name: The limit reached, for the error message.
+    :raises HTTPException: 400 if it is not a PDF, 413 if it is too large (dest is then incomplete)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with dest.open("wb") as out:
+        while True:
+            chunk = await upload.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            if size == 0 and PDF_MAGIC not in chunk[:PDF_HEADER_WINDOW]:
+                raise HTTPException(status_code=400, detail=f"{dest.name} is not a PDF file")
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"{dest.name} exceeds the {limit_name} ({max_bytes // (1024 * 1024)} MB)",
+                )
+            await run_in_threadpool(_write_chunk, out, digest, chunk)
+
+    if size == 0:
+        raise HTTPException(status_code=400, detail=f"{dest.name} is empty")
+    return StoredUpload(path=dest, sha256=digest.hexdigest(), size=size)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects uploads whose declared Content-Length exceeds the limit with 413, before the multipart
+    body is read and spooled. Uploads without a Content-Length are checked while they are copied.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = set(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] in self.paths:
+            headers = dict(scope["headers"])
+            content_length = headers.get(b"content-length")
+            if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+                body = json.dumps({
+                    "detail": f"Upload exceeds the job upload limit ({self.max_bytes // (1024 * 1024)} MB)"
+                }).encode("utf-8")
+                await send({
+                    "type": "http.response.start",
+                    "status": 413,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+                })
+                await send({"type": "http.response.body", "body": body})
+                return
+        await self.app(scope, receive, send)
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from application.use_cases.aggregator import Aggregator
+
+ROWS = [
+    ("a.pdf", "Mexico", "MEX", "Yes", "Page 1"),
+    ("b.pdf", "Brazil", "BRA", "No", "Page 2"),
+    ("c.pdf", "Mexico", "MEX", "No", "Page 3"),
+    ("d.pdf", "Kenya, Brazil", "KEN, BRA", "Yes", "Page 4"),
+    ("e.pdf", "Japan", "JPN", "Not specified", ""),
+    ("f.pdf", "Kenya", "KEN", "No", "Page 6"),
+]
+
+
+@pytest.fixture
+def raw():
+    return pd.DataFrame(
+        [
+            {
+                "source_file": source,
+                "country": country,
+                "country_justification": "Title",
+                "country_alpha_3_code": code,
+                "country_alpha_3_code_justification": "Title",
+                "partner_management": answer,
+                "partner_management_justification": justification,
+                "error": "",
+            }
+            for source, country, code, answer, justification in ROWS
+        ]
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 4])
+def test_incremental_aggregation_equals_full_aggregation(raw, chunk_size):
+    aggregator = Aggregator()
+    aggregated, exploded = None, None
+    for start in range(0, len(raw), chunk_size):
+        aggregated, exploded = aggregator.aggregate_incremental(aggregated, exploded, raw.iloc[start:start + chunk_size])
+
+    expected = aggregator.aggregate(raw)
+    pd.testing.assert_frame_equal(aggregated.reset_index(drop=True), expected.reset_index(drop=True))
+
+
+def test_yes_wins_per_country(raw):
+    aggregated = Aggregator().aggregate(raw).set_index("country_alpha_3_code")
+
+    assert aggregated.loc["MEX", "partner_management"] == "yes"
+    assert aggregated.loc["BRA", "partner_management"] == "yes"  # from the two-country document
+    assert aggregated.loc["JPN", "partner_management"] == "Not specified"
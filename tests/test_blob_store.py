@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from application.utils.blob_store import BlobStore
+
+SHA_A = "a" * 64
+SHA_B = "b" * 64
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(tmp_path / "blobs")
+
+
+def _upload(directory, name, content=b"%PDF-1.4 test"):
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / name
+    path.write_bytes(content)
+    return path
+
+
+def test_add_stores_new_content_once(store, tmp_path):
+    first = _upload(tmp_path / "job1", "doc.pdf")
+    second = _upload(tmp_path / "job2", "doc.pdf")
+
+    assert store.add(first, SHA_A) is True
+    assert store.add(second, SHA_A) is False
+
+    # both job files are now links to the single stored blob
+    assert os.path.samefile(first, store.path(SHA_A))
+    assert os.path.samefile(second, store.path(SHA_A))
+    assert store.references(SHA_A) == 2
+    assert store.info(SHA_A) == {"size": len(b"%PDF-1.4 test"), "references": 2}
+
+
+def test_link_gives_a_job_an_existing_blob(store, tmp_path):
+    store.add(_upload(tmp_path / "job1", "doc.pdf"), SHA_A)
+
+    (tmp_path / "job2").mkdir()
+    dest = store.link(SHA_A, tmp_path / "job2" / "copy.pdf")
+
+    assert dest.read_bytes() == b"%PDF-1.4 test"
+    assert store.references(SHA_A) == 2
+
+
+def test_link_unknown_blob_raises(store, tmp_path):
+    with pytest.raises(ValueError):
+        store.link(SHA_B, tmp_path / "doc.pdf")
+
+
+def test_invalid_hash_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.path("../../etc/passwd")
+
+
+def test_prune_deletes_only_unreferenced_blobs(store, tmp_path):
+    kept = _upload(tmp_path / "job1", "kept.pdf", b"%PDF-1.4 kept")
+    dropped = _upload(tmp_path / "job2", "dropped.pdf", b"%PDF-1.4 dropped!")
+    store.add(kept, SHA_A)
+    store.add(dropped, SHA_B)
+
+    assert store.prune() == 0
+
+    dropped.unlink()  # the job directory was deleted
+    assert store.references(SHA_B) == 0
+    assert store.prune() == len(b"%PDF-1.4 dropped!")
+    assert not store.contains(SHA_B)
+    assert store.contains(SHA_A)
+
+
+def test_prune_keeps_copied_blobs(store, tmp_path, monkeypatch):
+    upload = _upload(tmp_path / "job1", "doc.pdf")
+
+    def no_links(src, dst):
+        raise OSError("cross-device link")
+
+    monkeypatch.setattr(os, "link", no_links)
+    assert store.add(upload, SHA_A) is True
+    monkeypatch.undo()
+
+    # the job kept its own copy, so the blob has no counted reference but must survive
+    assert store.references(SHA_A) == 0
+    assert store.prune() == 0
+    assert store.contains(SHA_A)
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from application.interfaces.llm_client import LLMTransientError
+from application.utils.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(failure_threshold=3, open_seconds=10, max_open_seconds=25, clock=clock)
+
+
+async def test_opens_after_consecutive_failures(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # resets the streak
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.times_opened == 1
+
+
+async def test_open_circuit_holds_callers_until_max_wait(breaker):
+    for _ in range(3):
+        breaker.record_failure()
+
+    with pytest.raises(LLMTransientError):
+        await breaker.acquire(max_wait=0)
+
+
+async def test_half_open_probe_success_closes(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now = 10
+    await breaker.acquire()  # the single trial call
+    assert breaker.state == CircuitState.HALF_OPEN
+
+    # other callers wait while the trial is in flight
+    waiter = asyncio.create_task(breaker.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    breaker.record_success()
+    await asyncio.wait_for(waiter, timeout=1)
+    assert breaker.state == CircuitState.CLOSED
+
+
+async def test_half_open_probe_failure_reopens_for_longer(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now = 10
+    await breaker.acquire()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+    # reopened for twice as long
+    clock.now = 29
+    with pytest.raises(LLMTransientError):
+        await breaker.acquire(max_wait=0)
+
+    clock.now = 30
+    await breaker.acquire()
+    breaker.record_failure()
+
+    # doubling is capped at max_open_seconds
+    clock.now = 54
+    with pytest.raises(LLMTransientError):
+        await breaker.acquire(max_wait=0)
+    clock.now = 55
+    await breaker.acquire()
+    assert breaker.state == CircuitState.HALF_OPEN
+
+
+async def test_abandoned_probe_lets_another_caller_probe(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now = 10
+    await breaker.acquire()
+
+    waiter = asyncio.create_task(breaker.acquire())
+    await asyncio.sleep(0)
+    breaker.record_abandoned()
+    await asyncio.wait_for(waiter, timeout=1)
+    assert breaker.state == CircuitState.HALF_OPEN
@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+
+from application.use_cases import job_lifecycle
+from application.use_cases.aggregator import Aggregator
+from application.use_cases.job_lifecycle import JobLifecycle, JobStateConflictError
+from application.use_cases.llm_processor import LLMProcessor
+from application.utils import temp_file_handler
+from domain.entities.job import JobStatus
+from domain.value_objects.column import Column
+from domain.value_objects.llm_usage import UsageBudget
+from infrastructure.llm_clients.fake_client import FakeLLMClient
+from infrastructure.repository.job_repo_inmemory import InMemoryJobRepository
+
+COLUMNS = [Column("country"), Column("country_alpha_3_code"), Column("partner_management")]
+DOCUMENTS = 6
+
+
+@pytest.fixture
+def lifecycle(tmp_path, monkeypatch):
+    monkeypatch.setattr(temp_file_handler, "tmp_root", tmp_path / "jobs")
+    client = FakeLLMClient(seed=1, latency_median=0)
+    return JobLifecycle(repo=InMemoryJobRepository(), llm_processor=LLMProcessor(client), aggregator=Aggregator())
+
+
+@pytest.fixture
+def files(tmp_path):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    paths = []
+    for i in range(DOCUMENTS):
+        path = uploads / f"doc{i}.pdf"
+        path.write_bytes(b"%PDF-1.4 " + bytes([i]))
+        paths.append(path)
+    return paths
+
+
+def _raw_rows(job_id) -> pd.DataFrame:
+    return pd.read_csv(job_lifecycle.get_job_temp_dir(str(job_id)) / f"raw_data_{job_id}.csv")
+
+
+async def test_job_pauses_when_budget_is_spent_and_resumes(lifecycle, files):
+    # a fake document costs a bit more than 2000 tokens: the budget covers two of them
+    job_id = lifecycle.create_job(files, "context", COLUMNS, budget=UsageBudget(max_tokens=4000))
+    await lifecycle.process_job(job_id)
+
+    job = lifecycle.get_job(job_id)
+    assert job.status == JobStatus.PAUSED
+    assert 0 < job.files_processed < DOCUMENTS
+    assert job.budget_exceeded() is not None
+    paused_rows = len(_raw_rows(job_id))
+    assert paused_rows == job.files_processed
+
+    # resuming needs a budget that is not spent yet
+    with pytest.raises(ValueError):
+        lifecycle.resume_job(job_id)
+
+    lifecycle.resume_job(job_id, UsageBudget(max_tokens=1_000_000))
+    with pytest.raises(JobStateConflictError):
+        lifecycle.resume_job(job_id, UsageBudget(max_tokens=1_000_000))
+    await lifecycle.process_job(job_id, resume=True)
+
+    job = lifecycle.get_job(job_id)
+    assert job.status == JobStatus.DONE
+    assert job.files_processed == DOCUMENTS
+    rows = _raw_rows(job_id)
+    # the documents sent before the pause are not sent again
+    assert sorted(rows["source_file"]) == sorted(path.name for path in files)
+    assert job.usage.total_tokens == int(rows["llm_input_tokens"].sum() + rows["llm_output_tokens"].sum())
+
+
+async def test_job_without_budget_is_not_paused(lifecycle, files):
+    job_id = lifecycle.create_job(files, "context", COLUMNS)
+    await lifecycle.process_job(job_id)
+
+    job = lifecycle.get_job(job_id)
+    assert job.status == JobStatus.DONE
+    assert len(_raw_rows(job_id)) == DOCUMENTS
+
+
+async def test_only_paused_jobs_can_be_resumed(lifecycle, files):
+    job_id = lifecycle.create_job(files, "context", COLUMNS)
+    with pytest.raises(JobStateConflictError):
+        lifecycle.resume_job(job_id)
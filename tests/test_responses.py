@@ -0,0 +1,64 @@
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from domain.value_objects.result_artifact import ResultFormat
+from presentation.responses import accepts_file_format, negotiate_format
+
+
+def _request(**headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def test_result_defaults_to_plain_csv():
+    assert negotiate_format(_request()) == (ResultFormat.CSV, None)
+    assert negotiate_format(_request(accept="*/*")) == (ResultFormat.CSV, None)
+
+
+def test_explicit_format_wins_over_accept():
+    fmt, _ = negotiate_format(_request(accept="application/x-ndjson"), "csv")
+    assert fmt == ResultFormat.CSV
+
+
+def test_accept_selects_format():
+    fmt, _ = negotiate_format(_request(accept="application/x-ndjson, text/csv"))
+    assert fmt == ResultFormat.NDJSON
+
+
+def test_q_zero_media_types_are_ignored():
+    fmt, _ = negotiate_format(_request(accept="application/x-ndjson;q=0, text/csv"))
+    assert fmt == ResultFormat.CSV
+
+
+def test_unsupported_format_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        negotiate_format(_request(), "xlsx")
+    assert exc.value.status_code == 400
+
+
+def test_content_encoding_follows_accept_encoding():
+    _, encoding = negotiate_format(_request(accept_encoding="gzip"))
+    assert encoding == "gzip"
+    _, encoding = negotiate_format(_request(accept_encoding="gzip;q=0"))
+    assert encoding is None
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, False),
+        ("*/*", False),
+        ("application/json", False),
+        ("application/json, text/csv", False),
+        ("text/csv", True),
+        ("application/x-ndjson, application/json", True),
+    ],
+)
+def test_raw_rows_default_to_json(accept, expected):
+    request = _request(accept=accept) if accept is not None else _request()
+    assert accepts_file_format(request) is expected